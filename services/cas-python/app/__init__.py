@@ -0,0 +1,9 @@
+import os
+import time
+
+# Inicio del arranque (la fase "import" de startup.py se mide desde acá)
+STARTED_AT = time.perf_counter()
+
+# Tope de entradas por función de la caché global de SymPy (@cacheit). SymPy lo lee una sola
+# vez, al importarse: por eso se fija acá, antes de cualquier import de sympy (ver memory.py).
+os.environ.setdefault("SYMPY_CACHE_SIZE", os.getenv("CALC2_SYMPY_CACHE_SIZE", "1000"))
@@ -0,0 +1,180 @@
+"""
+Control de admisión para /solve: con más pedidos de los que SymPy puede atender, es
+mejor rechazar rápido que encolar hasta que todos venzan juntos.
+
+- AdmissionController: como mucho `limit` cálculos a la vez (por defecto, el tamaño del
+  pool) y una fila de espera acotada. Si la fila está llena, o si un pedido espera más
+  que `queue_timeout`, se rechaza con 503 y Retry-After. Solo pasa por acá el cálculo
+  real: aciertos de caché y pedidos coalescidos no ocupan lugar.
+- RateLimiter: token bucket opcional por cliente (CALC2_RATE_LIMIT); si se agota, 429.
+
+Los primitivos son thread-safe y no dependen de un event loop en particular (igual
+que SingleFlight): la espera es un concurrent.futures.Future.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import Future
+from threading import Lock
+from typing import Deque, Dict, Optional, Tuple
+
+from .cache import LRUCache
+from .metrics import SHED_REQUESTS
+
+
+class Overloaded(Exception):
+    """Pedido rechazado por sobrecarga (503) o por límite de tasa del cliente (429)."""
+
+    def __init__(self, message: str, status: int = 503, retry_after: int = 1, reason: str = "queue_full"):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after  # segundos, para el header Retry-After
+        self.reason = reason  # queue_full, deadline o rate_limited (etiqueta de la métrica)
+
+
+class AdmissionController:
+    def __init__(self, limit: int, queue_size: int = 16, queue_timeout: float = 5.0):
+        self.limit = max(1, limit)
+        self.queue_size = max(0, queue_size)
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiters: Deque[Future] = deque()
+        self._lock = Lock()
+        self._service_s = 1.0  # duración media (EWMA) de un cálculo, para estimar Retry-After
+        self.admitted = 0
+        self.shed: Dict[str, int] = {"queue_full": 0, "deadline": 0}
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self._service_s * (len(self._waiters) + 1) / self.limit))
+
+    def _reject(self, reason: str, message: str) -> Overloaded:
+        self.shed[reason] += 1
+        SHED_REQUESTS.inc(reason)
+        return Overloaded(message, 503, self._retry_after(), reason)
+
+    def _release_locked(self) -> None:
+        # el lugar pasa directo al primero de la fila (sin volver a competir)
+        if self._waiters:
+            self._waiters.popleft().set_result(True)
+        else:
+            self._active -= 1
+
+    def _enter(self) -> Optional[Future]:
+        # None = admitido ya; si no, el Future de su lugar en la fila
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                self.admitted += 1
+                return None
+            if len(self._waiters) >= self.queue_size:
+                raise self._reject("queue_full", "El servidor está saturado. Probá de nuevo en unos segundos.")
+            fut: Future = Future()
+            self._waiters.append(fut)
+            return fut
+
+    def _settle(self, fut: Future) -> None:
+        with self._lock:
+            if fut.done():
+                self.admitted += 1
+                return
+            self._waiters.remove(fut)
+            raise self._reject("deadline", "El servidor está saturado (demasiada espera). Probá de nuevo en unos segundos.")
+
+    async def acquire(self) -> None:
+        fut = self._enter()
+        if fut is None:
+            return
+        try:
+            await asyncio.wait({asyncio.wrap_future(fut)}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            with self._lock:
+                if fut.done():
+                    self._release_locked()  # el lugar llegó justo cuando el cliente se fue
+                else:
+                    self._waiters.remove(fut)
+            raise
+        self._settle(fut)
+
+    def acquire_sync(self) -> None:
+        """Como acquire(), para hilos sin event loop (ej: los de la cola de jobs)."""
+        fut = self._enter()
+        if fut is None:
+            return
+        try:
+            fut.result(timeout=self.queue_timeout)
+        except TimeoutError:
+            pass
+        self._settle(fut)
+
+    def release(self, held_s: Optional[float] = None) -> None:
+        """Libera el lugar; `held_s` (segundos que se usó) ajusta la estimación de Retry-After."""
+        with self._lock:
+            if held_s is not None:
+                self._service_s = 0.8 * self._service_s + 0.2 * held_s
+            self._release_locked()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "active": self._active,
+                "queued": len(self._waiters),
+                "limit": self.limit,
+                "queue_size": self.queue_size,
+                "admitted": self.admitted,
+                **{f"shed_{reason}": n for reason, n in self.shed.items()},
+            }
+
+
+def parse_rate(spec: str) -> Optional[Tuple[float, float]]:
+    """"2/10" -> (2 pedidos por segundo, ráfaga de 10); "" -> None (sin límite)."""
+    if not spec.strip():
+        return None
+    rate, _, burst = spec.partition("/")
+    rate = float(rate)
+    if rate <= 0:
+        return None
+    return rate, float(burst) if burst else max(1.0, rate)
+
+
+class RateLimiter:
+    """Token bucket por cliente; los buckets viven en un LRU acotado."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = LRUCache(maxsize=max_clients)
+        self._lock = Lock()
+        self.limited = 0
+
+    def check(self, client: str) -> None:
+        """Consume un token de `client`; lanza Overloaded (429) si no le quedan."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client) or [self.burst, now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            if tokens < 1:
+                self._buckets.put(client, [tokens, now])
+                self.limited += 1
+                SHED_REQUESTS.inc("rate_limited")
+                raise Overloaded(
+                    "Demasiados pedidos seguidos. Esperá un momento.", 429,
+                    max(1, math.ceil((1 - tokens) / self.rate)), "rate_limited",
+                )
+            self._buckets.put(client, [tokens - 1, now])
+
+
+# Proxies propios delante del servidor (Render: 1). Cada uno agrega un salto al final de
+# X-Forwarded-For; lo que está más a la izquierda lo escribe el cliente y no sirve de id.
+TRUSTED_PROXIES = int(os.getenv("CALC2_TRUSTED_PROXIES", "1"))
+
+
+def client_id(request) -> str:
+    """IP del cliente: el salto de X-Forwarded-For que agregó el primero de nuestros proxies."""
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded and TRUSTED_PROXIES > 0:
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+        if hops:
+            return hops[-min(TRUSTED_PROXIES, len(hops))]
+    return request.client.host if request.client else "-"
@@ -0,0 +1,151 @@
+"""
+Entrega de la UI y de /static ya comprimidos (una sola vez, al arrancar).
+
+- Asset: el cuerpo y sus variantes gzip/brotli (brotli solo si está instalado el paquete
+  opcional `brotli`), con ETag fuerte por contenido: si el cliente manda If-None-Match
+  con la versión que ya tiene, se responde 304 sin cuerpo.
+- StaticAssets: los archivos de static/ se sirven también con un nombre con huella
+  (logo_xdx.<hash>.png). El contenido de esas URLs no cambia nunca, así que se cachean
+  un año como immutable; la página usa siempre esas URLs (ver fingerprint_urls).
+- json_response(): respuesta JSON comprimida según Accept-Encoding, solo desde
+  CALC2_COMPRESS_MIN_BYTES (con menos, comprimir no compensa). Se serializa con orjson
+  si está instalado (varias veces más rápido que json con los payloads de /solve).
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli, solo gzip
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson, el json de la biblioteca estándar
+    orjson = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("CALC2_COMPRESS_MIN_BYTES", "1024"))
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"  # se puede guardar, pero se revalida (304) antes de usarlo
+
+# en orden de preferencia
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+# PNG, JPEG, woff2, ... ya vienen comprimidos
+_COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+
+def _compress(body: bytes, encoding: str, best: bool) -> bytes:
+    # `best`: lo estático se comprime una sola vez, así que vale el nivel máximo
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else 4)
+    return gzip.compress(body, compresslevel=9 if best else 6, mtime=0)
+
+
+def negotiate(accept_encoding: str, available) -> str:
+    """Mejor codificación de ENCODINGS que el cliente acepta (y que está en `available`)."""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip())
+    for encoding in ENCODINGS:
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return "identity"
+
+
+class Asset:
+    def __init__(self, body: bytes, media_type: str):
+        self.media_type = media_type
+        self.digest = hashlib.sha256(body).hexdigest()
+        self.variants: Dict[str, bytes] = {"identity": body}
+        if media_type.startswith(_COMPRESSIBLE):
+            for encoding in ENCODINGS:
+                data = _compress(body, encoding, best=True)
+                if len(data) < len(body):
+                    self.variants[encoding] = data
+
+    def etag(self, encoding: str) -> str:
+        # una ETag distinta por variante (son representaciones distintas del mismo contenido)
+        tag = self.digest[:20]
+        return f'"{tag}"' if encoding == "identity" else f'"{tag}-{encoding}"'
+
+    def _fresh(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*" or tag.removeprefix("W/").strip('"').split("-")[0] == self.digest[:20]:
+                return True
+        return False
+
+    def response(self, request, cache_control: str = REVALIDATE) -> Response:
+        encoding = negotiate(request.headers.get("accept-encoding", ""), self.variants)
+        headers = {"ETag": self.etag(encoding), "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if self._fresh(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(self.variants[encoding], media_type=self.media_type, headers=headers)
+
+
+class StaticAssets:
+    """Archivos de un directorio, cargados y comprimidos al construirse."""
+
+    def __init__(self, directory: Path):
+        self.files: Dict[str, Asset] = {}
+        self.urls: Dict[str, str] = {}  # nombre -> nombre con huella
+        for path in sorted(Path(directory).iterdir()):
+            if not path.is_file():
+                continue
+            media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            asset = Asset(path.read_bytes(), media_type)
+            stem, suffix = os.path.splitext(path.name)
+            fingerprinted = f"{stem}.{asset.digest[:10]}{suffix}"
+            self.files[path.name] = self.files[fingerprinted] = asset
+            self.urls[path.name] = fingerprinted
+
+    def response(self, request, name: str) -> Optional[Response]:
+        asset = self.files.get(name)
+        if asset is None:
+            return None
+        return asset.response(request, REVALIDATE if name in self.urls else IMMUTABLE)
+
+    def fingerprint_urls(self, html: str, prefix: str = "/static/") -> str:
+        for name, fingerprinted in self.urls.items():
+            html = html.replace(f"{prefix}{name}", f"{prefix}{fingerprinted}")
+        return html
+
+
+def dumps(content) -> bytes:
+    """JSON compacto en UTF-8 (como JSONResponse)."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(request, content, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    response = Response(dumps(content), status_code=status_code, headers=headers, media_type="application/json")
+    response.headers["Vary"] = "Accept-Encoding"
+    if len(response.body) < COMPRESS_MIN_BYTES:
+        return response
+    encoding = negotiate(request.headers.get("accept-encoding", ""), ENCODINGS)
+    if encoding != "identity":
+        response.body = _compress(response.body, encoding, best=False)
+        response.headers["Content-Encoding"] = encoding
+        response.headers["Content-Length"] = str(len(response.body))
+    return response
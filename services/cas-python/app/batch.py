@@ -0,0 +1,122 @@
+"""
+/solve/batch: muchas integrales en un pedido, deduplicadas y devueltas como NDJSON.
+
+- Las entradas se agrupan por clave canónica: "x^2 dx" y "t^2 dt" se calculan una vez.
+- Los ítems se parsean de a uno (en un hilo, fuera del event loop) y a medida que hay
+  lugar: como mucho el tamaño del pool de claves en curso, así la memoria no crece con
+  el largo del pedido y la primera línea sale sin esperar a parsear todo.
+- Los resultados recientes quedan en un LRU acotado (CALC2_BATCH_RECENT) para los repetidos
+  que llegan después; los más viejos salen de RESULT_CACHE o del almacén como en /solve, así
+  la memoria no crece con la cantidad de entradas distintas.
+- Cada línea sale apenas termina su cálculo, con el 'index' del ítem original: un ítem
+  lento no frena al resto.
+- Cada cálculo pasa por el control de admisión como uno de /solve: bajo sobrecarga, sus
+  ítems salen con 503 (el resto del lote sigue).
+- Cada línea tiene el mismo cuerpo que respondería /solve (con los "formats" de su ítem),
+  más 'index' y 'status'.
+"""
+import asyncio
+import os
+from typing import AsyncIterator, Dict, Iterator, List, Sequence, Tuple, Union
+
+import anyio
+
+from .assets import dumps
+from .cache import LRUCache
+from .engine import EXEC_MODE, POOL, check_request, error_payload, ensure_plots, outcome_of, solve_problem_async
+from .metrics import SOLVE_OUTCOMES
+from .solver import SOLUTION_STORE, Problem, Solution, prepare_problem, remember_solution
+
+BATCH_MAX_ITEMS = int(os.getenv("CALC2_BATCH_MAX_ITEMS", "10000"))
+BATCH_RECENT = int(os.getenv("CALC2_BATCH_RECENT", "256"))  # resultados por lote para repetidos
+
+Member = Tuple[int, Problem, Sequence[str], bool]  # (index, problema, formats, plots)
+
+
+def _line(index: int, status: int, body: dict) -> bytes:
+    return dumps({"index": index, "status": status, **body}) + b"\n"
+
+
+def _result_lines(outcome: Union[Solution, Exception], members: List[Member]) -> Iterator[bytes]:
+    if isinstance(outcome, Exception):
+        status, body = error_payload(outcome)
+        SOLVE_OUTCOMES.inc(outcome_of(error=outcome), len(members))
+        for index, *_ in members:
+            yield _line(index, status, body)
+        return
+    SOLVE_OUTCOMES.inc(outcome_of(outcome), len(members))
+    for index, problem, formats, plots in members:
+        payload = outcome.payload(problem.var, formats)
+        if not plots:
+            payload["plots"] = []
+        yield _line(index, 200, payload)
+
+
+async def _render(outcome: Union[Solution, Exception], members: List[Member]) -> List[bytes]:
+    # con almacén, si algún ítem pidió un formato nuevo, el registro se reescribe con él
+    fresh = isinstance(outcome, Solution) and not all(
+        outcome.rendered(problem.var, formats) for _, problem, formats, _ in members
+    )
+    lines = list(_result_lines(outcome, members))
+    if fresh and SOLUTION_STORE is not None:
+        await anyio.to_thread.run_sync(remember_solution, members[0][1].key, outcome)
+    return lines
+
+
+async def stream_batch(items: Sequence) -> AsyncIterator[bytes]:
+    concurrency = POOL.size if EXEC_MODE == "pool" else (os.cpu_count() or 1)
+    pending = iter(enumerate(items))
+    running: Dict[asyncio.Task, str] = {}  # cálculo en curso -> clave canónica
+    waiting: Dict[str, List[Member]] = {}  # clave en curso -> ítems que esperan su resultado
+    finished = LRUCache(maxsize=BATCH_RECENT)  # clave -> Solution o excepción, para repetidos
+    exhausted = False
+    try:
+        while True:
+            # 1) parsear ítems mientras haya lugar para otra clave en curso
+            while not exhausted and len(running) < concurrency:
+                item = next(pending, None)
+                if item is None:
+                    exhausted = True
+                    break
+                index, req = item
+                rejected = check_request(req)
+                if rejected:
+                    yield _line(index, *rejected)
+                    continue
+                try:
+                    problem = await anyio.to_thread.run_sync(prepare_problem, req.input, req.verify, req.precision)
+                except Exception as e:
+                    SOLVE_OUTCOMES.inc(outcome_of(error=e))
+                    yield _line(index, *error_payload(e))
+                    continue
+                member = (index, problem, req.formats, req.plots)
+                outcome = finished.get(problem.key)
+                if problem.key in waiting:
+                    waiting[problem.key].append(member)
+                elif outcome is not None:
+                    if req.plots and isinstance(outcome, Solution):
+                        await ensure_plots(problem, outcome)
+                    for line in await _render(outcome, [member]):
+                        yield line
+                else:
+                    waiting[problem.key] = [member]
+                    task = asyncio.ensure_future(solve_problem_async(problem, admit=True, plots=req.plots))
+                    running[task] = problem.key
+            if not running:
+                return
+
+            # 2) cada clave que termina responde a todos sus ítems
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                key = running.pop(task)
+                members = waiting.pop(key)
+                outcome = task.exception() or task.result()
+                if isinstance(outcome, Solution) and any(plots for *_, plots in members):
+                    await ensure_plots(members[0][1], outcome)  # alguno se sumó queriendo gráficos
+                finished.put(key, outcome)
+                for line in await _render(outcome, members):
+                    yield line
+    finally:
+        # el cliente cortó la conexión: no seguir encolando cálculos
+        for task in running:
+            task.cancel()
@@ -0,0 +1,126 @@
+"""
+Respuestas precalculadas para la página (static/answers.json).
+
+Las integrales más pedidas (los ejemplos de la página y el corpus de data/) se resuelven
+al construir el servicio y quedan en un JSON que la página descarga sin apuro, después
+de cargar. Si lo que escribe el usuario está ahí, se muestra sin ir al servidor; si no,
+se usa /solve/stream como siempre.
+
+- answer_key(): normalización del texto, la misma que hace la página en JS (answerKey).
+  Solo unifica escrituras que el servidor lee igual (espacios, ∫ inicial, "dx" final).
+- El archivo lleva formato, versión del corpus y de SymPy; se sirve con nombre con huella
+  (answers.<hash>.json, ver assets.py), así que cada build tiene su URL y se cachea como
+  immutable.
+- Los gráficos se guardan con menos puntos (BUNDLE_PLOT_POINTS) para que el archivo
+  quede chico.
+
+    python -m app.bundle build [--corpus app/data/corpus.json] [--top 200]
+"""
+import argparse
+import base64
+import html
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+BUNDLE_FORMAT = 1
+BUNDLE_PATH = Path(__file__).parent / "static" / "answers.json"
+BUNDLE_PLOT_POINTS = 80
+
+_DIFFERENTIAL_RE = re.compile(r"^(?P<expr>.+?) ?d(?P<var>[a-zA-Z])$")
+
+
+def answer_key(text: str) -> str:
+    """'∫  x^2   dx', 'x^2dx' y 'x^2' -> 'x^2 dx' (ver _DX_RE en solver.py)."""
+    text = " ".join(text.split())
+    if text.startswith("∫") and not text[1:].lstrip().startswith("_"):
+        text = text[1:].lstrip()
+    m = _DIFFERENTIAL_RE.match(text)
+    return f"{m.group('expr')} d{m.group('var')}" if m else f"{text} dx"
+
+
+def _thin(plot: dict, points: int) -> dict:
+    """El mismo gráfico con a lo sumo `points` puntos (se conservan los cortes con NaN)."""
+    if plot.get("n", 0) <= points:
+        return plot
+    arrays = {k: np.frombuffer(base64.b64decode(plot[k]), dtype="<f4") for k in ("x", "f", "F")}
+    keep = np.linspace(0, len(arrays["x"]) - 1, points).round().astype(int)
+    cuts = np.flatnonzero(np.isnan(arrays["f"]) | np.isnan(arrays["F"]))
+    keep = np.union1d(keep, cuts)
+    thinned = {k: base64.b64encode(v[keep].tobytes()).decode("ascii") for k, v in arrays.items()}
+    return {**plot, "n": int(len(keep)), **thinned}
+
+
+def solve_for_bundle(text: str) -> dict:
+    """Payload de /solve con "steps": true, resuelto en este proceso."""
+    from .multiple import solve_multiple
+    from .solver import parse_multiple, prepare_problem, solve_part, solve_problem
+    from .steps import NoSteps, rule_tree
+
+    multiple = parse_multiple(text)
+    if multiple is not None:
+        return solve_multiple(multiple, solve_part).payload()
+    problem = prepare_problem(text)
+    solution = solve_problem(problem)
+    if solution.needs_rule(problem.var):
+        if solution.bounds is not None and solution.primitive is None:
+            solution.rule = False
+        else:
+            try:
+                solution.rule = rule_tree(problem.cexpr, problem.cvar)
+            except NoSteps:
+                solution.rule = False
+    payload = solution.with_steps(problem.var)
+    payload["plots"] = [_thin(p, BUNDLE_PLOT_POINTS) for p in payload.get("plots") or []]
+    return payload
+
+
+def build_bundle(inputs: Iterable[str], version, progress=None) -> dict:
+    import sympy
+
+    entries: Dict[str, dict] = {}
+    for text in inputs:
+        key = answer_key(text)
+        if key in entries:
+            continue
+        try:
+            entries[key] = solve_for_bundle(text)
+        except Exception:
+            continue  # una entrada rota no frena el resto (queda para el servidor)
+        if progress:
+            progress(text)
+    return {"format": BUNDLE_FORMAT, "version": version, "sympy": sympy.__version__, "entries": entries}
+
+
+def page_examples() -> List[str]:
+    """Entradas de los chips de ejemplo de la página."""
+    from .main import _index_html
+
+    return [html.unescape(eg) for eg in re.findall(r'data-eg="([^"]+)"', _index_html())]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .store import CORPUS_PATH, load_corpus
+
+    parser = argparse.ArgumentParser(prog="python -m app.bundle", description="Armar static/answers.json.")
+    parser.add_argument("command", choices=("build",))
+    parser.add_argument("--corpus", default=str(CORPUS_PATH), help="corpus (formato de data/corpus.json)")
+    parser.add_argument("--top", type=int, help="solo las primeras N entradas del corpus")
+    parser.add_argument("--out", default=str(BUNDLE_PATH))
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(Path(args.corpus))
+    inputs = [text for texts in corpus["groups"].values() for text in texts][:args.top]
+    bundle = build_bundle(page_examples() + inputs, corpus["version"])
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(bundle, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"{len(bundle['entries'])} respuestas en {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
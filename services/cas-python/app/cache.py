@@ -0,0 +1,87 @@
+"""
+Caché de resultados para el solver.
+
+- `canonical_key` reduce una expresión ya parseada a una forma canónica, de modo que
+  entradas equivalentes ("x^2 dx", "x**2 dx", "∫ x^2 dx", "t^2 dt") compartan entrada.
+- `LRUCache` es un LRU acotado y thread-safe con contadores de aciertos/fallos/desalojos.
+"""
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from sympy import Symbol, srepr
+from sympy.core.parameters import evaluate
+
+# Variable de integración canónica: toda integral se guarda como si fuera "d x"
+CANONICAL_VAR = Symbol("x")
+
+
+def canonical_key(expr, var: Symbol, bounds: Optional[tuple] = None) -> Tuple[str, Any, Symbol]:
+    """
+    Devuelve (clave, expr_canónica, var_canónica).
+
+    Los espacios, '^' vs '**' y el prefijo '∫' ya desaparecen al parsear, así que solo
+    falta normalizar el nombre de la variable de integración. Si 'x' aparece como
+    parámetro (ej: "x*t dt", o en los límites: "∫_0^x t dt") no renombramos, para no
+    mezclar símbolos distintos.
+    """
+    if var == CANONICAL_VAR:
+        return srepr(expr), expr, var
+    if CANONICAL_VAR in expr.free_symbols or any(CANONICAL_VAR in b.free_symbols for b in bounds or ()):
+        return f"{var.name}|{srepr(expr)}", expr, var
+
+    # xreplace reconstruye el árbol: sin evaluate(False) se perdería la forma original
+    with evaluate(False):
+        cexpr = expr.xreplace({var: CANONICAL_VAR})
+    return srepr(cexpr), cexpr, CANONICAL_VAR
+
+
+class LRUCache:
+    """LRU acotado y thread-safe. `maxsize <= 0` desactiva la caché."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
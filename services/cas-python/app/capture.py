@@ -0,0 +1,136 @@
+"""
+Registro opcional de lo que llega a /solve, /solve/stream (la UI) y POST /jobs
+(CALC2_CAPTURE_PATH), para armar cachés, corpus y benchmarks con entradas reales en lugar
+de suposiciones. /solve/batch no se registra: son cargas masivas (precálculo, scripts),
+no tráfico de usuarios, y sus repeticiones falsearían el corpus.
+
+- Una línea JSON compacta por pedido: entrada normalizada (espacios colapsados),
+  opciones, status, resultado, tier y ms por fase.
+- record() solo encola (no toca el disco): un hilo de fondo escribe por tandas. Si la cola
+  se llena, las líneas se descartan (y se cuentan) antes que demorar un pedido.
+- Rotación por tamaño como logging.handlers.RotatingFileHandler: capture.log pasa a
+  capture.log.1, .1 a .2, ... hasta `backups`.
+
+Para reproducir un registro (precalentar, rehacer el corpus, comparar builds): bench/replay.py.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+CAPTURE_PATH = os.getenv("CALC2_CAPTURE_PATH", "")
+FLUSH_INTERVAL = 1.0  # segundos máximos que una línea espera en memoria
+
+
+def normalize_input(text: str) -> str:
+    return " ".join(text.split())
+
+
+class CaptureLog:
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backups: int = 3, buffer: int = 10000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=buffer)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="calc2-capture", daemon=True)
+                    self._thread.start()
+
+    def record(self, entry: Dict) -> None:
+        """Encola una línea (no bloquea)."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(json.dumps(entry, ensure_ascii=False, separators=(",", ":")))
+        except queue.Full:
+            self.dropped += 1
+
+    def _rotate(self) -> None:
+        for i in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+
+    def _write(self, lines: List[str]) -> None:
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        try:
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                self._rotate()
+            with open(self.path, "ab") as f:
+                f.write(data)
+            self.written += len(lines)
+        except OSError:
+            self.dropped += len(lines)  # disco lleno o ruta inválida: no frenar al servidor
+
+    def _run(self) -> None:
+        while True:
+            line = self._queue.get()
+            stop = line is None
+            lines = [] if stop else [line]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            # junta lo que vaya llegando (hasta FLUSH_INTERVAL) y escribe de una vez
+            while not stop and len(lines) < 1000:
+                try:
+                    line = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if line is None:
+                    stop = True
+                else:
+                    lines.append(line)
+            if lines:
+                self._write(lines)
+            if stop:
+                return
+
+    def close(self) -> None:
+        """Escribe lo pendiente y detiene el hilo."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"written": self.written, "dropped": self.dropped, "pending": self._queue.qsize(),
+                "rotations": self.rotations}
+
+
+def read_capture(path: str) -> List[dict]:
+    """Líneas de un registro (y sus rotaciones, de la más vieja a la más nueva)."""
+    paths = []
+    i = 1
+    while os.path.exists(f"{path}.{i}"):
+        paths.append(f"{path}.{i}")
+        i += 1
+    paths = paths[::-1] + ([path] if os.path.exists(path) else [])
+    entries = []
+    for p in paths:
+        with open(p, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue  # línea cortada (ej: el proceso murió a mitad de escritura)
+    return entries
+
+
+CAPTURE = CaptureLog(
+    CAPTURE_PATH,
+    max_bytes=int(float(os.getenv("CALC2_CAPTURE_MAX_MB", "10")) * 1024 * 1024),
+    backups=int(os.getenv("CALC2_CAPTURE_BACKUPS", "3")),
+) if CAPTURE_PATH else None
@@ -0,0 +1,139 @@
+"""
+Estimación del costo de una integral antes de calcularla (para elegir carril en engine).
+
+- features(): rasgos del árbol ya parseado: count_ops, profundidad, mezcla de familias de
+  funciones (trig, exp, log, ...), potencias de funciones, grado de la función racional.
+- predict_ms(): modelo log-lineal, log(ms) = w0 + Σ w·rasgo. Los pesos por defecto salen
+  de ajustar el corpus de bench/ (ver fit_weights); CALC2_COST_WEIGHTS (JSON) los reemplaza.
+- Cada cálculo real registra en el logger "calc2.cost" una línea JSON con lo predicho y lo
+  medido; con esas líneas se recalibra:
+      python -m app.cost calibrate cost.log > weights.json
+"""
+import json
+import math
+import os
+import sys
+from typing import Dict, Iterable, List, Optional
+
+from sympy import Pow, count_ops, preorder_traversal
+from sympy.core.function import AppliedUndef, Function
+
+FEATURES = (
+    "ops", "depth", "trig", "inverse_trig", "hyperbolic", "exp", "log", "radical", "special",
+    "families", "function_power", "rational_num", "rational_den", "params", "definite",
+)
+
+_FAMILIES = {
+    "trig": ("sin", "cos", "tan", "cot", "sec", "csc"),
+    "inverse_trig": ("asin", "acos", "atan", "acot", "asec", "acsc"),
+    "hyperbolic": ("sinh", "cosh", "tanh", "coth", "sech", "csch", "asinh", "acosh", "atanh", "acoth"),
+    "exp": ("exp",),
+    "log": ("log",),
+}
+_FAMILY_OF = {name: family for family, names in _FAMILIES.items() for name in names}
+
+# Ajustados con fit_weights() sobre bench/corpus.json v1 más un puñado de integrales
+# pesadas de verdad (modo inline, sin gráficos). Las potencias trigonométricas comunes
+# quedan entre 100 y 1000 ms predichos; las mezclas de familias con productos (ej:
+# x^2*atan(x)*log(x)), arriba de 1500. El corpus no trae funciones especiales,
+# parámetros ni límites: esos tres pesos son estimaciones a mano.
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "bias": -0.276, "ops": 2.134, "depth": 0.075, "trig": 0.018, "inverse_trig": 1.181,
+    "hyperbolic": 0.506, "exp": 0.184, "log": 0.697, "radical": -0.154, "special": 1.0,
+    "families": 0.902, "function_power": 0.468, "rational_num": -0.131, "rational_den": 0.143,
+    "params": 0.3, "definite": 0.3,
+}
+
+
+def _load_weights() -> Dict[str, float]:
+    spec = os.getenv("CALC2_COST_WEIGHTS", "")
+    if not spec:
+        return dict(DEFAULT_WEIGHTS)
+    if not spec.lstrip().startswith("{"):
+        with open(spec, encoding="utf-8") as f:  # ruta a un JSON de `calibrate`
+            spec = f.read()
+    return {**DEFAULT_WEIGHTS, **json.loads(spec)}
+
+
+WEIGHTS = _load_weights()
+
+
+def _depth(expr) -> int:
+    return 1 + max((_depth(a) for a in expr.args), default=0)
+
+
+def features(expr, var, bounds: Optional[tuple] = None) -> Dict[str, float]:
+    """Rasgos numéricos de la expresión (claves de FEATURES)."""
+    f = dict.fromkeys(FEATURES, 0.0)
+    f["ops"] = math.log1p(count_ops(expr))
+    f["depth"] = float(_depth(expr))
+    families = set()
+    for node in preorder_traversal(expr):
+        if isinstance(node, Pow):
+            base, exponent = node.args
+            if not exponent.is_Integer and base.has(var):
+                f["radical"] += 1  # sqrt(1 - x^2), x^(1/3), 2^x ...
+            elif exponent.is_Integer and isinstance(base, Function) and base.has(var):
+                f["function_power"] = max(f["function_power"], float(abs(exponent)))  # sin(x)^5
+        elif isinstance(node, Function) and not isinstance(node, AppliedUndef):
+            family = _FAMILY_OF.get(type(node).__name__, "special")
+            f[family] += 1
+            families.add(family)
+    f["families"] = float(len(families))
+    if expr.is_rational_function(var):
+        num, den = expr.as_numer_denom()
+        f["rational_num"] = float(num.as_poly(var).degree()) if num.has(var) else 0.0
+        f["rational_den"] = float(den.as_poly(var).degree()) if den.has(var) else 0.0
+    f["params"] = float(len(expr.free_symbols - {var}))
+    f["definite"] = 1.0 if bounds is not None else 0.0
+    return f
+
+
+def predict_ms(feats: Dict[str, float], weights: Optional[Dict[str, float]] = None) -> float:
+    weights = WEIGHTS if weights is None else weights
+    log_ms = weights.get("bias", 0.0) + sum(weights.get(name, 0.0) * value for name, value in feats.items())
+    return math.exp(min(log_ms, 20.0))
+
+
+def fit_weights(rows: Iterable[dict]) -> Dict[str, float]:
+    """
+    Ajuste por mínimos cuadrados (con un poco de regularización) de log(ms) sobre los
+    rasgos. `rows`: dicts con "features" y "actual_ms" (las líneas del logger calc2.cost).
+    """
+    import numpy as np
+
+    rows = [r for r in rows if r.get("actual_ms", 0) > 0 and "features" in r]
+    if not rows:
+        raise ValueError("no hay mediciones para ajustar")
+    X = np.array([[1.0] + [r["features"].get(name, 0.0) for name in FEATURES] for r in rows])
+    y = np.log([r["actual_ms"] for r in rows])
+    ridge = 1e-2 * np.eye(X.shape[1])
+    ridge[0, 0] = 0.0  # el término independiente no se penaliza
+    w = np.linalg.solve(X.T @ X + ridge, X.T @ y)
+    return {"bias": round(float(w[0]), 3), **{name: round(float(v), 3) for name, v in zip(FEATURES, w[1:])}}
+
+
+def read_log(lines: Iterable[str]) -> List[dict]:
+    """Registros JSON del logger calc2.cost (ignora el prefijo que agregue el formato del log)."""
+    rows = []
+    for line in lines:
+        start = line.find("{")
+        if start >= 0:
+            try:
+                rows.append(json.loads(line[start:]))
+            except ValueError:
+                continue
+    return rows
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) != 2 or argv[0] != "calibrate":
+        print("uso: python -m app.cost calibrate <archivo de log>", file=sys.stderr)
+        return 2
+    with open(argv[1], encoding="utf-8") as f:
+        print(json.dumps(fit_weights(read_log(f)), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,143 @@
+"""
+Integrales definidas: ∫_a^b f(x) dx.
+
+1. Se busca una primitiva con los tiers de siempre, pero con un tope total de tiempo
+   (CALC2_DEFINITE_SYMBOLIC_BUDGET; en el carril pesado, la suma de sus presupuestos):
+   si no aparece rápido, no vale la pena esperarla.
+2. Si hay primitiva, se evalúa en los límites (con límites laterales si hace falta),
+   partiendo el intervalo en las singularidades interiores: si alguna parte diverge,
+   la integral diverge (ej: ∫_{-1}^1 1/x^2 dx).
+3. En paralelo a eso se calcula la integral por cuadratura numérica (mpmath.quad sobre
+   el integrando compilado) con la precisión pedida: es la respuesta cuando no hay
+   primitiva y la verificación del valor exacto cuando sí la hay.
+"""
+import os
+from time import perf_counter
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import mpmath
+from sympy import FiniteSet, Float, Integral, Interval, lambdify, limit, nan, oo, sympify, zoo
+from sympy.calculus.singularities import singularities
+
+from .executor import SolveTimeout
+from .strategies import TierTimeout, integrate_tiered, time_budget
+
+DEFAULT_PRECISION = 15  # dígitos significativos
+SYMBOLIC_BUDGET = float(os.getenv("CALC2_DEFINITE_SYMBOLIC_BUDGET", "2"))
+QUADRATURE_BUDGET = float(os.getenv("CALC2_QUADRATURE_BUDGET", "5"))
+
+
+class Definite(NamedTuple):
+    value: object  # valor exacto (SymPy) o Float de la cuadratura; None si no hubo forma
+    primitive: object  # primitiva usada, o None
+    numeric: Optional[object]  # Float de la cuadratura, o None si no se pudo
+    ok: Optional[bool]  # ¿coinciden valor exacto y cuadratura? (None = no concluyente)
+    method: str  # "quadrature" o "none" (ver solver._METHODS)
+    tier: str
+    timings: Dict[str, float]
+
+
+def _at(primitive, var, point, direction: str):
+    value = primitive.subs(var, point)
+    if point in (oo, -oo) or value.has(nan, zoo, oo, -oo):
+        value = limit(primitive, var, point, direction)
+    return value
+
+
+def evaluate_at_bounds(primitive, var, lo, hi, cuts=()):
+    """
+    F(b) - F(a), con límites laterales en los extremos infinitos o singulares.
+    Con `cuts` (singularidades dentro de (a, b)) suma cada tramo por separado.
+    """
+    edges = [lo, *cuts, hi]
+    return sum((_at(primitive, var, b, "-") - _at(primitive, var, a, "+") for a, b in zip(edges, edges[1:])), 0)
+
+
+def interior_singularities(expr, primitive, var, lo, hi) -> list:
+    """Singularidades del integrando o de la primitiva dentro de (a, b)."""
+    points = set()
+    for f in (expr, primitive):
+        found = singularities(f, var, Interval.open(lo, hi))
+        if not isinstance(found, FiniteSet):
+            raise NotImplementedError(str(found))
+        points |= set(found)
+    return sorted(points, key=float)
+
+
+def diverges(value) -> bool:
+    return value in (oo, -oo, zoo, nan)
+
+
+def quadrature(expr, var, lo, hi, precision: int = DEFAULT_PRECISION) -> Tuple[Optional[object], Optional[float]]:
+    """(valor, error estimado) por cuadratura tanh-sinh; (None, None) si no se puede."""
+    if (expr.free_symbols - {var}) or lo.free_symbols or hi.free_symbols:
+        return None, None  # con parámetros no hay un número que calcular
+    try:
+        f = lambdify(var, expr, modules="mpmath")
+        with mpmath.workdps(precision + 5), time_budget(QUADRATURE_BUDGET):
+            a = mpmath.mpmathify(lo.evalf(precision + 5)) if lo.is_finite else (mpmath.inf if lo == oo else -mpmath.inf)
+            b = mpmath.mpmathify(hi.evalf(precision + 5)) if hi.is_finite else (mpmath.inf if hi == oo else -mpmath.inf)
+            value, error = mpmath.quad(f, [a, b], error=True)
+            if isinstance(value, mpmath.mpc):
+                if abs(value.imag) > 10 ** -precision * (1 + abs(value.real)):
+                    return None, None
+                value = value.real
+            if not mpmath.isfinite(value):
+                return None, None
+            return Float(mpmath.nstr(value, precision + 5), precision), float(error)
+    except (TierTimeout, Exception):
+        return None, None
+
+
+def _agree(exact, numeric, precision: int) -> Optional[bool]:
+    try:
+        approx = complex(exact.evalf(precision + 5))
+    except (TypeError, ValueError):
+        return None
+    tolerance = 10 ** -min(precision - 2, 10) * max(1.0, abs(float(numeric)))
+    return abs(approx - float(numeric)) <= tolerance
+
+
+def definite_integral(expr, var, lo, hi, precision: int = DEFAULT_PRECISION,
+                      budgets: Optional[Dict[str, float]] = None) -> Definite:
+    """
+    `budgets` reemplaza los presupuestos por tier (carril pesado): entonces el tope de la
+    parte simbólica es su suma en vez de SYMBOLIC_BUDGET.
+    """
+    lo, hi = sympify(lo), sympify(hi)
+    tier, timings, primitive, exact = "quadrature", {}, None, None
+    total = SYMBOLIC_BUDGET if budgets is None else max(SYMBOLIC_BUDGET, sum(budgets.values()))
+    try:
+        primitive, tier, timings = integrate_tiered(expr, var, budgets, total=total)
+        if primitive.has(Integral):
+            primitive = None
+    except SolveTimeout:
+        primitive = None  # la cuadratura toma la posta
+    if primitive is not None:
+        try:
+            with time_budget(SYMBOLIC_BUDGET):
+                try:
+                    cuts = interior_singularities(expr.doit(), primitive, var, lo, hi)
+                except Exception:
+                    cuts = []  # sin información: la cuadratura hará de control
+                exact = evaluate_at_bounds(primitive, var, lo, hi, cuts)
+            if exact.has(Integral) or (exact.has(nan, zoo) and not diverges(exact)):
+                exact = None
+        except (TierTimeout, Exception):
+            exact = None
+
+    if exact is not None and diverges(exact):
+        # la cuadratura de una integral divergente devuelve cualquier número: no se compara
+        return Definite(exact, primitive, None, None, "none", tier, timings)
+
+    t0 = perf_counter()
+    numeric, error = quadrature(expr, var, lo, hi, precision)
+    timings = {**timings, "quadrature": (perf_counter() - t0) * 1000}
+    if exact is not None:
+        ok = _agree(exact, numeric, precision) if numeric is not None else None
+        return Definite(exact, primitive, numeric, ok, "quadrature" if ok is not None else "none", tier, timings)
+    if numeric is not None:
+        # sin valor exacto: la cuadratura es la respuesta; "ok" si su error estimado alcanza
+        ok = True if error <= 10 ** -(precision - 1) * max(1.0, abs(float(numeric))) else None
+        return Definite(numeric, primitive, numeric, ok, "quadrature" if ok else "none", "quadrature", timings)
+    return Definite(None, primitive, None, None, "none", tier, timings)
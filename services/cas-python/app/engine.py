@@ -0,0 +1,591 @@
+"""
+Orquestación de /solve: parseo → caché → cálculo (en el pool de procesos).
+
+Modos (CALC2_EXEC_MODE):
+- "pool"   (por defecto): compute_solution corre en workers con tope de tiempo/memoria.
+- "inline": corre en el proceso web (sin tope duro; útil para depurar).
+
+En el event loop solo queda la coordinación: el parseo (parse_expr), el almacén SQLite
+y el LaTeX también bloquean, así que corren en hilos (anyio.to_thread) como el cálculo.
+
+Carriles: antes de calcular se estima el costo (cost.py). Lo que se predice caro va al
+carril "heavy" (un pool chico y aparte, con presupuestos más largos) para no demorar a
+las integrales baratas del carril "fast".
+"""
+import asyncio
+import json
+import logging
+import os
+from contextlib import asynccontextmanager, contextmanager
+from time import perf_counter
+from typing import AsyncIterator, Dict, NamedTuple, Optional, Sequence, Tuple, Union
+
+import anyio
+from sympy import preorder_traversal
+
+from .admission import AdmissionController, Overloaded, RateLimiter, parse_rate
+from .cost import features, predict_ms
+from .definite import DEFAULT_PRECISION
+from .executor import Deadline, ProcessPool, SolveTimeout, WorkerCrashed, WorkerError
+from .memory import MemoryWatchdog
+from .multiple import ITERATED, IteratedSolution, iterate, render_multiple_problem, solve_multiple
+from .metrics import EXPR_SIZE, LANE_LATENCY, PHASE_LATENCY, SOLVE_OUTCOMES, TIER_LATENCY, PhaseTimer
+from .singleflight import SingleFlight
+from .solver import (
+    SOLUTION_STORE, MultipleProblem, ParseError, Problem, Solution, cached_solution, compute_solution,
+    integrate_stage, make_plots, parse_multiple, prepare_problem, remember_solution, render_antiderivative,
+    render_problem, verify_stage,
+)
+from .startup import warm_worker
+from .strategies import parse_budgets
+
+EXEC_MODE = os.getenv("CALC2_EXEC_MODE", "pool").lower()
+
+# tope de un cálculo: segundos, un Deadline extensible o None (el del pool del carril)
+Timeout = Union[float, Deadline, None]
+
+
+def check_request(req) -> Optional[Tuple[int, dict]]:
+    """Valida un SolveRequest; devuelve (status, body) si hay que rechazarlo."""
+    if not hasattr(req, "type") or req.type is None:
+        return 422, {"error": "Falta 'type'."}
+    if req.type.lower() != "integral":
+        return 422, {"error": "Tipo no soportado. Usa 'integral'."}
+    if not getattr(req, "input", None):
+        return 422, {"error": "Falta 'input' con la expresión."}
+    return None
+
+
+def error_payload(e: Exception) -> Tuple[int, dict]:
+    """Traduce una excepción del pipeline al (status, body) JSON que usa /solve."""
+    if isinstance(e, Overloaded):
+        return e.status, {"error": str(e), "retry_after": e.retry_after}
+    if isinstance(e, (SolveTimeout, WorkerCrashed)):
+        return 504, {"error": "La integral es demasiado costosa de calcular. Prueba con una expresión más simple.", "detail": str(e)}
+    body = {"error": "No pude interpretar la expresión. Revisa sintaxis (usa ^ o ** para potencias).", "detail": str(e)}
+    if getattr(e, "position", None) is not None:
+        body["position"] = e.position  # índice del carácter problemático en 'input'
+    return 400, body
+
+
+# Cálculos en curso, para coalescer pedidos idénticos simultáneos
+INFLIGHT = SingleFlight()
+
+# Reciclado de workers entre pedidos (0 = nunca); ver executor.ProcessPool y memory.py
+WORKER_MAX_TASKS = int(os.getenv("CALC2_WORKER_MAX_TASKS", "500"))
+WORKER_RECYCLE_MB = float(os.getenv("CALC2_WORKER_RECYCLE_MB", "300"))
+
+POOL = ProcessPool(
+    size=int(os.getenv("CALC2_POOL_SIZE", str(os.cpu_count() or 1))),
+    timeout=float(os.getenv("CALC2_SOLVE_TIMEOUT", "20")),
+    memory_mb=float(os.getenv("CALC2_SOLVE_MEMORY_MB", "512")),
+    initializer=warm_worker,
+    max_tasks=WORKER_MAX_TASKS,
+    recycle_mb=WORKER_RECYCLE_MB,
+)
+
+# Cálculos simultáneos desde /solve (el resto espera en una fila acotada o se rechaza)
+ADMISSION = AdmissionController(
+    limit=int(os.getenv("CALC2_ADMISSION_LIMIT", str(POOL.size))),
+    queue_size=int(os.getenv("CALC2_ADMISSION_QUEUE", "16")),
+    queue_timeout=float(os.getenv("CALC2_ADMISSION_QUEUE_TIMEOUT", "5")),
+)
+_rate = parse_rate(os.getenv("CALC2_RATE_LIMIT", ""))
+RATE_LIMITER = RateLimiter(*_rate) if _rate else None
+
+# Carril pesado: costo predicho >= HEAVY_COST_MS (0 = un solo carril)
+HEAVY_COST_MS = float(os.getenv("CALC2_HEAVY_COST_MS", "1500"))
+HEAVY_POOL = ProcessPool(
+    size=int(os.getenv("CALC2_HEAVY_POOL_SIZE", "1")),
+    timeout=float(os.getenv("CALC2_HEAVY_SOLVE_TIMEOUT", "60")),
+    memory_mb=POOL.memory_mb,
+    initializer=warm_worker,
+    max_tasks=WORKER_MAX_TASKS,
+    recycle_mb=WORKER_RECYCLE_MB,
+)
+HEAVY_TIER_BUDGETS = parse_budgets(
+    os.getenv("CALC2_HEAVY_TIER_BUDGETS", "polynomial=1,table=1,manual=20,integrate=0")
+)
+HEAVY_ADMISSION = AdmissionController(
+    limit=HEAVY_POOL.size,
+    queue_size=int(os.getenv("CALC2_HEAVY_ADMISSION_QUEUE", "8")),
+    queue_timeout=float(os.getenv("CALC2_HEAVY_QUEUE_TIMEOUT", "15")),
+)
+
+WATCHDOG = MemoryWatchdog(
+    {"workers": POOL, "heavy_workers": HEAVY_POOL},
+    interval=float(os.getenv("CALC2_WATCHDOG_INTERVAL", "30")),
+    web_mb=float(os.getenv("CALC2_WEB_RSS_MB", "256")),
+)
+
+# Costo predicho vs. medido de cada cálculo (una línea JSON; ver cost.py para recalibrar)
+COST_LOG = logging.getLogger("calc2.cost")
+if os.getenv("CALC2_COST_LOG"):
+    COST_LOG.addHandler(logging.FileHandler(os.environ["CALC2_COST_LOG"], encoding="utf-8"))
+    COST_LOG.setLevel(logging.INFO)
+
+
+class Route(NamedTuple):
+    lane: str  # "fast" o "heavy"
+    predicted_ms: float
+    features: Dict[str, float]
+
+
+# las integrales iteradas se admiten enteras en el carril rápido (ver solve_multiple_async)
+_ITERATED_ROUTE = Route("fast", 0.0, {})
+
+
+def route(problem: Problem) -> Route:
+    feats = features(problem.cexpr, problem.cvar, problem.bounds)
+    predicted = predict_ms(feats)
+    lane = "heavy" if HEAVY_COST_MS > 0 and predicted >= HEAVY_COST_MS else "fast"
+    return Route(lane, predicted, feats)
+
+
+def _log_cost(plan: Route, actual_ms: float, tier: Optional[str], error: Optional[Exception] = None) -> None:
+    if not COST_LOG.isEnabledFor(logging.INFO):
+        return
+    record = {
+        "lane": plan.lane, "predicted_ms": round(plan.predicted_ms, 1), "actual_ms": round(actual_ms, 1),
+        "tier": tier, "features": {k: round(v, 3) for k, v in plan.features.items()},
+    }
+    if error is not None:
+        record["error"] = outcome_of(error=error)  # con timeout, actual_ms es solo una cota inferior
+    COST_LOG.info(json.dumps(record))
+
+
+def _run_in_lane(plan: Route, fn, *args, timeout: Timeout = None):
+    if EXEC_MODE == "inline":
+        return fn(*args)
+    return (HEAVY_POOL if plan.lane == "heavy" else POOL).run_sync(fn, *args, timeout=timeout)
+
+
+def _budgets(plan: Route) -> Optional[Dict[str, float]]:
+    return HEAVY_TIER_BUDGETS if plan.lane == "heavy" else None
+
+
+def _observe_cost(plan: Route, t0: float, solution: Optional[Solution] = None,
+                  error: Optional[Exception] = None) -> None:
+    actual_ms = (perf_counter() - t0) * 1000
+    _log_cost(plan, actual_ms, solution.tier if solution is not None else None, error)
+    if solution is not None:
+        LANE_LATENCY.observe(plan.lane, actual_ms)
+        TIER_LATENCY.observe(solution.tier, sum(solution.timings.values()))
+
+
+def _compute_blocking(problem: Problem, timeout: Timeout = None, plan: Optional[Route] = None,
+                      plots: bool = True) -> Solution:
+    plan = plan if plan is not None else route(problem)
+    t0 = perf_counter()
+    try:
+        solution = _run_in_lane(
+            plan, compute_solution, problem.cexpr, problem.cvar, problem.verify, problem.bounds,
+            problem.precision, _budgets(plan), plots, timeout=timeout,
+        )
+    except Exception as e:
+        _observe_cost(plan, t0, error=e)
+        raise
+    _observe_cost(plan, t0, solution)
+    return solution
+
+
+def _gate(plan: Route) -> AdmissionController:
+    return HEAVY_ADMISSION if plan.lane == "heavy" else ADMISSION
+
+
+@asynccontextmanager
+async def _admitted(plan: Route, timer: PhaseTimer, admit: bool = True) -> AsyncIterator[None]:
+    """Ocupa un lugar del control de admisión del carril (la espera es la fase "queue")."""
+    if not admit:
+        yield
+        return
+    gate = _gate(plan)
+    with timer.phase("queue"):
+        await gate.acquire()
+    t0 = perf_counter()
+    try:
+        yield
+    finally:
+        gate.release(perf_counter() - t0)
+
+
+@contextmanager
+def _admitted_blocking(plan: Route, admit: bool = True):
+    """Como _admitted, desde un hilo sin event loop (los de la cola de jobs)."""
+    if not admit:
+        yield
+        return
+    gate = _gate(plan)
+    gate.acquire_sync()
+    t0 = perf_counter()
+    try:
+        yield
+    finally:
+        gate.release(perf_counter() - t0)
+
+
+def outcome_of(solution: Optional[Solution] = None, error: Optional[Exception] = None) -> str:
+    """Clasifica el resultado de un pedido para el contador calc2_solve_outcomes_total."""
+    if error is not None:
+        if isinstance(error, ParseError):
+            return "parse_error"
+        if isinstance(error, (SolveTimeout, WorkerCrashed)):
+            return "timeout"
+        if isinstance(error, Overloaded):
+            return "shed"
+        return "error"
+    return {True: "ok", False: "verification_failed", None: "unverified"}[solution.ok]
+
+
+def solve_integral_blocking(user_text: str, verify_mode: str = "auto",
+                            precision: int = DEFAULT_PRECISION) -> dict:
+    """Como solver.solve_integral, pero el cálculo pasa por el pool (para hilos de fondo)."""
+    problem = prepare_problem(user_text, verify_mode, precision)
+    return solve_problem_blocking(problem).for_var(problem.var)
+
+
+def solve_problem_blocking(problem: Problem, timeout: Timeout = None, admit: bool = False,
+                           plots: bool = True) -> Solution:
+    """
+    Caché o cálculo desde un hilo sin event loop; coalesce con los pedidos de /solve.
+    Con `admit`, el cálculo pasa por el control de admisión (como en solve_problem_async).
+    """
+    solution = cached_solution(problem.key)
+    if solution is None:
+        def compute() -> Solution:
+            plan = route(problem)
+            with _admitted_blocking(plan, admit):
+                result = _compute_blocking(problem, timeout, plan, plots)
+            remember_solution(problem.key, result)
+            return result
+        solution = INFLIGHT.do_sync(problem.key, compute)
+    if plots and solution.plots is None:
+        INFLIGHT.do_sync(f"{problem.key}|plots", lambda: _plots_blocking(problem, solution))
+    return solution
+
+
+def solve_parsed_blocking(problem: Union[Problem, MultipleProblem], timeout: Timeout = None,
+                          admit: bool = False, steps: bool = False,
+                          formats: Sequence[str] = ("latex",), plots: bool = True) -> Tuple[object, dict]:
+    """
+    (solución, payload) de un problema ya parseado, como solve_integral_async pero desde un
+    hilo sin event loop (los jobs). Mismas opciones: `steps`, `formats` y `plots`.
+    """
+    if isinstance(problem, MultipleProblem):
+        solution = ITERATED.get(problem.key)
+        if solution is None:
+            with _admitted_blocking(_ITERATED_ROUTE, admit):
+                solution = solve_multiple(problem, lambda p: solve_problem_blocking(p, timeout, plots=False))
+        return solution, solution.payload(formats)
+    solution = solve_problem_blocking(problem, timeout, admit, plots)
+    fresh = not solution.rendered(problem.var, formats)
+    steps = steps and "latex" in formats
+    if steps and solution.needs_rule(problem.var):
+        if solution.bounds is not None and solution.primitive is None:
+            solution.rule = False  # cuadratura: no hay primitiva que desarrollar
+        else:
+            plan = route(problem)
+            solution.rule = INFLIGHT.do_sync(f"{problem.key}|steps", lambda: _rule_tree_blocking(problem, plan))
+        fresh = True
+    payload = solution.payload(problem.var, formats, steps=steps)
+    if fresh and SOLUTION_STORE is not None:
+        remember_solution(problem.key, solution)  # formatos nuevos o desarrollo
+    if not plots:
+        payload["plots"] = []
+    return solution, payload
+
+
+def _plots_blocking(problem: Problem, solution: Solution) -> None:
+    """Gráficos de una solución que se calculó sin ellos (ver compute_solution)."""
+    if solution.plots is not None:  # los calculó otro pedido mientras tanto
+        return
+    try:
+        plots = _run_in_lane(route(problem), make_plots, *solution.plot_args())
+    except (WorkerError, SolveTimeout, WorkerCrashed):
+        plots = []
+    solution.set_plots(plots)
+    remember_solution(problem.key, solution)
+
+
+async def ensure_plots(problem: Problem, solution: Solution) -> None:
+    if solution.plots is None:
+        await INFLIGHT.do(f"{problem.key}|plots", lambda: anyio.to_thread.run_sync(_plots_blocking, problem, solution))
+
+
+async def solve_multiple_async(problem: MultipleProblem, timer: Optional[PhaseTimer] = None,
+                               timeout: Timeout = None, admit: bool = False) -> IteratedSolution:
+    """
+    Integral iterada (ver multiple.py): las partes de cada nivel van por solve_problem_async.
+    Con `admit`, el pedido entero ocupa un solo lugar del carril rápido y sus partes se
+    calculan de a una dentro de él (una suma de 30 términos no llena la fila de admisión).
+    """
+    solution = ITERATED.get(problem.key)
+    if solution is None:
+        timer = timer if timer is not None else PhaseTimer()
+        steps = iterate(problem)
+        async with _admitted(_ITERATED_ROUTE, timer, admit):
+            try:
+                problems = next(steps)
+                while True:
+                    solutions = []
+                    for p in problems:
+                        solutions.append(await solve_problem_async(p, timer, timeout, plots=False))
+                    problems = steps.send(solutions)
+            except StopIteration as done:
+                solution = done.value
+        ITERATED.put(problem.key, solution)
+    return solution
+
+
+async def _compute_and_remember(problem: Problem, timer: PhaseTimer, timeout: Timeout = None,
+                                admit: bool = False, plots: bool = True) -> Solution:
+    plan = route(problem)
+    async with _admitted(plan, timer, admit):
+        solution = await anyio.to_thread.run_sync(_compute_blocking, problem, timeout, plan, plots)
+    # solo el pedido que calculó (no los coalescidos) reporta las fases del worker
+    for name, ms in solution.phases.items():
+        timer.add(name, ms)
+    await _remember(problem.key, solution)
+    return solution
+
+
+def parse_request(user_text: str, verify_mode: str = "auto", precision: int = DEFAULT_PRECISION):
+    """Problem, o MultipleProblem si es una integral iterada ("x*y dx dy")."""
+    multiple = parse_multiple(user_text, verify_mode, precision)
+    problem = prepare_problem(user_text, verify_mode, precision) if multiple is None else multiple
+    EXPR_SIZE.observe(sum(1 for _ in preorder_traversal(problem.expr)))
+    return problem
+
+
+async def _cached(key: str) -> Optional[Solution]:
+    if SOLUTION_STORE is None:
+        return cached_solution(key)  # solo el LRU en memoria: no bloquea
+    return await anyio.to_thread.run_sync(cached_solution, key)
+
+
+async def _remember(key: str, solution: Solution) -> None:
+    # to_record() renderiza el payload si hace falta y el almacén escribe en SQLite
+    if SOLUTION_STORE is None:
+        remember_solution(key, solution)
+    else:
+        await anyio.to_thread.run_sync(remember_solution, key, solution)
+
+
+async def solve_problem_async(problem: Problem, timer: Optional[PhaseTimer] = None,
+                              timeout: Timeout = None, admit: bool = False,
+                              plots: bool = True) -> Solution:
+    """
+    Caché o cálculo de un problema ya parseado; el cálculo no bloquea el event loop.
+    Pedidos concurrentes con la misma clave canónica comparten un único cálculo.
+    `timeout` (segundos o Deadline) reemplaza el tope del pool para este cálculo. Con `admit`, el
+    cálculo (no la caché ni la espera coalescida) pasa por el control de admisión.
+    Sin `plots` no se calculan los gráficos; si la solución los necesita y no los tiene
+    (la calculó un pedido sin gráficos), se agregan aparte.
+    """
+    timer = timer if timer is not None else PhaseTimer()
+    with timer.phase("cache"):
+        solution = await _cached(problem.key)
+    if solution is None:
+        with timer.phase("compute"):
+            solution = await INFLIGHT.do(
+                problem.key, lambda: _compute_and_remember(problem, timer, timeout, admit, plots)
+            )
+    if plots and solution.plots is None:
+        with timer.phase("plot"):
+            await ensure_plots(problem, solution)
+    return solution
+
+
+def _rule_tree_blocking(problem: Problem, plan: Route):
+    from .steps import STEPS_BUDGET, NoSteps, rule_tree  # solo si algún cliente pide los pasos
+
+    try:
+        return _run_in_lane(plan, rule_tree, problem.cexpr, problem.cvar, timeout=STEPS_BUDGET + 5)
+    except (NoSteps, WorkerError, SolveTimeout, WorkerCrashed):
+        return False  # sin desarrollo: quedan los pasos de siempre
+
+
+async def with_steps(problem: Problem, solution: Solution, formats: Sequence[str] = ("latex",)) -> dict:
+    """
+    Payload con el desarrollo paso a paso real (steps.py) en steps_latex. El árbol de
+    reglas se calcula una sola vez, en el carril del problema, y queda con la solución.
+    """
+    if solution.needs_rule(problem.var):
+        if solution.bounds is not None and solution.primitive is None:
+            solution.rule = False  # cuadratura: no hay primitiva que desarrollar
+        else:
+            plan = route(problem)
+            solution.rule = await INFLIGHT.do(
+                f"{problem.key}|steps", lambda: anyio.to_thread.run_sync(_rule_tree_blocking, problem, plan)
+            )
+        payload = await anyio.to_thread.run_sync(lambda: solution.payload(problem.var, formats, steps=True))
+        await _remember(problem.key, solution)  # el almacén guarda también el desarrollo
+        return payload
+    return await anyio.to_thread.run_sync(lambda: solution.payload(problem.var, formats, steps=True))
+
+
+async def solve_integral_async(user_text: str, verify_mode: str = "auto",
+                               timer: Optional[PhaseTimer] = None,
+                               precision: int = DEFAULT_PRECISION, timeout: Timeout = None,
+                               admit: bool = False, steps: bool = False,
+                               formats: Sequence[str] = ("latex",), plots: bool = True) -> dict:
+    """
+    /solve completo, instrumentado: las fases quedan en `timer` (para Server-Timing)
+    y en los histogramas/contadores de metrics.REGISTRY. Con `steps`, steps_latex trae
+    el desarrollo paso a paso (ver with_steps). `formats`: ver Solution.payload. Sin
+    `plots`, "plots" va vacío y no se calcula.
+    Las integrales iteradas ("x*y dx dy") van por solve_multiple_async.
+    """
+    timer = timer if timer is not None else PhaseTimer()
+    try:
+        with timer.phase("parse"):
+            problem = await anyio.to_thread.run_sync(parse_request, user_text, verify_mode, precision)
+        if isinstance(problem, MultipleProblem):
+            solution = await solve_multiple_async(problem, timer, timeout, admit)
+            with timer.phase("latex"):
+                payload = await anyio.to_thread.run_sync(solution.payload, formats)
+        else:
+            solution = await solve_problem_async(problem, timer, timeout, admit, plots)
+            fresh = not solution.rendered(problem.var, formats)
+            if steps and "latex" in formats:
+                with timer.phase("steps"):
+                    payload = await with_steps(problem, solution, formats)
+            else:
+                with timer.phase("latex"):
+                    payload = await anyio.to_thread.run_sync(solution.payload, problem.var, formats)
+            if fresh and SOLUTION_STORE is not None:
+                await _remember(problem.key, solution)  # el almacén guarda también los formatos nuevos
+            if not plots:
+                payload["plots"] = []
+    except Exception as e:
+        SOLVE_OUTCOMES.inc(outcome_of(error=e))
+        raise
+    finally:
+        for name, ms in timer.phases.items():
+            PHASE_LATENCY.observe(name, ms)
+        PHASE_LATENCY.observe("total", timer.total_ms())
+    SOLVE_OUTCOMES.inc(outcome_of(solution))
+    return payload
+
+
+async def _compute_staged(problem: Problem, timer: PhaseTimer, on_primitive, plots: bool = True,
+                          timeout: Timeout = None) -> Solution:
+    """
+    Como _compute_and_remember, en dos etapas: avisa la primitiva antes de verificar.
+    Las dos etapas comparten un único tope de tiempo (no uno entero cada una).
+    """
+    plan = route(problem)
+    deadline = timeout if isinstance(timeout, Deadline) else Deadline(timeout)
+    async with _admitted(plan, timer):
+        if problem.bounds is not None:  # integrales definidas: una sola etapa
+            solution = await anyio.to_thread.run_sync(_compute_blocking, problem, deadline, plan, plots)
+        else:
+            t0 = perf_counter()
+            try:
+                res, tier, timings, integrate_ms = await anyio.to_thread.run_sync(
+                    lambda: _run_in_lane(plan, integrate_stage, problem.cexpr, problem.cvar, _budgets(plan),
+                                         timeout=deadline)
+                )
+                on_primitive(res, tier)
+                solution = await anyio.to_thread.run_sync(
+                    lambda: _run_in_lane(plan, verify_stage, problem.cexpr, problem.cvar, res, tier, timings,
+                                         integrate_ms, problem.verify, plots, timeout=deadline)
+                )
+            except Exception as e:
+                _observe_cost(plan, t0, error=e)
+                raise
+            _observe_cost(plan, t0, solution)
+    await _remember(problem.key, solution)
+    return solution
+
+
+async def stream_solve(user_text: str, verify_mode: str = "auto", precision: int = DEFAULT_PRECISION,
+                       steps: bool = False, plots: bool = True,
+                       timeout: Timeout = None) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    /solve/stream: eventos (nombre, datos) a medida que termina cada etapa:
+    problem -> antiderivative -> steps -> verification -> done (el payload completo de /solve).
+    Con `steps`, el evento steps espera al desarrollo paso a paso (ver with_steps); sin
+    `plots`, no se calculan los gráficos (como en solve_integral_async). `timeout` como en
+    solve_integral_async (ej: un Deadline que se extiende si el pedido pasa a job).
+    Ante un error, un único evento "error" con "status" y el cuerpo que respondería /solve.
+    Si la respuesta sale de la caché (o la calcula otro pedido), las etapas llegan juntas.
+    """
+    try:
+        problem = await anyio.to_thread.run_sync(parse_request, user_text, verify_mode, precision)
+    except Exception as e:
+        SOLVE_OUTCOMES.inc(outcome_of(error=e))
+        status, body = error_payload(e)
+        yield "error", {"status": status, **body}
+        return
+    if isinstance(problem, MultipleProblem):
+        async for event in _stream_multiple(problem, timeout):
+            yield event
+        return
+    yield "problem", {"problem_latex": await anyio.to_thread.run_sync(
+        render_problem, problem.expr, problem.var, problem.bounds)}
+
+    solution, sent_primitive = await _cached(problem.key), False
+    if solution is None:
+        primitives: asyncio.Queue = asyncio.Queue()
+        task = asyncio.ensure_future(INFLIGHT.do(
+            problem.key, lambda: _compute_staged(problem, PhaseTimer(), lambda *r: primitives.put_nowait(r), plots,
+                                                 timeout)
+        ))
+        try:
+            waiting = asyncio.ensure_future(primitives.get())
+            await asyncio.wait({task, waiting}, return_when=asyncio.FIRST_COMPLETED)
+            if waiting.done():
+                res, tier = waiting.result()
+                partial = await anyio.to_thread.run_sync(
+                    render_antiderivative, problem.expr, problem.var, res.xreplace({problem.cvar: problem.var}), tier
+                )
+                yield "antiderivative", {"result_latex": partial["result_latex"], "tier": tier}
+                if not steps:
+                    yield "steps", {"steps_latex": partial["steps_latex"]}
+                sent_primitive = True
+            else:
+                waiting.cancel()
+            solution = await task
+        except Exception as e:
+            SOLVE_OUTCOMES.inc(outcome_of(error=e))
+            status, body = error_payload(e)
+            yield "error", {"status": status, **body}
+            return
+        finally:
+            if not task.done():
+                task.cancel()  # el cliente cortó el stream
+
+    if plots and solution.plots is None:
+        await ensure_plots(problem, solution)
+    SOLVE_OUTCOMES.inc(outcome_of(solution))
+    payload = await anyio.to_thread.run_sync(solution.for_var, problem.var)
+    if not sent_primitive:
+        yield "antiderivative", {"result_latex": payload["result_latex"], "tier": payload["tier"]}
+    if steps:
+        payload = await with_steps(problem, solution)
+    if not plots:
+        payload["plots"] = []
+    if steps or not sent_primitive:
+        yield "steps", {"steps_latex": payload["steps_latex"]}
+    yield "verification", {"checks": payload["checks"]}
+    yield "done", payload
+
+
+async def _stream_multiple(problem: MultipleProblem, timeout: Timeout = None) -> AsyncIterator[Tuple[str, dict]]:
+    yield "problem", {"problem_latex": await anyio.to_thread.run_sync(
+        render_multiple_problem, problem.expr, problem.levels)}
+    # cada nivel depende del anterior: el resto de las etapas sale junto al final
+    try:
+        solution = await solve_multiple_async(problem, PhaseTimer(), timeout, admit=True)
+    except Exception as e:
+        SOLVE_OUTCOMES.inc(outcome_of(error=e))
+        status, body = error_payload(e)
+        yield "error", {"status": status, **body}
+        return
+    SOLVE_OUTCOMES.inc(outcome_of(solution))
+    payload = await anyio.to_thread.run_sync(solution.payload)
+    yield "antiderivative", {"result_latex": payload["result_latex"], "tier": payload["tier"]}
+    yield "steps", {"steps_latex": payload["steps_latex"]}
+    yield "verification", {"checks": payload["checks"]}
+    yield "done", payload
@@ -0,0 +1,310 @@
+"""
+Pool de procesos para correr las integraciones fuera del proceso web.
+
+- Cada worker arranca, corre un `initializer` (ej: importar SymPy e integrar algo simple)
+  y recién ahí acepta trabajo, así el primer pedido no paga el arranque.
+- Cada pedido tiene tope de tiempo (wall-clock) y de memoria (RSS del worker).
+  Si se pasa, el worker se mata y se reemplaza por uno nuevo; el pedido que venció
+  responde ya, sin esperar a que el reemplazo se caliente.
+- Reciclado: después de `max_tasks` pedidos, o si entre pedidos el RSS pasa `recycle_mb`
+  (las cachés de SymPy solo crecen), el worker se retira sin nada en curso y su reemplazo
+  entra al pool recién cuando terminó el `initializer`. Si el reemplazo no arranca, se
+  reintenta (sin initializer, con espera creciente) hasta que arranque.
+- `run_sync()` solo espera (poll sobre un Pipe): el hilo que llama no ocupa CPU ni el
+  GIL del proceso web mientras SymPy trabaja en el worker.
+"""
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from typing import Any, Callable, List, Optional, Union
+
+# Cada cuánto revisa el proceso padre si el worker terminó / se pasó de memoria
+POLL_INTERVAL = 0.05
+# Espera antes de reintentar un reemplazo que no arrancó (se duplica hasta 30 s)
+RESPAWN_DELAY = 0.5
+
+
+class SolveTimeout(Exception):
+    """El worker superó el tiempo máximo permitido."""
+
+
+class WorkerCrashed(Exception):
+    """El worker murió o superó el presupuesto de memoria."""
+
+
+class WorkerError(Exception):
+    """Excepción lanzada por la función dentro del worker (se re-lanza en el padre)."""
+
+
+class Deadline:
+    """
+    Tope de tiempo que puede cambiar mientras la tarea corre: /solve arranca con el del
+    pool y, si el pedido pasa a job (CALC2_SOLVE_HANDOFF_MS), se extiende al de los jobs.
+    `seconds` None = el tope propio del pool que corre la tarea. Se cuenta desde la primera
+    tarea que lo usa: las etapas de un mismo pedido (ej: /solve/stream) comparten el tope.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self.started: Optional[float] = None
+
+    def begin(self) -> float:
+        if self.started is None:
+            self.started = time.monotonic()
+        return self.started
+
+    def extend(self, seconds: float) -> None:
+        self.seconds = seconds
+
+
+def _worker_main(conn, initializer: Optional[Callable[[], None]]) -> None:
+    # Ctrl+C lo maneja el proceso padre (uvicorn); el worker solo muere cuando lo matan
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if initializer is not None:
+        initializer()
+    conn.send(("ready", os.getpid()))
+
+    while True:
+        try:
+            fn, args = conn.recv()
+        except (EOFError, OSError):
+            break
+        try:
+            conn.send(("ok", fn(*args)))
+        except SolveTimeout as e:
+            # un presupuesto propio de la función (ej: el tier integrate): mismo 504 que el tope del pool
+            conn.send(("timeout", str(e)))
+        except Exception as e:
+            # mandamos solo el texto: no todas las excepciones de SymPy son picklables
+            conn.send(("error", str(e) or type(e).__name__))
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """RSS de un proceso en MB (solo Linux, vía /proc); None si no se puede medir."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class _Worker:
+    def __init__(self, ctx, initializer):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child, initializer), name="calc2-worker", daemon=True
+        )
+        self.process.start()
+        child.close()
+        self.tasks = 0
+        self.recycle = False  # marcado por check_memory(): se recicla apenas quede libre
+
+    def wait_ready(self) -> None:
+        status, _ = self.conn.recv()
+        assert status == "ready"
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class ProcessPool:
+    """
+    Pool de `size` workers con tope de tiempo (`timeout`, segundos) y de memoria
+    (`memory_mb`, 0 = sin tope) por tarea. Los workers se crean en `start()`
+    o, si nadie lo llamó, en el primer `run_sync()`. `max_tasks` y `recycle_mb`
+    (0 = nunca) disparan el reciclado entre pedidos.
+    """
+
+    def __init__(self, size: int, timeout: float, memory_mb: float = 0,
+                 initializer: Optional[Callable[[], None]] = None,
+                 max_tasks: int = 0, recycle_mb: float = 0):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.initializer = initializer
+        self.max_tasks = max_tasks
+        self.recycle_mb = recycle_mb
+        # fork hereda SymPy ya importado; en Windows/macOS solo existe spawn (más lento)
+        method = "fork" if sys.platform.startswith("linux") else "spawn"
+        self._ctx = multiprocessing.get_context(method)
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._started = False
+        self.timeouts = 0
+        self.crashes = 0
+        self.replaced = 0
+        self.recycled = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            workers = [_Worker(self._ctx, self.initializer) for _ in range(self.size)]
+            for w in workers:
+                w.wait_ready()
+                self._workers.append(w)
+                self._idle.put(w)
+            self._started = True
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for w in self._workers:
+                w.kill()
+            self._workers.clear()
+            self._idle = queue.Queue()
+            self._started = False
+
+    def _retire(self, worker: _Worker) -> None:
+        # el worker se mata ya (libera su memoria antes de crear otro) y el reemplazo se
+        # calienta en segundo plano, fuera del pool: nadie espera al initializer
+        worker.kill()
+
+        def spawn(initializer) -> Optional[_Worker]:
+            fresh = None
+            try:
+                fresh = _Worker(self._ctx, initializer)
+                fresh.wait_ready()
+                return fresh
+            except Exception:
+                if fresh is not None:
+                    fresh.kill()
+                return None
+
+        def warm() -> None:
+            # si el initializer falla, uno sin precalentar; si tampoco arranca, se reintenta:
+            # el lugar de `worker` no puede quedar vacío (con size=1, nadie más atendería)
+            delay = RESPAWN_DELAY
+            fresh = spawn(self.initializer) or spawn(None)
+            while fresh is None:
+                time.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                with self._lock:
+                    if worker not in self._workers:  # shutdown() mientras tanto
+                        return
+                fresh = spawn(self.initializer) or spawn(None)
+            with self._lock:
+                if worker not in self._workers:  # shutdown() mientras se calentaba
+                    fresh.kill()
+                    return
+                self._workers.remove(worker)
+                self._workers.append(fresh)
+                self._idle.put(fresh)
+
+        threading.Thread(target=warm, name="calc2-replace", daemon=True).start()
+
+    def _replace(self, worker: _Worker) -> None:
+        """Reemplaza un worker que se pasó de tiempo/memoria o murió con una tarea en curso."""
+        self.replaced += 1
+        self._retire(worker)
+
+    def _should_recycle(self, worker: _Worker) -> bool:
+        if worker.recycle or (self.max_tasks and worker.tasks >= self.max_tasks):
+            return True
+        rss = rss_mb(worker.process.pid) if self.recycle_mb else None
+        return rss is not None and rss > self.recycle_mb
+
+    def _recycle(self, worker: _Worker) -> None:
+        # sin nada en curso: se retira entre pedidos
+        self.recycled += 1
+        self._retire(worker)
+
+    def _release(self, worker: _Worker) -> None:
+        if self._should_recycle(worker):
+            self._recycle(worker)
+        else:
+            self._idle.put(worker)
+
+    def _acquire(self, timeout: float) -> _Worker:
+        # con tope: si los reemplazos no llegan, el pedido responde 504 en vez de colgarse
+        give_up = time.monotonic() + timeout
+        while True:
+            try:
+                worker = self._idle.get(timeout=max(give_up - time.monotonic(), 0.001))
+            except queue.Empty:
+                self.timeouts += 1
+                raise SolveTimeout(f"No hubo un proceso de cálculo libre en {timeout:g} s.") from None
+            if not worker.recycle:
+                return worker
+            self._recycle(worker)  # lo marcó el watchdog mientras estaba libre
+
+    def check_memory(self) -> List[float]:
+        """RSS (MB) de cada worker; marca para reciclar a los que pasan `recycle_mb`."""
+        with self._lock:
+            workers = list(self._workers)
+        sizes = []
+        for worker in workers:
+            rss = rss_mb(worker.process.pid)
+            if rss is None:
+                continue
+            sizes.append(rss)
+            if self.recycle_mb and rss > self.recycle_mb:
+                worker.recycle = True
+        return sizes
+
+    def run_sync(self, fn: Callable, *args, timeout: Union[float, Deadline, None] = None) -> Any:
+        """
+        Corre fn(*args) en un worker (bloquea el hilo actual hasta tener resultado).
+        `timeout`: segundos, o un Deadline que se puede extender mientras corre.
+        """
+        self.start()
+
+        def budget() -> float:
+            seconds = timeout.seconds if isinstance(timeout, Deadline) else timeout
+            return self.timeout if seconds is None else seconds
+
+        worker = self._acquire(budget())
+        try:
+            worker.conn.send((fn, args))
+            started = timeout.begin() if isinstance(timeout, Deadline) else time.monotonic()
+            while not worker.conn.poll(POLL_INTERVAL):
+                if time.monotonic() - started > budget():
+                    self.timeouts += 1
+                    self._replace(worker)
+                    worker = None
+                    raise SolveTimeout(f"La integración superó el límite de {budget():g} s.")
+                rss = rss_mb(worker.process.pid) if self.memory_mb else None
+                if rss is not None and rss > self.memory_mb:
+                    self.crashes += 1
+                    self._replace(worker)
+                    worker = None
+                    raise WorkerCrashed(f"La integración superó el límite de {self.memory_mb:g} MB.")
+            status, value = worker.conn.recv()
+        except (EOFError, OSError):
+            self.crashes += 1
+            self._replace(worker)
+            worker = None
+            raise WorkerCrashed("El proceso de cálculo terminó inesperadamente.")
+        finally:
+            if worker is not None:  # los reemplazados vuelven al pool solos, ya calientes
+                worker.tasks += 1
+                self._release(worker)
+
+        if status == "timeout":
+            raise SolveTimeout(value)
+        if status == "error":
+            raise WorkerError(value)
+        return value
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "started": self._started,
+            "idle": self._idle.qsize(),
+            "timeout_s": self.timeout,
+            "memory_mb": self.memory_mb,
+            "timeouts": self.timeouts,
+            "crashes": self.crashes,
+            "replaced": self.replaced,
+            "recycled": self.recycled,
+            "max_tasks": self.max_tasks,
+            "recycle_mb": self.recycle_mb,
+        }
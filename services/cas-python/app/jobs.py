@@ -0,0 +1,215 @@
+"""
+Jobs asíncronos para integrales largas: POST /jobs devuelve un id al instante y
+GET /jobs/{id} el estado y, al terminar, el mismo cuerpo que respondería /solve.
+
+- Cola local acotada (CALC2_JOB_QUEUE_SIZE) atendida por CALC2_JOB_CONCURRENCY hilos.
+  Cada job pasa por la misma caché, coalescencia, control de admisión y pool que /solve,
+  pero con un tope de tiempo propio (CALC2_JOB_TIMEOUT), más largo: acá nadie tiene un
+  request HTTP abierto.
+- Los jobs terminados se guardan CALC2_JOB_TTL segundos; después GET responde 404.
+- /solve y /solve/stream pueden pasar un pedido a job si tarda más de CALC2_SOLVE_HANDOFF_MS
+  (ver adopt()): el cálculo sigue en curso y el cliente recibe el id para retomarlo (202 en
+  /solve, un evento 'job' en el stream).
+"""
+import asyncio
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Sequence, Tuple, Union
+
+from .engine import error_payload, outcome_of, solve_parsed_blocking
+from .metrics import SOLVE_OUTCOMES
+from .solver import MultipleProblem, Problem
+
+JOB_CONCURRENCY = int(os.getenv("CALC2_JOB_CONCURRENCY", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("CALC2_JOB_QUEUE_SIZE", "100"))
+JOB_TTL = float(os.getenv("CALC2_JOB_TTL", "600"))  # segundos desde que termina
+JOB_TIMEOUT = float(os.getenv("CALC2_JOB_TIMEOUT", "120"))
+JOB_WAIT_MAX = 30.0  # tope del long-poll (?wait=) y del intervalo de keepalive en SSE
+SOLVE_HANDOFF_MS = float(os.getenv("CALC2_SOLVE_HANDOFF_MS", "0"))  # 0 = /solve nunca pasa a job
+MAX_JOBS = 10000  # jobs recordados (los terminados más viejos se descartan antes del TTL)
+
+
+class QueueFull(Exception):
+    """La cola de jobs está llena: el cliente debe reintentar más tarde."""
+
+
+class Job:
+    __slots__ = ("id", "input", "status", "created", "started", "finished", "status_code", "body", "done")
+
+    def __init__(self, user_text: str):
+        self.id = uuid.uuid4().hex
+        self.input = user_text
+        self.status = "queued"  # queued -> running -> done | failed
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.status_code: Optional[int] = None
+        self.body: Optional[dict] = None
+        self.done: Future = Future()  # se resuelve al terminar (para long-poll/SSE)
+
+    def _start(self) -> None:
+        self.status = "running"
+        self.started = time.time()
+
+    def _finish(self, status_code: int, body: dict) -> None:
+        self.status_code, self.body = status_code, body
+        self.status = "done" if status_code == 200 else "failed"
+        self.finished = time.time()
+        self.done.set_result(None)
+
+    def to_dict(self) -> dict:
+        data = {"id": self.id, "status": self.status, "input": self.input, "poll": f"/jobs/{self.id}"}
+        if self.finished is not None:
+            data["elapsed_ms"] = round((self.finished - self.created) * 1000, 1)
+        if self.status == "done":
+            data["result"] = self.body
+        elif self.status == "failed":
+            data["http_status"] = self.status_code  # el que habría respondido /solve
+            data["error"] = self.body
+        return data
+
+
+def run_problem(problem: Union[Problem, MultipleProblem], steps: bool = False,
+                formats: Sequence[str] = ("latex",), plots: bool = True) -> Tuple[int, dict]:
+    """Resuelve un job en el hilo actual; devuelve (status, body) como /solve con las mismas opciones."""
+    try:
+        solution, payload = solve_parsed_blocking(problem, JOB_TIMEOUT, True, steps, formats, plots)
+    except Exception as e:
+        SOLVE_OUTCOMES.inc(outcome_of(error=e))
+        return error_payload(e)
+    SOLVE_OUTCOMES.inc(outcome_of(solution))
+    return 200, payload
+
+
+def _task_outcome(task: "asyncio.Future", outcome: Callable[[object], Tuple[int, dict]]) -> Tuple[int, dict]:
+    if task.cancelled():
+        return 503, {"error": "El cálculo se canceló. Volvé a intentarlo."}
+    if task.exception() is not None:
+        return error_payload(task.exception())
+    return outcome(task.result())
+
+
+class JobQueue:
+    def __init__(self, run: Callable[[Problem], Tuple[int, dict]] = run_problem,
+                 concurrency: int = JOB_CONCURRENCY, maxsize: int = JOB_QUEUE_SIZE, ttl: float = JOB_TTL):
+        self._run = run
+        self.concurrency = max(1, concurrency)
+        self.ttl = ttl
+        self._queue: "queue.Queue[Tuple[Job, Problem, dict]]" = queue.Queue(maxsize)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._running = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.handed_off = 0
+        self.expired = 0
+
+    def _ensure_workers(self) -> None:
+        # Hilos de fondo perezosos: sin jobs no hay hilos (ni en tests ni en workers de uvicorn)
+        if len(self._threads) >= self.concurrency:
+            return
+        with self._lock:
+            while len(self._threads) < self.concurrency:
+                t = threading.Thread(target=self._work, name=f"calc2-job-{len(self._threads)}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _work(self) -> None:
+        while True:
+            job, problem, options = self._queue.get()
+            job._start()
+            with self._lock:
+                self._running += 1
+            try:
+                status, body = self._run(problem, **options)
+            except Exception as e:
+                status, body = error_payload(e)
+            finally:
+                with self._lock:
+                    self._running -= 1
+            job._finish(status, body)
+
+    def _remember(self, job: Job) -> None:
+        with self._lock:
+            self._jobs[job.id] = job
+            if len(self._jobs) > MAX_JOBS:
+                for old in [j for j in self._jobs.values() if j.finished is not None][: len(self._jobs) - MAX_JOBS]:
+                    del self._jobs[old.id]
+
+    def _purge(self) -> None:
+        now = time.time()
+        with self._lock:
+            stale = [j.id for j in self._jobs.values() if j.finished is not None and now - j.finished > self.ttl]
+            for job_id in stale:
+                del self._jobs[job_id]
+            self.expired += len(stale)
+
+    def submit(self, problem: Union[Problem, MultipleProblem], user_text: str, **options) -> Job:
+        """
+        Encola un problema ya parseado; `options` (steps, formats, plots) llegan a `run`.
+        Lanza QueueFull si no hay lugar.
+        """
+        job = Job(user_text)
+        self._purge()
+        self._remember(job)
+        try:
+            self._queue.put_nowait((job, problem, options))
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+                self.rejected += 1
+            raise QueueFull(f"{self._queue.maxsize} jobs en espera") from None
+        self.submitted += 1
+        self._ensure_workers()
+        return job
+
+    def adopt(self, user_text: str, task: "asyncio.Future",
+              outcome: Callable[[object], Tuple[int, dict]] = lambda payload: (200, payload)) -> Job:
+        """
+        Convierte en job un cálculo de /solve que ya está en curso (no ocupa la cola).
+        `outcome` traduce el resultado de la tarea a (status, cuerpo) como lo respondería /solve.
+        """
+        job = Job(user_text)
+        job._start()
+        job.started = job.created
+        self._purge()
+        self._remember(job)
+        self.handed_off += 1
+        task.add_done_callback(lambda t: job._finish(*_task_outcome(t, outcome)))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._purge()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    async def wait(self, job: Job, timeout: float) -> bool:
+        """Espera (sin bloquear el event loop) a que el job termine; True si terminó."""
+        if not job.done.done() and timeout > 0:
+            await asyncio.wait({asyncio.wrap_future(job.done)}, timeout=timeout)
+        return job.done.done()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stored = len(self._jobs)
+            running = self._running
+        return {
+            "queued": self._queue.qsize(),
+            "running": running,
+            "stored": stored,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "handed_off": self.handed_off,
+            "expired": self.expired,
+            "concurrency": self.concurrency,
+            "queue_size": self._queue.maxsize,
+        }
+
+
+JOBS = JobQueue()
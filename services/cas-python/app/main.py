@@ -3,17 +3,75 @@
 # - El endpoint /health lo usa Render para marcar el servicio como "ready".
 # - La UI simple está embebida en este archivo para evitar dependencias extra.
 
-from fastapi import FastAPI
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional, Tuple
+
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
-
-from .solver import solve_integral
-from .schemas import SolveRequest
-
-app = FastAPI(title="Calc2 Bot MVP (Python)", version="1.0.0")
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+
+from .admission import Overloaded, client_id
+from .assets import Asset, StaticAssets, json_response
+from .batch import BATCH_MAX_ITEMS, stream_batch
+from .capture import CAPTURE, normalize_input
+from .executor import Deadline
+from .engine import (
+    ADMISSION, EXEC_MODE, HEAVY_ADMISSION, HEAVY_COST_MS, HEAVY_POOL, INFLIGHT, POOL, RATE_LIMITER, check_request, error_payload, outcome_of, solve_integral_async,
+    parse_request, solve_integral_blocking, stream_solve, WATCHDOG,
+)
+from .jobs import JOB_TIMEOUT, JOB_WAIT_MAX, JOBS, SOLVE_HANDOFF_MS, QueueFull
+from .metrics import REGISTRY, SOLVE_OUTCOMES, TIER_LATENCY, PhaseTimer
+from .multiple import ITERATED
+from .solver import RESULT_CACHE, SOLUTION_STORE
+from .schemas import BatchSolveRequest, SolveRequest, SolveResponse
+from .startup import STARTUP, warm_up
+from .store import prewarm
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pre-calentar el almacén persistente con el corpus (en segundo plano, no bloquea el arranque)
+    if SOLUTION_STORE is not None and os.getenv("CALC2_STORE_PREWARM") == "1":
+        threading.Thread(
+            target=prewarm, args=(SOLUTION_STORE, solve_integral_blocking), name="calc2-prewarm", daemon=True
+        ).start()
+    # Workers y calentamiento en segundo plano: el puerto se abre ya (/health) y /ready
+    # pasa a 200 cuando terminan (ver startup.py)
+    pools = {}
+    if EXEC_MODE == "pool":
+        pools["pool"] = POOL
+        if HEAVY_COST_MS > 0:
+            pools["heavy_pool"] = HEAVY_POOL
+    STARTUP.restart()
+    threading.Thread(
+        target=warm_up, args=(STARTUP, pools, solve_integral_blocking), name="calc2-warmup", daemon=True
+    ).start()
+    WATCHDOG.start()
+    yield
+    WATCHDOG.stop()
+    if CAPTURE is not None:
+        CAPTURE.close()
+    POOL.shutdown()
+    HEAVY_POOL.shutdown()
+
+
+app = FastAPI(title="Calc2 Bot MVP (Python)", version="1.0.0", lifespan=lifespan)
+
+# static/ se lee y se comprime una sola vez (ver assets.py)
+STATIC = StaticAssets(Path(__file__).parent / "static")
+
+
+@app.get("/static/{name}")
+def static(name: str, request: Request):
+    response = STATIC.response(request, name)
+    return response if response is not None else JSONResponse({"error": "No existe."}, status_code=404)
 
-app.mount("/static", StaticFiles(directory="services/cas-python/app/static"), name="static")
 
 # CORS (en prod conviene limitar orígenes)
 app.add_middleware(
@@ -26,35 +84,341 @@ app.add_middleware(
 
 @app.get("/health")
 def health():
-    # Render hace ping a este path: si responde 200, considera que el servicio está "ready"
+    # Render hace ping a este path: si responde 200, el proceso está vivo (aunque siga calentando)
     return {"ok": True}
 
 
-@app.post("/solve")
-def solve(req: SolveRequest):
+@app.get("/ready")
+def ready():
+    # Readiness: 200 recién con los workers levantados y SymPy calentado; antes, 503 con la etapa
+    body = STARTUP.stats()
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+
+@app.get("/stats")
+def stats():
+    # Contadores de caché, coalescencia, latencia por tier, almacén persistente y pool
+    data = {
+        "cache": RESULT_CACHE.stats(),
+        "iterated_cache": ITERATED.stats(),
+        "singleflight": INFLIGHT.stats(),
+        "tiers": TIER_LATENCY.snapshot(),
+        "jobs": JOBS.stats(),
+        "admission": ADMISSION.stats(),
+        "heavy_lane": {"cost_ms": HEAVY_COST_MS, "admission": HEAVY_ADMISSION.stats(), "pool": HEAVY_POOL.stats()},
+        "memory": WATCHDOG.stats(),
+        "startup": STARTUP.stats(),
+        "capture": CAPTURE.stats() if CAPTURE is not None else None,
+    }
+    if SOLUTION_STORE is not None:
+        data["store"] = SOLUTION_STORE.stats()
+    if EXEC_MODE == "pool":
+        data["pool"] = POOL.stats()
+    return data
+
+
+# Estado de cachés y pool, calculado al momento del scrape
+REGISTRY.collect("calc2_cache_entries", "Soluciones en la caché en memoria.", lambda: {"": len(RESULT_CACHE)})
+REGISTRY.collect(
+    "calc2_cache_events_total", "Aciertos/fallos/desalojos de la caché en memoria.",
+    lambda: {k: v for k, v in RESULT_CACHE.stats().items() if k in ("hits", "misses", "evictions")},
+    label="event", kind="counter",
+)
+REGISTRY.collect(
+    "calc2_singleflight_total", "Cálculos hechos y ahorrados por coalescencia.",
+    lambda: {k: v for k, v in INFLIGHT.stats().items() if k in ("computed", "coalesced")},
+    label="kind", kind="counter",
+)
+REGISTRY.collect(
+    "calc2_pool_events_total", "Timeouts, caídas y reemplazos de workers del pool.",
+    lambda: {k: v for k, v in POOL.stats().items() if k in ("timeouts", "crashes", "replaced", "recycled")},
+    label="event", kind="counter",
+)
+REGISTRY.collect(
+    "calc2_startup_milliseconds", "Duración de cada fase del arranque (import, pools, warmup, total).",
+    lambda: STARTUP.phases, label="phase",
+)
+REGISTRY.collect(
+    "calc2_rss_megabytes", "Memoria residente del proceso web y de los workers (última revisión del watchdog).",
+    lambda: WATCHDOG.last_rss, label="process",
+)
+REGISTRY.collect(
+    "calc2_admission", "Cálculos de /solve en curso y en la fila de espera del control de admisión.",
+    lambda: {k: v for k, v in ADMISSION.stats().items() if k in ("active", "queued")}, label="state",
+)
+REGISTRY.collect(
+    "calc2_heavy_admission", "Lo mismo para el carril pesado.",
+    lambda: {k: v for k, v in HEAVY_ADMISSION.stats().items() if k in ("active", "queued")}, label="state",
+)
+REGISTRY.collect(
+    "calc2_jobs", "Jobs asíncronos en cola y en curso.",
+    lambda: {k: v for k, v in JOBS.stats().items() if k in ("queued", "running")}, label="state",
+)
+REGISTRY.collect(
+    "calc2_jobs_total", "Jobs encolados, rechazados (cola llena), pasados desde /solve y expirados.",
+    lambda: {k: v for k, v in JOBS.stats().items() if k in ("submitted", "rejected", "handed_off", "expired")},
+    label="event", kind="counter",
+)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Formato de texto de Prometheus (histogramas por fase, resultados, tamaño de expresiones)
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+def _error_response(e: Exception, headers: dict = None) -> JSONResponse:
+    status, body = error_payload(e)
+    headers = dict(headers or {})
+    if isinstance(e, Overloaded):
+        headers["Retry-After"] = str(e.retry_after)
+    return JSONResponse(status_code=status, content=body, headers=headers)
+
+
+@app.post("/solve", response_model=SolveResponse)
+async def solve(req: SolveRequest, request: Request):
     """
     Procesa integrales. Siempre retorna JSON.
     Si type != "integral", devolvemos 422 con mensaje claro.
     Ante errores de parseo, 400 con detalle.
+    Si el cálculo supera el tope de tiempo/memoria, 504 con el mismo formato de error.
+    Con CALC2_SOLVE_HANDOFF_MS, si tarda más que eso responde 202 con un job (ver /jobs).
+    Bajo sobrecarga, 503 (o 429 si el cliente superó su tasa) con Retry-After.
+    Con "steps": true, steps_latex trae el desarrollo paso a paso (sustitución, partes, ...).
+    "formats" elige qué se renderiza: "latex" (por defecto), "text", "mathml", "srepr".
+    Con "plots": false no se calculan los datos para graficar.
     """
-    if not hasattr(req, "type") or req.type is None:
-        return JSONResponse({"error": "Falta 'type'."}, status_code=422)
-    if req.type.lower() != "integral":
-        return JSONResponse({"error": "Tipo no soportado. Usa 'integral'."}, status_code=422)
-    if not getattr(req, "input", None):
-        return JSONResponse({"error": "Falta 'input' con la expresión."}, status_code=422)
+    rejected = check_request(req)
+    if rejected:
+        status, body = rejected
+        return JSONResponse(body, status_code=status)
+    timer = PhaseTimer()
     try:
-        data = solve_integral(req.input)
-        return JSONResponse(status_code=200, content=data)
+        if RATE_LIMITER is not None:
+            RATE_LIMITER.check(client_id(request))
+        if SOLVE_HANDOFF_MS <= 0:
+            data = await solve_integral_async(req.input, req.verify, timer, req.precision, admit=True,
+                                              steps=req.steps, formats=req.formats, plots=req.plots)
+        else:
+            # tope de siempre mientras el cliente espera; si pasa a job, el de los jobs
+            deadline = Deadline()
+            task = asyncio.ensure_future(
+                solve_integral_async(req.input, req.verify, timer, req.precision, deadline, admit=True,
+                                     steps=req.steps, formats=req.formats, plots=req.plots)
+            )
+            done, _ = await asyncio.wait({task}, timeout=SOLVE_HANDOFF_MS / 1000)
+            if not done:
+                deadline.extend(JOB_TIMEOUT)
+                job = JOBS.adopt(req.input, task)
+                _capture(req, 202, "handoff", timer)
+                return JSONResponse(status_code=202, content=job.to_dict(),
+                                    headers={"Location": f"/jobs/{job.id}", "Server-Timing": timer.server_timing()})
+            data = task.result()
+        _capture(req, 200, "ok", timer, data.get("tier"))
+        return json_response(request, data, headers={"Server-Timing": timer.server_timing()})
     except Exception as e:
+        response = _error_response(e, {"Server-Timing": timer.server_timing()})
+        _capture(req, response.status_code, outcome_of(error=e), timer)
+        return response
+
+
+def _capture(req: SolveRequest, status: int, outcome: str, timer: PhaseTimer, tier: Optional[str] = None) -> None:
+    # solo encola: la escritura la hace el hilo de capture.py, fuera del pedido
+    if CAPTURE is None:
+        return
+    CAPTURE.record({
+        "ts": round(time.time(), 3),
+        "input": normalize_input(req.input),
+        "verify": req.verify,
+        "precision": req.precision,
+        "steps": req.steps,
+        "status": status,
+        "outcome": outcome,
+        "tier": tier,
+        "ms": round(timer.total_ms(), 2),
+        "phases": {name: round(ms, 2) for name, ms in timer.phases.items()},
+    })
+
+
+# el evento 'error' del stream trae el status y no la excepción: misma clasificación que outcome_of
+_STATUS_OUTCOMES = {400: "parse_error", 429: "shed", 503: "shed", 504: "timeout"}
+
+SSE_PING_S = 15.0  # intervalo de los pings en los streams SSE
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/solve/stream")
+async def solve_stream(req: SolveRequest, request: Request):
+    """
+    Variante de /solve con Server-Sent Events: un evento por etapa a medida que termina
+    (problem, antiderivative, steps, verification) y al final 'done' con el mismo JSON
+    que /solve. Los errores llegan como evento 'error' con su "status".
+    Mientras calcula, pings (comentarios SSE) para que los proxies no corten la conexión.
+    Con CALC2_SOLVE_HANDOFF_MS, si tarda más que eso el stream termina con un evento 'job'
+    (el mismo JSON que el 202 de /solve) y el resto se retoma en /jobs/{id}.
+    """
+    rejected = check_request(req)
+    if rejected:
+        status, body = rejected
+        return JSONResponse(body, status_code=status)
+    timer = PhaseTimer()
+    if RATE_LIMITER is not None:
+        try:
+            RATE_LIMITER.check(client_id(request))
+        except Overloaded as e:
+            response = _error_response(e)
+            _capture(req, response.status_code, outcome_of(error=e), timer)
+            return response
+
+    # tope de siempre mientras el cliente espera; si pasa a job, el de los jobs (como /solve)
+    deadline = Deadline()
+    sent: asyncio.Queue = asyncio.Queue()
+
+    async def pump() -> Tuple[str, dict]:
+        # recorre las etapas aunque nadie las lea (si pasó a job); termina en done o error
+        async for event, data in stream_solve(req.input, req.verify, req.precision, req.steps, req.plots,
+                                              timeout=deadline):
+            sent.put_nowait((event, data))
+            if event in ("done", "error"):
+                return event, data
+
+    def outcome(last: Tuple[str, dict]) -> Tuple[int, dict]:
+        event, data = last
+        if event == "done":
+            return 200, data
+        body = dict(data)
+        return body.pop("status"), body
+
+    async def events():
+        task, getter = asyncio.ensure_future(pump()), None
+        handoff = time.monotonic() + SOLVE_HANDOFF_MS / 1000 if SOLVE_HANDOFF_MS > 0 else None
+        try:
+            while True:
+                getter = getter or asyncio.ensure_future(sent.get())
+                wait = SSE_PING_S if handoff is None else max(min(SSE_PING_S, handoff - time.monotonic()), 0)
+                done, _ = await asyncio.wait({getter}, timeout=wait)
+                if not done:
+                    if handoff is not None and time.monotonic() >= handoff:
+                        deadline.extend(JOB_TIMEOUT)
+                        job = JOBS.adopt(req.input, task, outcome)
+                        task = None
+                        _capture(req, 202, "handoff", timer)
+                        yield _sse("job", job.to_dict())
+                        return
+                    yield ": ping\n\n"
+                    continue
+                event, data = getter.result()
+                getter = None
+                yield _sse(event, data)
+                if event == "done":
+                    _capture(req, 200, "ok", timer, data.get("tier"))
+                    return
+                if event == "error":
+                    _capture(req, data["status"], _STATUS_OUTCOMES.get(data["status"], "error"), timer)
+                    return
+        finally:
+            if getter is not None:
+                getter.cancel()
+            if task is not None and not task.done():
+                task.cancel()  # el cliente cortó el stream
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.post("/jobs")
+def create_job(req: SolveRequest, request: Request):
+    """
+    Encola una integral (también iteradas) y responde 202 con el id al instante; steps,
+    formats y plots valen como en /solve. Los errores de parseo se informan ya (400, como
+    /solve); con la cola llena, 503 con Retry-After.
+    """
+    rejected = check_request(req)
+    if rejected:
+        status, body = rejected
+        return JSONResponse(body, status_code=status)
+    timer = PhaseTimer()
+    try:
+        if RATE_LIMITER is not None:
+            RATE_LIMITER.check(client_id(request))
+        problem = parse_request(req.input, req.verify, req.precision)
+    except Exception as e:
+        SOLVE_OUTCOMES.inc(outcome_of(error=e))
+        response = _error_response(e)
+        _capture(req, response.status_code, outcome_of(error=e), timer)
+        return response
+    try:
+        job = JOBS.submit(problem, req.input, steps=req.steps, formats=req.formats, plots=req.plots)
+    except QueueFull:
+        _capture(req, 503, "shed", timer)
+        return JSONResponse({"error": "Hay demasiadas integrales en espera. Probá de nuevo en unos segundos."},
+                            status_code=503, headers={"Retry-After": "5"})
+    _capture(req, 202, "job", timer)
+    return JSONResponse(job.to_dict(), status_code=202, headers={"Location": f"/jobs/{job.id}"})
+
+
+def _job_not_found(job_id: str) -> JSONResponse:
+    return JSONResponse({"error": f"No existe el job '{job_id}' (o ya expiró)."}, status_code=404)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, request: Request, wait: float = Query(0, ge=0)):
+    """Estado del job; con ?wait=N espera hasta N segundos (máx. 30) a que termine (long-poll)."""
+    job = JOBS.get(job_id)
+    if job is None:
+        return _job_not_found(job_id)
+    await JOBS.wait(job, min(wait, JOB_WAIT_MAX))
+    return json_response(request, job.to_dict())
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Server-Sent Events: un evento 'status' por cada cambio de estado y, al final, un
+    evento 'done' o 'failed' con el mismo JSON que GET /jobs/{id}. Mientras tanto, pings.
+    """
+    job = JOBS.get(job_id)
+    if job is None:
+        return _job_not_found(job_id)
+
+    async def events():
+        last = None
+        while True:
+            if job.status != last:
+                last = job.status
+                yield _sse(job.status if job.done.done() else "status", job.to_dict())
+            if job.done.done():
+                return
+            if not await JOBS.wait(job, SSE_PING_S):
+                yield ": ping\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/solve/batch")
+async def solve_batch(req: BatchSolveRequest):
+    """
+    Resuelve muchas integrales en un solo pedido. Las entradas equivalentes se calculan
+    una sola vez y los resultados se devuelven como NDJSON (una línea por ítem, con su
+    'index'), en el orden en que terminan.
+    """
+    if len(req.items) > BATCH_MAX_ITEMS:
         return JSONResponse(
-            status_code=400,
-            content={"error": "No pude interpretar la expresión. Revisa sintaxis (usa ^ o ** para potencias).", "detail": str(e)},
+            {"error": f"Demasiados ítems (máximo {BATCH_MAX_ITEMS})."}, status_code=422
         )
+    return StreamingResponse(stream_batch(req.items), media_type="application/x-ndjson")
 
-# UI simple (HTML embebido) — sin dependencias extra
+# UI simple (HTML embebido) — sin dependencias extra. Se arma y comprime una sola vez
+# (INDEX_PAGE); GET / responde con ETag y 304 si el navegador ya la tiene.
 @app.get("/", response_class=HTMLResponse)
-def index():
+def index(request: Request):
+    return INDEX_PAGE.response(request)
+
+
+def _index_html() -> str:
     return """
 <!doctype html>
 <html lang="es">
@@ -293,6 +657,8 @@ def index():
         <span class="chip" data-eg="sin(x) dx">∫ sin(x)</span>
         <span class="chip" data-eg="x^2 * cos(x) dx">x²·cos x</span>
         <span class="chip" data-eg="(e^(3*x) + 1)/x dx">(e^{3x}+1)/x</span>
+        <span class="chip" data-eg="∫_0^1 exp(-x^2) dx">∫₀¹ e^{-x²}</span>
+        <span class="chip" data-eg="∫_0^1 ∫_0^y x*y dx dy">∫₀¹∫₀^y x·y</span>
       </div>
     </section>
 
@@ -316,6 +682,15 @@ def index():
         <div class="kv"><b>Pasos:</b> <ol id="steps" class="list"></ol></div>
         <div class="kv"><b>Chequeos:</b> <div id="checks" class="box"></div></div>
       </div>
+
+      <div id="plotCard" class="card" style="display:none">
+        <h3 style="margin-top:0">Gráfico</h3>
+        <canvas id="plot" class="box" style="width:100%;height:260px;padding:0"></canvas>
+        <div class="muted" style="margin-top:6px">
+          <span style="color:var(--primary)">━ f (integrando)</span> &nbsp;
+          <span style="color:var(--accent)">━ F (primitiva, C = 0)</span>
+        </div>
+      </div>
     </section>
 
     <div id="toast" class="toast"></div>
@@ -366,7 +741,100 @@ def index():
   // Limpiar
   $("#clearBtn").onclick = ()=>{ ta.value=""; autoresize(); $("#result").style.display="none"; };
 
-  // Resolver (manejo robusto de respuesta)
+  // Gráfico de f y F: arreglos float32 (little-endian) en base64, NaN = cortar la línea
+  const f32 = (b64) => {
+    const bin = atob(b64), view = new DataView(new ArrayBuffer(bin.length));
+    for(let i=0;i<bin.length;i++) view.setUint8(i, bin.charCodeAt(i));
+    return Array.from({length: bin.length/4}, (_, i) => view.getFloat32(i*4, true));
+  };
+  const drawPlot = (p) => {
+    const card = $("#plotCard"), cv = $("#plot");
+    if(!p){ card.style.display="none"; return; }
+    card.style.display="block";
+    const dpr = window.devicePixelRatio || 1, w = cv.clientWidth, h = cv.clientHeight;
+    cv.width = w*dpr; cv.height = h*dpr;
+    const g = cv.getContext("2d"); g.scale(dpr, dpr); g.clearRect(0, 0, w, h);
+    const css = getComputedStyle(document.documentElement);
+    const xs = f32(p.x), series = [[f32(p.f), css.getPropertyValue("--primary")], [f32(p.F), css.getPropertyValue("--accent")]];
+    const ranges = [p.y_range.f, p.y_range.F].filter(Boolean);
+    let [y0, y1] = [Math.min(...ranges.map(r=>r[0])), Math.max(...ranges.map(r=>r[1]))];
+    const [x0, x1] = p.x_range, pad = 8;
+    const X = (x) => pad + (x - x0) / (x1 - x0) * (w - 2*pad);
+    const Y = (y) => h - pad - (y - y0) / (y1 - y0) * (h - 2*pad);
+    g.strokeStyle = css.getPropertyValue("--muted"); g.lineWidth = 1; g.beginPath();
+    if(y0 < 0 && y1 > 0){ g.moveTo(pad, Y(0)); g.lineTo(w - pad, Y(0)); }
+    if(x0 < 0 && x1 > 0){ g.moveTo(X(0), pad); g.lineTo(X(0), h - pad); }
+    g.stroke();
+    if(p.interval){
+      // integral definida: área bajo f entre los límites
+      const [a, b] = p.interval, y0c = Y(Math.min(Math.max(0, y0), y1));
+      g.fillStyle = css.getPropertyValue("--primary"); g.globalAlpha = .18; g.beginPath();
+      g.moveTo(X(a), y0c);
+      xs.forEach((x, i) => { if(x >= a && x <= b && !Number.isNaN(series[0][0][i])) g.lineTo(X(x), Y(series[0][0][i])); });
+      g.lineTo(X(b), y0c); g.closePath(); g.fill(); g.globalAlpha = 1;
+    }
+    series.forEach(([ys, color]) => {
+      g.strokeStyle = color; g.lineWidth = 2; g.beginPath();
+      let pen = false;
+      xs.forEach((x, i) => {
+        if(Number.isNaN(ys[i])){ pen = false; return; }
+        pen ? g.lineTo(X(x), Y(ys[i])) : g.moveTo(X(x), Y(ys[i]));
+        pen = true;
+      });
+      g.stroke();
+    });
+  };
+
+  // Lee los Server-Sent Events de una respuesta de fetch (EventSource no permite POST)
+  const readEvents = async (r, onEvent) => {
+    const reader = r.body.getReader(), dec = new TextDecoder();
+    let buf = "";
+    for(;;){
+      const {value, done} = await reader.read();
+      if (done) return;
+      buf += dec.decode(value, {stream:true});
+      let i;
+      while((i = buf.indexOf("\\n\\n")) >= 0){
+        let ev = "message", data = "";
+        buf.slice(0, i).split("\\n").forEach(line => {
+          if (line.startsWith("event: ")) ev = line.slice(7);
+          else if (line.startsWith("data: ")) data += line.slice(6);
+        });
+        buf = buf.slice(i + 2);
+        if (data) await onEvent(ev, JSON.parse(data));
+      }
+    }
+  };
+
+  // Integral larga: el stream pasó a job (evento 'job'); se espera con long-poll
+  const followJob = async (poll, status) => {
+    status.innerHTML = '<span class="spinner"></span>Sigue calculando…';
+    for(;;){
+      const r = await fetch(poll + "?wait=25", {headers:{ "Accept":"application/json" }});
+      const job = await r.json();
+      if (!r.ok) throw new Error(job.error || `HTTP ${r.status}`);
+      if (job.status === "done") return job.result;
+      if (job.status === "failed") throw new Error((job.error || {}).error || "Error");
+    }
+  };
+
+  // Respuestas precalculadas (ver bundle.py): se piden después de cargar la página, sin
+  // apuro; la URL lleva la huella del contenido, así que el navegador la guarda en caché
+  const ANSWERS_URL = "/static/answers.json";
+  let answers = null;
+  // misma normalización que bundle.answer_key
+  const answerKey = (text) => {
+    let s = text.trim().split(/\\s+/).join(" ");
+    if (s.startsWith("∫") && !s.slice(1).trimStart().startsWith("_")) s = s.slice(1).trimStart();
+    const m = s.match(/^(.+?) ?d([a-zA-Z])$/);
+    return m ? `${m[1]} d${m[2]}` : `${s} dx`;
+  };
+  if (ANSWERS_URL) addEventListener("load", () => (window.requestIdleCallback || setTimeout)(() => {
+    fetch(ANSWERS_URL).then(r => r.ok ? r.json() : null)
+      .then(b => { if (b && b.format === 1) answers = b.entries; }).catch(() => {});
+  }));
+
+  // Resolver: /solve/stream manda cada etapa apenas termina y se muestra al llegar
   const solve = async () => {
     const status = $("#status");
     const btn = $("#solveBtn");
@@ -377,44 +845,69 @@ def index():
     if(!expr){ showToast("Escribí una integral, por ejemplo: x*exp(2*x) dx"); return; }
 
     btn.disabled = true; status.innerHTML = '<span class="spinner"></span>Resolviendo…';
+    const typeset = el => window.MathJax?.typesetPromise?.([el]);
+
+    const stages = {
+      problem: d => {
+        problem.innerHTML = "$"+d.problem_latex+"$";
+        out.innerHTML = ""; steps.innerHTML = ""; checks.innerHTML = "";
+        $("#plotCard").style.display = "none";
+        result.style.display = "grid";
+        status.innerHTML = '<span class="spinner"></span>Integrando…';
+        return typeset(problem);
+      },
+      antiderivative: d => {
+        out.innerHTML = "$"+d.result_latex+"$";
+        status.innerHTML = '<span class="spinner"></span>Verificando…';
+        return typeset(out);
+      },
+      steps: d => {
+        (d.steps_latex || []).forEach(s=>{
+          const li = document.createElement("li");
+          li.innerHTML = s.includes("$") ? s : "$"+s+"$";
+          steps.appendChild(li);
+        });
+        return typeset(steps);
+      },
+      verification: d => {
+        (d.checks || []).forEach(c=>{
+          const p = document.createElement("p");
+          p.innerHTML = "$"+c+"$";
+          checks.appendChild(p);
+        });
+        return typeset(checks);
+      },
+      done: d => drawPlot((d.plots || [])[0]),
+      error: d => { throw new Error(d.error || `HTTP ${d.status}`); },
+    };
+    // mismo payload que /solve (respuesta precalculada o resultado de un job): todas las etapas
+    const showAll = async d => {
+      for (const ev of ["problem", "antiderivative", "steps", "verification", "done"]) await stages[ev](d);
+    };
 
     try{
-      const r = await fetch("/solve",{
+      const hit = answers && answers[answerKey(expr)];
+      if (hit) {
+        await showAll(hit);  // precalculada: se muestra sin ir al servidor
+        return;
+      }
+      const r = await fetch("/solve/stream",{
         method:"POST",
-        headers:{ "Content-Type":"application/json", "Accept":"application/json" },
-        body: JSON.stringify({type:"integral", input:expr})
+        headers:{ "Content-Type":"application/json", "Accept":"text/event-stream" },
+        body: JSON.stringify({type:"integral", input:expr, steps:true})
       });
 
       const ct = r.headers.get("content-type") || "";
-      const raw = await r.text();     // siempre leo texto primero
-      let data;
-      if (ct.includes("application/json")) {
-        try { data = JSON.parse(raw); } catch { throw new Error("Respuesta inválida"); }
-      } else {
-        if (!r.ok) throw new Error(raw || `HTTP ${r.status}`);
-        throw new Error("Respuesta no válida del servidor.");
+      if (!ct.includes("text/event-stream")) {
+        // rechazos antes de empezar (422, 429): JSON como /solve
+        const raw = await r.text();
+        let data = {};
+        try { data = JSON.parse(raw); } catch { throw new Error(raw || `HTTP ${r.status}`); }
+        throw new Error(data.error || `HTTP ${r.status}`);
       }
-      if (!r.ok || data.error) throw new Error(data.error || `HTTP ${r.status}`);
-
-      problem.innerHTML = "$"+data.problem_latex+"$";
-      out.innerHTML = "$"+data.result_latex+"$";
-
-      steps.innerHTML = "";
-      (data.steps_latex || []).forEach(s=>{
-        const li = document.createElement("li");
-        li.innerHTML = s.includes("$") ? s : "$"+s+"$";
-        steps.appendChild(li);
-      });
-
-      checks.innerHTML = "";
-      (data.checks || []).forEach(c=>{
-        const p = document.createElement("p");
-        p.innerHTML = "$"+c+"$";
-        checks.appendChild(p);
-      });
-
-      result.style.display = "grid";
-      await window.MathJax?.typesetPromise?.();
+      let job = null;
+      await readEvents(r, (ev, data) => ev === "job" ? (job = data) : stages[ev] && stages[ev](data));
+      if (job) await showAll(await followJob(job.poll, status));
     }catch(e){
       showToast(e.message || "Error");
     }finally{
@@ -496,4 +989,10 @@ def index():
 </body>
 </html>
 """
+
+# sin static/answers.json (python -m app.bundle build) la página ni lo pide
+_PAGE = _index_html() if "answers.json" in STATIC.urls else _index_html().replace('"/static/answers.json"', "null")
+INDEX_PAGE = Asset(STATIC.fingerprint_urls(_PAGE).encode("utf-8"), "text/html; charset=utf-8")
+
+STARTUP.imported()  # fin de la fase "import" (ver startup.py)
 # Fin de main.py
\ No newline at end of file
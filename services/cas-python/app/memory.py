@@ -0,0 +1,73 @@
+"""
+Memoria del proceso web y de los workers (en el plan gratis de Render, 512 MB para todo).
+
+- Cachés de SymPy acotadas: CALC2_SYMPY_CACHE_SIZE (entradas por función) se aplica en
+  app/__init__.py, antes del primer import de SymPy; los workers lo heredan.
+- Los workers se reciclan solos entre pedidos (ver executor.ProcessPool: max_tasks,
+  recycle_mb). MemoryWatchdog revisa además, cada `interval` segundos, el RSS de cada
+  worker (los que pasan recycle_mb quedan marcados) y el del proceso web, que no se
+  puede reciclar: si pasa `web_mb`, se vacían las cachés de SymPy y se corre el GC.
+"""
+import gc
+import os
+import threading
+from typing import Dict, List, Optional
+
+from sympy.core.cache import clear_cache
+
+from .executor import ProcessPool, rss_mb
+
+
+def trim_caches() -> None:
+    clear_cache()
+    gc.collect()
+
+
+class MemoryWatchdog:
+    def __init__(self, pools: Dict[str, ProcessPool], interval: float, web_mb: float = 0):
+        self.pools = pools
+        self.interval = interval
+        self.web_mb = web_mb
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.checks = 0
+        self.trims = 0
+        self.last_rss: Dict[str, float] = {}
+
+    def check(self) -> None:
+        rss = {"web": rss_mb(os.getpid()) or 0.0}
+        for name, pool in self.pools.items():
+            sizes: List[float] = pool.check_memory()
+            rss[name] = sum(sizes)
+        if self.web_mb and rss["web"] > self.web_mb:
+            trim_caches()
+            self.trims += 1
+            rss["web"] = rss_mb(os.getpid()) or 0.0
+        self.last_rss = rss
+        self.checks += 1
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="calc2-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "interval_s": self.interval,
+            "web_mb": self.web_mb,
+            "checks": self.checks,
+            "trims": self.trims,
+            "rss_mb": {name: round(mb, 1) for name, mb in self.last_rss.items()},
+        }
@@ -0,0 +1,183 @@
+"""
+Métricas en memoria del proceso web (contadores e histogramas livianos, thread-safe)
+y su exposición en formato de texto de Prometheus (GET /metrics).
+
+Pensado para quedar siempre encendido: registrar una observación es un bisect + una
+suma bajo un lock. Cada worker de uvicorn tiene sus propias métricas.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence
+
+# Buckets de latencia en milisegundos
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# Buckets de tamaño de expresión (cantidad de nodos del árbol)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram:
+    """Histograma acumulativo por buckets fijos (estilo Prometheus)."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # el último es +Inf
+        self._sum = 0.0
+        self._lock = Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative, acc = {}, 0
+        for le, n in zip([*map(_fmt, self.buckets), "+Inf"], counts):
+            acc += n
+            cumulative[le] = acc
+        return {"count": acc, "sum": round(total, 3), "buckets": cumulative}
+
+
+class LabeledHistogram:
+    """Un Histogram por valor de etiqueta (ej: por tier de integración)."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._children: Dict[str, Histogram] = {}
+        self._lock = Lock()
+
+    def labels(self, label: str) -> Histogram:
+        child = self._children.get(label)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(label, Histogram(self.buckets))
+        return child
+
+    def observe(self, label: str, value: float) -> None:
+        self.labels(label).observe(value)
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {label: h.snapshot() for label, h in sorted(self._children.items())}
+
+
+class Counter:
+    """Contador con una etiqueta opcional."""
+
+    def __init__(self):
+        self._values: Dict[str, float] = {}
+        self._lock = Lock()
+
+    def inc(self, label: str = "", amount: float = 1) -> None:
+        with self._lock:
+            self._values[label] = self._values.get(label, 0) + amount
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(sorted(self._values.items()))
+
+
+def _fmt(value: float) -> str:
+    return f"{value:g}"
+
+
+class Registry:
+    """Conjunto de métricas con nombre, para renderizarlas en formato Prometheus."""
+
+    def __init__(self):
+        self._entries: List[tuple] = []
+
+    def histogram(self, name: str, help_text: str, label: Optional[str] = None,
+                  buckets: Sequence[float] = LATENCY_BUCKETS_MS):
+        metric = LabeledHistogram(buckets) if label else Histogram(buckets)
+        self._entries.append((name, help_text, "histogram", label, metric))
+        return metric
+
+    def counter(self, name: str, help_text: str, label: Optional[str] = None) -> Counter:
+        metric = Counter()
+        self._entries.append((name, help_text, "counter", label, metric))
+        return metric
+
+    def collect(self, name: str, help_text: str, fn: Callable[[], Dict[str, float]],
+                label: Optional[str] = None, kind: str = "gauge") -> None:
+        """Métrica calculada al momento del scrape: `fn` devuelve {valor_etiqueta: número}."""
+        self._entries.append((name, help_text, kind, label, fn))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name, help_text, kind, label, metric in self._entries:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "histogram":
+                children = metric.snapshot() if label else {"": metric.snapshot()}
+                for value, snap in children.items():
+                    base = f'{label}="{value}",' if label else ""
+                    for le, count in snap["buckets"].items():
+                        lines.append(f'{name}_bucket{{{base}le="{le}"}} {count}')
+                    suffix = f'{{{base.rstrip(",")}}}' if label else ""
+                    lines.append(f"{name}_sum{suffix} {snap['sum']}")
+                    lines.append(f"{name}_count{suffix} {snap['count']}")
+            else:
+                values = metric.snapshot() if isinstance(metric, Counter) else metric()
+                for value, number in values.items():
+                    tag = f'{{{label}="{value}"}}' if label else ""
+                    lines.append(f"{name}{tag} {number}")
+        return "\n".join(lines) + "\n"
+
+
+class PhaseTimer:
+    """Mide la duración (ms) de cada fase de un pedido; alimenta Server-Timing y /metrics."""
+
+    __slots__ = ("phases", "_start")
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self._start = perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        t0 = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (perf_counter() - t0) * 1000)
+
+    def add(self, name: str, ms: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + ms
+
+    def total_ms(self) -> float:
+        return (perf_counter() - self._start) * 1000
+
+    def server_timing(self) -> str:
+        """Valor del header Server-Timing (https://www.w3.org/TR/server-timing/)."""
+        parts = [f"{name};dur={ms:.2f}" for name, ms in self.phases.items()]
+        parts.append(f"total;dur={self.total_ms():.2f}")
+        return ", ".join(parts)
+
+
+REGISTRY = Registry()
+
+PHASE_LATENCY = REGISTRY.histogram(
+    "calc2_phase_duration_milliseconds", "Duración de cada fase de /solve.", label="phase"
+)
+TIER_LATENCY = REGISTRY.histogram(
+    "calc2_tier_duration_milliseconds", "Tiempo de integración según el tier que respondió.", label="tier"
+)
+LANE_LATENCY = REGISTRY.histogram(
+    "calc2_lane_duration_milliseconds", "Tiempo de cálculo medido en cada carril (fast/heavy).", label="lane"
+)
+EXPR_SIZE = REGISTRY.histogram(
+    "calc2_expression_size_nodes", "Tamaño (nodos del árbol) de las expresiones recibidas.",
+    buckets=SIZE_BUCKETS,
+)
+SOLVE_OUTCOMES = REGISTRY.counter(
+    "calc2_solve_outcomes_total", "Resultados de /solve por tipo.", label="outcome"
+)
+SHED_REQUESTS = REGISTRY.counter(
+    "calc2_shed_requests_total", "Pedidos rechazados por sobrecarga o límite de tasa.", label="reason"
+)
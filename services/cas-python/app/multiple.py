@@ -0,0 +1,190 @@
+"""
+Integrales múltiples iteradas ("x*y dx dy", "∫_0^1 ∫_0^y x*y dx dy"): se integra de adentro
+hacia afuera, una variable por vez, con las demás letras como constantes.
+
+- Cada nivel se parte en sumandos y cada sumando en factor constante · parte que depende
+  de la variable: ∫ y·x dx y ∫ z·x dx comparten ∫ x dx. Cada parte es un Problem común
+  (RESULT_CACHE, almacén, pool y single-flight como en /solve), así que otros pedidos, y
+  otros niveles del mismo (∫ y dy después de ∫ x dx), reutilizan lo ya calculado.
+- Si alguna parte queda sin primitiva, el nivel se integra entero (la suma sí puede tenerla).
+  Lo mismo en un nivel con límites si alguna parte diverge o la suma da ∞ - ∞: ∫_0^1 (1 -
+  e^{-y})/y dy converge aunque 1/y y e^{-y}/y no. Si el nivel entero también diverge, la
+  integral iterada diverge y los niveles de afuera no se calculan.
+- iterate() es un generador que pide las soluciones de cada nivel: solve_multiple() lo
+  recorre en este proceso y engine.solve_multiple_async() con el pipeline asíncrono.
+"""
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sympy import Add, Integral, S, Symbol, latex, nan, oo, zoo
+
+from .cache import LRUCache
+from .definite import diverges
+from .solver import _METHODS, _PRINTERS, _VERDICTS, MultipleProblem, Problem, Solution, make_problem, render_problem
+
+# integrales iteradas ya armadas (las partes están además en RESULT_CACHE)
+ITERATED = LRUCache(maxsize=int(os.getenv("CALC2_ITERATED_CACHE_SIZE", "256")))
+
+
+class Level(NamedTuple):
+    var: Symbol
+    bounds: Optional[tuple]
+    integrand: object
+    value: object
+    solutions: Tuple[Solution, ...]
+
+
+def _agreed_ok(solutions: Sequence[Solution]) -> Optional[bool]:
+    oks = [s.ok for s in solutions]
+    return False if False in oks else None if None in oks else True
+
+
+def _unsettled(value, solutions: Sequence[Solution]) -> bool:
+    return value.has(nan, zoo, oo, -oo) or any(diverges(s.res) for s in solutions)
+
+
+def _evaluated(expr):
+    # el integrando del usuario llega sin evaluar (1/(x+1) queda 1·(x+1)^-1): para los checks
+    if not expr.args:
+        return expr
+    return expr.func(*(_evaluated(arg) for arg in expr.args))
+
+
+def _parts(integrand, var: Symbol, bounds, verify: str, precision: int) -> List[Tuple[object, Problem]]:
+    parts = []
+    for term in Add.make_args(integrand):
+        coeff, dep = term.as_independent(var, as_Add=False)
+        parts.append((coeff, make_problem(dep, var, bounds, verify, precision)))
+    return parts
+
+
+def _combine(parts: List[Tuple[object, Problem]], solutions: Sequence[Solution]):
+    terms = []
+    for (coeff, problem), solution in zip(parts, solutions):
+        res = solution.res if problem.cvar == problem.var else solution.res.xreplace({problem.cvar: problem.var})
+        terms.append(coeff * res)
+    return Add(*terms)
+
+
+def _integral_tex(integrand, var: Symbol, bounds) -> str:
+    # los niveles de afuera suelen integrar sumas: sin paréntesis el diferencial quedaría ambiguo
+    if isinstance(integrand, Add):
+        integrand = Symbol(rf"\left({latex(integrand)}\right)")
+    return render_problem(integrand, var, bounds)
+
+
+def render_multiple_problem(expr, levels: Sequence[Tuple[Symbol, Optional[tuple]]]) -> str:
+    """∫_a^b ∫_c^d f dx dy: el ∫ de más afuera primero, los diferenciales de adentro hacia afuera."""
+    signs = "".join(r"\int" if bounds is None else rf"\int_{{{latex(bounds[0])}}}^{{{latex(bounds[1])}}}"
+                    for _, bounds in reversed(levels))
+    differentials = r"\,".join(f"d{latex(var)}" for var, _ in levels)
+    return rf"{signs} {latex(expr)}\,{differentials}"
+
+
+def iterate(problem: MultipleProblem):
+    """Genera la lista de Problem de cada nivel y recibe (send) sus Solution."""
+    integrand, levels = problem.expr, []
+    for var, bounds in problem.levels:
+        parts = _parts(integrand, var, bounds, problem.verify, problem.precision)
+        solutions = yield [p for _, p in parts]
+        value = _combine(parts, solutions)
+        if len(parts) > 1 and (value.has(Integral) or (bounds is not None and _unsettled(value, solutions))):
+            parts = [(S.One, make_problem(integrand, var, bounds, problem.verify, problem.precision))]
+            solutions = yield [parts[0][1]]
+            value = _combine(parts, solutions)
+        levels.append(Level(var, bounds, integrand, value, tuple(solutions)))
+        if bounds is not None and _unsettled(value, solutions):
+            break  # diverge: integrar ∞ respecto de las variables de afuera no dice nada
+        integrand = value
+    return IteratedSolution(problem.expr, levels, problem.levels)
+
+
+def solve_multiple(problem: MultipleProblem, solve: Callable[[Problem], Solution]) -> "IteratedSolution":
+    solution = ITERATED.get(problem.key)
+    if solution is None:
+        steps = iterate(problem)
+        try:
+            problems = next(steps)
+            while True:
+                problems = steps.send([solve(p) for p in problems])
+        except StopIteration as done:
+            solution = done.value
+        ITERATED.put(problem.key, solution)
+    return solution
+
+
+class IteratedSolution:
+    """Resultado de una integral iterada; el payload se renderiza una sola vez por formato."""
+
+    tier = "iterated"
+
+    def __init__(self, expr, levels: List[Level], spec: Sequence[Tuple[Symbol, Optional[tuple]]]):
+        self.expr = expr
+        self.levels = levels
+        self.spec = spec  # (variable, límites) de todos los niveles, aunque no se hayan calculado
+        self.res = levels[-1].value
+        last = levels[-1]
+        self.diverged = last.bounds is not None and _unsettled(last.value, last.solutions)
+        self.ok = _agreed_ok([s for level in levels for s in level.solutions])
+        self._payloads: Dict[str, dict] = {}
+
+    def _latex(self) -> dict:
+        problem_tex = render_multiple_problem(self.expr, self.spec)
+
+        steps = [rf"Planteamos: ${problem_tex}$", "Integramos de adentro hacia afuera"]
+        checks = []
+        for level in self.levels:
+            diverged = self.diverged and level is self.levels[-1]
+            var_tex = latex(level.var)
+            value_tex = r"\text{diverge}" if diverged else latex(level.value)
+            constants = sorted(level.integrand.free_symbols - {level.var}, key=lambda s: s.name)
+            note = ""
+            if constants:
+                note = f" (${', '.join(latex(c) for c in constants)}$ constante{'s' if len(constants) > 1 else ''})"
+            integral = _integral_tex(level.integrand, level.var, level.bounds)
+            steps.append(rf"Respecto de ${var_tex}${note}: ${integral} = {value_tex}$")
+            if diverged:
+                # como en las definidas: sin valor finito no hay nada que verificar
+                steps.append(r"Algún tramo del intervalo da un valor infinito: la integral diverge")
+                continue
+            methods = {s.verified_by for s in level.solutions}
+            verdict = _VERDICTS[_agreed_ok(level.solutions)] + _METHODS[methods.pop() if len(methods) == 1 else "none"]
+            integrand = _evaluated(level.integrand)
+            if level.bounds is None:
+                checks.append(rf"\frac{{\partial}}{{\partial {var_tex}}}\left({value_tex}\right) = "
+                              rf"{latex(integrand)} \ " + verdict)
+            else:
+                checks.append(rf"{_integral_tex(integrand, level.var, level.bounds)} = {value_tex} \ " + verdict)
+
+        if self.diverged:
+            result = r"\text{diverge}" + (rf" \ ({latex(self.res)})" if self.res in (oo, -oo) else "")
+        else:
+            result = latex(self.res) + (" + C" if any(level.bounds is None for level in self.levels) else "")
+        return {
+            "problem_latex": problem_tex,
+            "steps_latex": steps,
+            "result_latex": result,
+            "checks": checks,
+            "plots": [],
+            "tier": self.tier,
+        }
+
+    def _format(self, fmt: str) -> dict:
+        printer = _PRINTERS[fmt]
+        # variables en el orden de los diferenciales; los límites van en problem_latex
+        return {"integrand": printer(self.expr), "variable": ",".join(var.name for var, _ in self.spec),
+                "result": printer(self.res)}
+
+    def _rendered(self, fmt: str) -> dict:
+        rendered = self._payloads.get(fmt)
+        if rendered is None:
+            rendered = self._payloads[fmt] = self._latex() if fmt == "latex" else self._format(fmt)
+        return rendered
+
+    def payload(self, formats: Sequence[str] = ("latex",)) -> dict:
+        """Como Solution.payload (sin "steps": el desarrollo son los niveles)."""
+        payload = dict(self._rendered("latex")) if "latex" in formats else {"plots": [], "tier": self.tier}
+        others = [fmt for fmt in formats if fmt != "latex"]
+        if others:
+            payload["formats"] = {fmt: self._rendered(fmt) for fmt in others}
+        return payload
@@ -0,0 +1,208 @@
+"""
+Parser descendente recursivo para la gramática que acepta /solve.
+
+Cubre exactamente lo que escriben los usuarios casi siempre: números, la variable,
+parámetros de una letra, las funciones/constantes de SAFE_FUNCS (con paréntesis),
++ - * / ^ **, paréntesis y multiplicación implícita ("2x", "x(x+1)", "2sin(x)").
+
+Construye el árbol de SymPy directamente y con la misma forma que produciría
+parse_expr(..., evaluate=False) con las transformaciones de solver.TRANSFORMS
+(así las claves canónicas de caché no cambian). Ante algo que no reconoce
+(otros nombres, "sin x", notación científica, ...) lanza Unsupported y el llamador
+usa parse_expr. Los errores de sintaxis se informan con la posición exacta.
+"""
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sympy import Add, Basic, Float, Integer, Mul, Pow, Symbol
+
+# Nombres de una letra que parse_expr resuelve contra el espacio de nombres de SymPy
+# (I, N, O, Q, S) en lugar de crear un símbolo: se los dejamos a parse_expr.
+_SYMPY_LETTERS = frozenset("INOQS")
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:(?P<num>\d+\.?\d*|\.\d+)|(?P<name>[A-Za-z_][A-Za-z0-9_]*)|(?P<op>\*\*|[-+*/^(),]))"
+)
+
+
+class ParseError(ValueError):
+    """La entrada no se pudo interpretar como expresión."""
+
+    def __init__(self, message: str, position: Optional[int] = None):
+        super().__init__(message)
+        self.position = position  # índice (desde 0) del carácter en el texto del usuario
+
+
+class Unsupported(Exception):
+    """Entrada fuera de la gramática del parser rápido (se usa parse_expr)."""
+
+
+class _Token(NamedTuple):
+    kind: str  # "num", "name", "op" o "end"
+    text: str
+    pos: int
+
+
+def _tokenize(text: str, offset: int) -> List[_Token]:
+    tokens, i, n = [], 0, len(text)
+    while True:
+        while i < n and text[i].isspace():
+            i += 1
+        if i == n:
+            tokens.append(_Token("end", "", offset + i))
+            return tokens
+        m = _TOKEN_RE.match(text, i)
+        if m is None:
+            raise Unsupported(text[i])
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == "num" and m.end() < n and text[m.end()] in "eEjJ_":
+            # 1e3, 2j, 1_000: el tokenizador de Python los lee distinto
+            raise Unsupported(value)
+        tokens.append(_Token(kind, value, offset + m.start(kind)))
+        i = m.end()
+
+
+# Marca de nodos que parse_expr aplanaría (Add/Mul que vienen de un operador binario)
+_FLAT = "flat"
+
+
+class _Parser:
+    """
+    expr   := term (('+' | '-') term)*
+    term   := factor (('*' | '/' | <implícita>) factor)*
+    factor := ('+' | '-') factor | power
+    power  := atom [('^' | '**') factor]
+    atom   := número | nombre | función '(' expr (',' expr)* ')' | '(' expr ')'
+    """
+
+    def __init__(self, tokens: List[_Token], var: Symbol, names: Dict[str, object]):
+        self.tokens = tokens
+        self.i = 0
+        self.var = var
+        self.names = names
+
+    @property
+    def tok(self) -> _Token:
+        return self.tokens[self.i]
+
+    def _take(self) -> _Token:
+        tok = self.tokens[self.i]
+        self.i += 1
+        return tok
+
+    def _error(self, message: str, tok: Optional[_Token] = None):
+        tok = tok or self.tok
+        found = f"'{tok.text}'" if tok.text else "el final"
+        raise ParseError(f"{message}; se encontró {found} (columna {tok.pos + 1})", tok.pos)
+
+    def _expect(self, op: str) -> None:
+        if self.tok.text != op:
+            self._error(f"Falta '{op}'")
+        self.i += 1
+
+    def parse(self) -> Basic:
+        node, _ = self.expr()
+        if self.tok.kind != "end":
+            self._error("Sobra texto")
+        return node
+
+    # Cada regla devuelve (nodo, etiqueta): la etiqueta es "Add"/"Mul" si el nodo vino de
+    # un operador binario, para aplanarlo como EvaluateFalseTransformer de SymPy.
+    def expr(self) -> Tuple[Basic, Optional[str]]:
+        node, tag = self.term()
+        while self.tok.text in ("+", "-"):
+            op = self._take().text
+            right, rtag = self.term()
+            if op == "-":
+                right, rtag = Mul(-1, right, evaluate=False), None
+            node, tag = _binop(Add, (node, tag), (right, rtag)), "Add"
+        return node, tag
+
+    def term(self) -> Tuple[Basic, Optional[str]]:
+        node, tag = self.factor()
+        while True:
+            tok = self.tok
+            if tok.text in ("*", "/"):
+                self.i += 1
+            elif not (tok.kind in ("num", "name") or tok.text == "("):
+                return node, tag
+            right, rtag = self.factor()
+            if tok.text == "/":
+                right, rtag = Pow(right, -1, evaluate=False), None
+            node, tag = _binop(Mul, (node, tag), (right, rtag)), "Mul"
+
+    def factor(self) -> Tuple[Basic, Optional[str]]:
+        if self.tok.text in ("+", "-"):
+            op = self._take().text
+            node, _ = self.factor()
+            # el operador unario sí evalúa en parse_expr: -x -> Mul(-1, x), -2 -> -2
+            return (-node if op == "-" else +node), None
+        return self.power()
+
+    def power(self) -> Tuple[Basic, Optional[str]]:
+        base, tag = self.atom()
+        if self.tok.text in ("^", "**"):
+            self.i += 1
+            exponent, _ = self.factor()
+            return Pow(base, exponent, evaluate=False), None
+        return base, tag
+
+    def atom(self) -> Tuple[Basic, Optional[str]]:
+        tok = self.tok
+        if tok.kind == "num":
+            self.i += 1
+            return (Float(tok.text) if "." in tok.text else Integer(int(tok.text))), None
+        if tok.text == "(":
+            self.i += 1
+            node, tag = self.expr()
+            self._expect(")")
+            return node, tag
+        if tok.kind == "name":
+            self.i += 1
+            return self._name(tok), None
+        self._error("Se esperaba un número, una variable o '('")
+
+    def _name(self, tok: _Token) -> Basic:
+        obj = self.names.get(tok.text)
+        if obj is not None and callable(obj) and not isinstance(obj, Basic):
+            # función de la lista blanca: solo con paréntesis ("sin x" queda para parse_expr)
+            if self.tok.text != "(":
+                raise Unsupported(tok.text)
+            self.i += 1
+            args = [self.expr()[0]]
+            while self.tok.text == ",":
+                self.i += 1
+                args.append(self.expr()[0])
+            self._expect(")")
+            try:
+                return obj(*args, evaluate=False)
+            except (TypeError, ValueError) as e:
+                raise ParseError(f"{tok.text}: {e} (columna {tok.pos + 1})", tok.pos) from e
+        if obj is not None:
+            return obj
+        if tok.text == self.var.name:
+            return self.var
+        if len(tok.text) == 1 and tok.text not in _SYMPY_LETTERS:
+            return Symbol(tok.text)
+        # nombres largos ("xy", "alpha", "integrate"...): parse_expr decide
+        raise Unsupported(tok.text)
+
+
+def _binop(cls, left, right) -> Basic:
+    args = []
+    for node, tag in (left, right):
+        if tag == cls.__name__:
+            args.extend(node.args)
+        else:
+            args.append(node)
+    return cls(*args, evaluate=False)
+
+
+def parse_expression(text: str, var: Symbol, names: Dict[str, object], offset: int = 0) -> Basic:
+    """
+    Parsea `text` (el integrando, sin '∫' ni 'dx'). `offset` es la posición de `text`
+    dentro de la entrada original, para informar errores en columnas del usuario.
+    Lanza ParseError (con .position) o Unsupported.
+    """
+    return _Parser(_tokenize(text, offset), var, names).parse()
@@ -0,0 +1,199 @@
+"""
+Datos para graficar el integrando f y su primitiva F (campo "plots" de /solve).
+
+- Las funciones se compilan con lambdify (NumPy) una vez por expresión canónica y se
+  guardan en un LRU; si NumPy no soporta alguna función (erf, Si, li, ...) se evalúa
+  punto a punto con mpmath.
+- Se muestrea en una sola pasada vectorizada sobre una grilla densa; el dominio se
+  achica a la zona donde f es real (ej: [-1, 1] para sqrt(1 - x^2)).
+- Polos y saltos (ej: tan, 1/x, log|x|) se cortan con NaN para que el cliente no una
+  los puntos a través de la discontinuidad; sus abscisas van en "breaks".
+- Se reduce a PLOT_POINTS puntos: la mitad repartidos parejo y el resto donde la curva
+  cambia más. Los arreglos viajan como float32 little-endian en base64.
+"""
+import base64
+import math
+import os
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from sympy import lambdify, srepr
+
+from .cache import LRUCache
+
+PLOT_POINTS = int(os.getenv("CALC2_PLOT_POINTS", "200"))  # 0 = sin gráficos
+X_RANGE = (-5.0, 5.0)
+OVERSAMPLE = 4  # puntos de la grilla densa por punto enviado
+JUMP_FRACTION = 0.5  # salto entre muestras vecinas (fracción del rango visible) = discontinuidad
+
+_COMPILED = LRUCache(maxsize=int(os.getenv("CALC2_PLOT_CACHE_SIZE", "512")))
+
+
+# Funciones especiales frecuentes en primitivas que NumPy no trae (math es mucho más
+# rápido que mpmath punto a punto)
+_NUMPY_EXTRA = {
+    "erf": np.vectorize(math.erf, otypes=[float]),
+    "erfc": np.vectorize(math.erfc, otypes=[float]),
+}
+
+
+def _pointwise(var, expr) -> Callable:
+    scalar = lambdify(var, expr, modules="mpmath")
+
+    def evaluate(xs):
+        def one(x):
+            try:
+                return complex(scalar(float(x)))
+            except Exception:
+                return complex("nan")
+        return np.array([one(x) for x in xs], dtype=complex)
+
+    evaluate.pointwise = True  # lento: se muestrea con menos puntos
+    return evaluate
+
+
+def compiled(expr, var) -> Callable:
+    """Función vectorizada x -> expr(x), memorizada por forma canónica."""
+    key = f"{var.name}|{srepr(expr)}"
+    fn = _COMPILED.get(key)
+    if fn is None:
+        try:
+            fn = lambdify(var, expr, modules=[_NUMPY_EXTRA, "numpy"])
+            with np.errstate(all="ignore"):
+                fn(np.linspace(0.1, 0.9, 3))
+        except Exception:
+            # Si, Ci, fresnels, li, ...: mpmath punto a punto
+            fn = _pointwise(var, expr)
+        _COMPILED.put(key, fn)
+    return fn
+
+
+def _sample(fn: Optional[Callable], xs: np.ndarray) -> np.ndarray:
+    """Valores reales de fn en xs; NaN donde no es real o no está definida."""
+    if fn is None:
+        return np.full(xs.shape, np.nan)
+    try:
+        with np.errstate(all="ignore"):
+            ys = np.broadcast_to(np.asarray(fn(xs), dtype=complex), xs.shape)
+    except Exception:
+        return np.full(xs.shape, np.nan)
+    real = np.abs(ys.imag) <= 1e-9 * (1 + np.abs(ys.real))
+    out = np.where(real, ys.real, np.nan)
+    out[~np.isfinite(out)] = np.nan
+    return out
+
+
+def _cut(ys: np.ndarray) -> Tuple[np.ndarray, Tuple[float, float], np.ndarray]:
+    """
+    Marca con NaN lo que queda fuera de la zona visible (cerca de un polo) y busca saltos.
+    Devuelve (ys, rango visible, índices i con salto entre i e i+1).
+    """
+    finite = ys[np.isfinite(ys)]
+    lo, hi = np.percentile(finite, [5, 95])
+    span = (hi - lo) or max(1.0, abs(hi))
+    lo, hi = lo - span, hi + span
+    ys = np.where((ys < lo) | (ys > hi), np.nan, ys)
+    jumps = np.flatnonzero(np.abs(np.diff(ys)) > JUMP_FRACTION * (hi - lo))
+    return ys, (lo, hi), jumps
+
+
+def _gaps(xs: np.ndarray, ys: np.ndarray) -> List[float]:
+    """Centro de cada tramo interior sin valores (polo, salto o zona no definida)."""
+    nan = np.isnan(ys).astype(np.int8)
+    edges = np.diff(nan)
+    starts, ends = np.flatnonzero(edges == 1) + 1, np.flatnonzero(edges == -1) + 1
+    if nan[0]:
+        ends = ends[1:]
+    return [(xs[i] + xs[j - 1]) / 2 for i, j in zip(starts, ends)]
+
+
+def _downsample(xs: np.ndarray, series: List[np.ndarray], budget: int) -> np.ndarray:
+    """Índices a conservar: extremos, bordes de huecos, grilla pareja y mayor curvatura."""
+    n = len(xs)
+    if n <= budget:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[np.linspace(0, n - 1, budget // 2).astype(int)] = True
+    score = np.zeros(n)
+    for ys in series:
+        nan = np.isnan(ys)
+        # los vecinos de un hueco se conservan: ahí empieza/termina cada tramo
+        keep[:-1] |= nan[1:] & ~nan[:-1]
+        keep[1:] |= nan[:-1] & ~nan[1:]
+        if nan.all():
+            continue
+        curvature = np.abs(np.diff(np.nan_to_num(ys), 2))
+        valid = ~(nan[:-2] | nan[1:-1] | nan[2:])
+        span = np.nanmax(ys) - np.nanmin(ys)
+        score[1:-1] += np.where(valid, curvature / (span or 1.0), 0)
+    extra = budget - int(keep.sum())
+    if extra > 0:
+        score[keep] = -1
+        keep[np.argpartition(score, -extra)[-extra:]] = True
+    return np.flatnonzero(keep)
+
+
+def _b64(values: np.ndarray) -> str:
+    return base64.b64encode(np.asarray(values, dtype="<f4").tobytes()).decode("ascii")
+
+
+def plot_data(expr, res, var, points: int = PLOT_POINTS) -> List[dict]:
+    """Lista (vacía o de un elemento) para el campo "plots" del payload de /solve."""
+    if points <= 0 or (expr.free_symbols | res.free_symbols) - {var}:
+        return []  # con parámetros simbólicos (ej: a*x) no hay una sola curva que dibujar
+    try:
+        f = compiled(expr, var)
+    except Exception:
+        return []
+    try:
+        F = compiled(res, var)
+    except Exception:
+        F = None  # ej: la primitiva quedó como Integral(...) sin resolver
+
+    pointwise = getattr(f, "pointwise", False) or getattr(F, "pointwise", False)
+    dense = points if pointwise else points * OVERSAMPLE
+    xs = np.linspace(*X_RANGE, dense)
+    fy = _sample(f, xs)
+    defined = np.flatnonzero(np.isfinite(fy))
+    if len(defined) < 2:
+        return []
+    a, b = xs[defined[0]], xs[defined[-1]]
+    if b - a < 0.8 * (X_RANGE[1] - X_RANGE[0]):
+        xs = np.linspace(a, b, dense)
+        fy = _sample(f, xs)
+    Fy = _sample(F, xs)
+
+    cut, ranges, jumps = [], [], []
+    for ys in (fy, Fy):
+        if np.isfinite(ys).any():
+            ys, view, at = _cut(ys)
+            ranges.append([round(float(view[0]), 4), round(float(view[1]), 4)])
+        else:
+            at = np.array([], dtype=int)
+            ranges.append(None)
+        cut.append(ys)
+        jumps.append(at)
+
+    # saltos: se intercala un punto a mitad de camino, NaN en la serie que salta
+    at = np.union1d(*jumps).astype(int)
+    if len(at):
+        mids = (xs[at] + xs[at + 1]) / 2
+        for k, ys in enumerate(cut):
+            values = np.where(np.isin(at, jumps[k]), np.nan, (ys[at] + ys[at + 1]) / 2)
+            cut[k] = np.insert(ys, at + 1, values)
+        xs = np.insert(xs, at + 1, mids)
+    fy, Fy = cut
+    breaks = sorted({round(float(x), 4) for x in _gaps(xs, fy) + _gaps(xs, Fy)})
+
+    keep = _downsample(xs, [fy, Fy], points)
+    return [{
+        "kind": "integrand_antiderivative",
+        "encoding": "float32-base64",
+        "n": int(len(keep)),
+        "x_range": [round(float(xs[0]), 4), round(float(xs[-1]), 4)],
+        "y_range": {"f": ranges[0], "F": ranges[1]},
+        "breaks": breaks,
+        "x": _b64(xs[keep]),
+        "f": _b64(fy[keep]),
+        "F": _b64(Fy[keep]),
+    }]
@@ -1,19 +1,46 @@
-from pydantic import BaseModel
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
 
 # Modelo de entrada: lo que el cliente envía al servidor
 class IntegralRequest(BaseModel):
     expression: str # Ejemplo: "x*exp(2*x)"
     variable: str = "x" # Por defecto es "x" si no se manda otra variable
 
-# Modelo de salida: lo que la API devuelve al cliente
-class IntegralResponse(BaseModel):
-    original: str
-    result: str
+# Formatos de salida que se pueden pedir en /solve ("latex" = los campos *_latex de siempre)
+Format = Literal["latex", "text", "mathml", "srepr"]
+
+# Integrando y resultado en uno de los formatos extra (ver solver.Solution.in_format)
+class RenderedFormat(BaseModel):
+    integrand: str
+    variable: str
+    result: str # en las indefinidas, sin la constante C
+    bounds: Optional[List[str]] = None # solo en integrales definidas
+
+# Modelo de salida de /solve (y de cada línea de /solve/batch). Se usa para la
+# documentación (/docs): el cuerpo se arma como dict y se serializa directo (ver assets.dumps)
+class SolveResponse(BaseModel):
+    problem_latex: Optional[str] = None # los campos *_latex y checks, solo si se pidió "latex"
+    steps_latex: Optional[List[str]] = None
+    result_latex: Optional[str] = None
+    checks: Optional[List[str]] = None
+    plots: List[dict] = [] # ver plots.py
+    tier: str # estrategia que resolvió la integral (ver strategies.TIERS)
+    formats: Optional[Dict[str, RenderedFormat]] = None # los formatos pedidos además de "latex"
 
 # Modelo usado en los tests (compatibilidad con pruebas automatizadas)
 class SolveRequest(BaseModel):
     type: str # tipo de operación, ej: "integral"
     input: str # expresión matemática, ej: "x*exp(2*x) dx"
+    verify: Literal["auto", "numeric", "symbolic"] = "auto" # cómo verificar la primitiva
+    precision: int = Field(15, ge=2, le=50) # dígitos de la cuadratura en integrales definidas
+    steps: bool = False # desarrollo paso a paso real en steps_latex (más lento la primera vez)
+    formats: List[Format] = Field(["latex"], min_length=1) # formatos a incluir en la respuesta
+    plots: bool = True # datos para graficar f y F (false = no se calculan, "plots" va vacío)
+
+# Lote de integrales para /solve/batch (ej: corrección automática de entregas)
+class BatchSolveRequest(BaseModel):
+    items: List[SolveRequest]
 
 # Notas:
 # - Usamos Pydantic (BaseModel) para validar la entrada y salida.
@@ -0,0 +1,89 @@
+"""
+Coalescencia "single-flight" de cálculos idénticos en curso.
+
+Si 200 estudiantes piden la misma integral a la vez, el primero (líder) la calcula y
+los demás esperan ese mismo resultado en lugar de lanzar 199 `integrate` en paralelo.
+Se usa un concurrent.futures.Future (thread-safe) para que la espera funcione desde
+cualquier event loop o hilo.
+"""
+import asyncio
+from concurrent.futures import Future
+from threading import Lock
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _LeaderCancelled(Exception):
+    """El líder se canceló (ej: su cliente cortó); un seguidor debe tomar la posta."""
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[str, Future] = {}
+        self._lock = Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _claim(self, key: str) -> Tuple[Future, bool]:
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.coalesced += 1
+                return fut, False
+            fut = self._inflight[key] = Future()
+            self.leaders += 1
+            return fut, True
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Ejecuta `fn` una sola vez por `key` entre todos los llamados concurrentes."""
+        while True:
+            fut, leader = self._claim(key)
+            if not leader:
+                try:
+                    return await asyncio.wrap_future(fut)
+                except _LeaderCancelled:
+                    continue
+
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                self._release(key)
+                fut.set_exception(_LeaderCancelled())
+                raise
+            except BaseException as e:
+                self._release(key)
+                fut.set_exception(e)
+                raise
+            self._release(key)
+            fut.set_result(result)
+            return result
+
+    def do_sync(self, key: str, fn: Callable[[], T]) -> T:
+        """Como do(), para hilos sin event loop (ej: los de la cola de jobs)."""
+        while True:
+            fut, leader = self._claim(key)
+            if not leader:
+                try:
+                    return fut.result()
+                except _LeaderCancelled:
+                    continue
+
+            try:
+                result = fn()
+            except BaseException as e:
+                self._release(key)
+                fut.set_exception(e)
+                raise
+            self._release(key)
+            fut.set_result(result)
+            return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            inflight = len(self._inflight)
+        return {"inflight": inflight, "computed": self.leaders, "coalesced": self.coalesced}
@@ -1,13 +1,25 @@
-﻿from typing import Dict
+﻿from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import os
 import re
+from time import perf_counter
 from sympy import (
-    symbols, Symbol, integrate, diff, sin, cos, tan, exp, log, sqrt,
-    asin, acos, atan, sinh, cosh, tanh, E, pi
+    symbols, Symbol, diff, sin, cos, tan, exp, log, sqrt,
+    asin, acos, atan, sinh, cosh, tanh, E, pi, oo, srepr, sstr, sympify, Integral
 )
+from sympy.core.parameters import evaluate
 from sympy.parsing.sympy_parser import (
     parse_expr, standard_transformations, convert_xor, implicit_multiplication_application
 )
 from sympy.printing.latex import latex
+from sympy.printing.mathml import mathml
+
+from .cache import LRUCache, canonical_key
+from .definite import DEFAULT_PRECISION, definite_integral, diverges
+from .parser import ParseError, Unsupported, parse_expression
+from .plots import plot_data
+from .store import SolutionStore
+from .strategies import integrate_tiered
+from .verify import verify
 
 # Lista blanca de funciones/constantes permitidas
 SAFE_FUNCS: Dict[str, object] = {
@@ -29,13 +41,58 @@ TRANSFORMS = standard_transformations + (
 # Soportar entradas con dx/dy/dt, con o sin símbolo integral delante
 _DX_RE = re.compile(r"^(?:∫)?\s*(?P<expr>.+?)\s*d(?P<var>[a-zA-Z])\s*$")
 
+# Integral definida: ∫_a^b ... dx (límites sueltos, entre llaves o entre paréntesis)
+_BOUND = r"(?:\{[^{}]*\}|\([^()]*\)|-?(?:\d+\.?\d*|\.\d+|[A-Za-z]+|∞))"
+_BOUNDS_RE = re.compile(rf"^\s*∫\s*_\s*(?P<lo>{_BOUND})\s*\^\s*(?P<hi>{_BOUND})")
+
+# En los límites además se aceptan infinitos
+_BOUND_NAMES: Dict[str, object] = {**SAFE_FUNCS, "oo": oo, "inf": oo}
+
+# Integrales múltiples: dos o más diferenciales al final ("x*y dx dy") y, delante, un ∫ por
+# variable (con o sin límites) o a lo sumo uno sin límites
+_DIFFERENTIALS_RE = re.compile(r"(?P<expr>.+?)(?P<ds>(?:\s*d[a-zA-Z]){2,})\s*$")
+_SIGN_RE = re.compile(rf"\s*∫(?:\s*_\s*(?P<lo>{_BOUND})\s*\^\s*(?P<hi>{_BOUND}))?")
+
+
+def _split_bounds(user_text: str):
+    """
+    Separa '∫_a^b f dx' en ('∫     f dx', a, b, offsets). Los límites se reemplazan por
+    espacios para que las posiciones de error del integrando sigan siendo las del usuario.
+    """
+    m = _BOUNDS_RE.match(user_text)
+    if not m:
+        return user_text, None
+    start = user_text.index("∫") + 1
+    blanked = user_text[:start] + " " * (m.end() - start) + user_text[m.end():]
+    return blanked, ((m.group("lo"), m.start("lo")), (m.group("hi"), m.start("hi")))
+
+
+def _parse_bound(text: str, offset: int, var: Symbol):
+    if text.startswith("{"):
+        text, offset = text[1:-1], offset + 1
+    stripped = text.strip()
+    if stripped in ("∞", "+∞", "-∞"):
+        return -oo if stripped.startswith("-") else oo
+    try:
+        value = parse_expression(text, var, _BOUND_NAMES, offset)
+    except Unsupported:
+        value = parse_expr(text, local_dict={var.name: var, **_BOUND_NAMES}, transformations=TRANSFORMS)
+    if value.has(var):
+        raise ParseError(f"Los límites no pueden depender de {var.name} (columna {offset + 1})", offset)
+    return value.doit()
+
+
 def _parse_input(user_text: str):
     text = user_text.strip()
 
+    # posición del integrando dentro del texto original (para informar errores)
+    offset = len(user_text) - len(user_text.lstrip())
+
     m = _DX_RE.match(text)
     if m:
-        expr_str = m.group("expr").strip()
+        expr_str = m.group("expr")
         var_str  = m.group("var")
+        offset += m.start("expr")
     else:
         # sin dx, asumimos variable 'x'
         expr_str, var_str = text, "x"
@@ -43,6 +100,12 @@ def _parse_input(user_text: str):
     # declarar símbolo de la variable
     var = Symbol(var_str)
 
+    # camino rápido: parser propio para la gramática habitual (ver parser.py)
+    try:
+        return parse_expression(expr_str, var, SAFE_FUNCS, offset), var
+    except Unsupported:
+        pass
+
     # diccionario local seguro (sin builtins peligrosos)
     local = {var_str: var, **SAFE_FUNCS}
 
@@ -50,35 +113,498 @@ def _parse_input(user_text: str):
     expr = parse_expr(expr_str, local_dict=local, transformations=TRANSFORMS, evaluate=False)
     return expr, var
 
-def solve_integral(user_text: str):
+class Solution:
     """
-    Resuelve una integral indefinida desde un texto de usuario.
-    Acepta formatos como: '∫ x^2 dx', 'x^2 dx', '(2x+1)*exp(x) dx'.
+    Resultado simbólico de una integral (en la variable canónica).
+    El payload JSON de /solve se renderiza una sola vez por nombre de variable.
     """
-    expr, var = _parse_input(user_text)
+    __slots__ = (
+        "expr", "var", "res", "check", "ok", "verified_by", "tier", "timings", "phases", "plots",
+        "bounds", "primitive", "rule", "_payloads", "_derivations", "_formats",
+    )
 
-    # integración
-    res = integrate(expr, var)
+    def __init__(self, expr, var, res, check, ok: Optional[bool], verified_by: str = "symbolic",
+                 tier: str = "integrate", timings: Optional[Dict[str, float]] = None,
+                 plots: Optional[List[dict]] = None, bounds: Optional[tuple] = None, primitive=None):
+        self.expr = expr
+        self.var = var
+        self.res = res
+        self.check = check
+        self.ok = ok  # None = la verificación no fue concluyente
+        self.verified_by = verified_by  # "numeric", "symbolic" o "none" (ver verify.py)
+        self.tier = tier  # estrategia que produjo la primitiva (ver strategies.TIERS)
+        self.timings = timings or {}  # ms por tier probado
+        self.phases: Dict[str, float] = {}  # ms por fase del cálculo (integrate, diff, verify, plot)
+        # no depende del nombre de la variable (ver plots.py); None = no se calcularon (se
+        # piden aparte con make_plots si algún cliente los quiere, ver set_plots)
+        self.plots = plots
+        # integrales definidas: (a, b); 'res' es el valor, 'check' la cuadratura numérica
+        # (o None) y 'primitive' la primitiva usada (o None). Ver definite.py.
+        self.bounds = bounds
+        self.primitive = primitive
+        # árbol de manualintegrate para el desarrollo paso a paso (ver steps.py): None = no se
+        # pidió todavía, False = no hay desarrollo. Se calcula solo si un cliente lo pide.
+        self.rule = None
+        self._payloads: Dict[str, dict] = {}
+        self._derivations: Dict[str, List[str]] = {}
+        self._formats: Dict[str, dict] = {}  # "var|formato" -> integrando/resultado en ese formato
 
-    # verificación por derivación
-    check = diff(res, var)
-    ok = (check.simplify() - expr.simplify()) == 0
+    def _renamed(self, var: Symbol) -> "Solution":
+        sub = {self.var: var}
+        rename = lambda e: None if e is None else e.xreplace(sub)
+        return Solution(
+            rename(self.expr), var, rename(self.res), rename(self.check),
+            self.ok, self.verified_by, self.tier, self.timings, self.plots,
+            self.bounds, rename(self.primitive),
+        )
 
-    steps = [
-        rf"Identificamos variable: ${latex(var)}$",
-        rf"Planteamos: $\int {latex(expr)}\,d{latex(var)}$",
-        rf"Obtenemos: ${latex(res)} + C$",
+    def plot_args(self) -> tuple:
+        """Argumentos de make_plots para esta solución."""
+        return self.expr, self.var, self.res if self.bounds is None else self.primitive, self.bounds
+
+    def set_plots(self, plots: List[dict]) -> None:
+        self.plots = plots
+        for payload in self._payloads.values():  # los ya renderizados no se vuelven a armar
+            payload["plots"] = plots
+
+    def for_var(self, var: Symbol) -> dict:
+        """Payload de /solve escrito en términos de `var` (la variable que usó el usuario)."""
+        payload = self._payloads.get(var.name)
+        if payload is None:
+            payload = _render(self if var == self.var else self._renamed(var))
+            self._payloads[var.name] = payload
+        # copia superficial: el payload memorizado no debe mutarse desde afuera
+        return dict(payload)
+
+    def needs_rule(self, var: Symbol) -> bool:
+        return self.rule is None and var.name not in self._derivations
+
+    def with_steps(self, var: Symbol) -> dict:
+        """Como for_var, con el desarrollo real en steps_latex (si ya está el árbol de reglas)."""
+        payload = self.for_var(var)
+        lines = self._derivations.get(var.name)
+        if lines is None and self.rule:
+            from .steps import render_rule  # manualintegrate y el renderer, solo si se piden pasos
+
+            lines = self._derivations[var.name] = render_rule(self.rule, var)
+        if lines:
+            steps = payload["steps_latex"]
+            # después de "Planteamos"; en las indefinidas, el "Obtenemos" final se mantiene
+            tail = steps[2:] if self.bounds is not None else steps[-1:]
+            payload["steps_latex"] = steps[:2] + lines + tail
+        return payload
+
+    def in_format(self, var: Symbol, fmt: str) -> dict:
+        """Integrando y resultado en `fmt` (text, mathml o srepr); se renderiza una sola vez."""
+        key = f"{var.name}|{fmt}"
+        rendered = self._formats.get(key)
+        if rendered is None:
+            rendered = _render_format(self if var == self.var else self._renamed(var), fmt)
+            self._formats[key] = rendered
+        return rendered
+
+    def rendered(self, var: Symbol, formats: Sequence[str]) -> bool:
+        """Si los formatos extra de `formats` ya están armados (y, con almacén, guardados)."""
+        return all(f"{var.name}|{fmt}" in self._formats for fmt in formats if fmt != "latex")
+
+    def payload(self, var: Symbol, formats: Sequence[str] = ("latex",), steps: bool = False) -> dict:
+        """
+        Payload de /solve con solo los formatos pedidos: "latex" son los campos *_latex y
+        checks de siempre; el resto va en "formats" (ver schemas.SolveResponse).
+        """
+        if "latex" in formats:
+            payload = self.with_steps(var) if steps else self.for_var(var)
+        else:
+            payload = {"plots": self.plots or [], "tier": self.tier}
+        others = [fmt for fmt in formats if fmt != "latex"]
+        if others:
+            payload["formats"] = {fmt: self.in_format(var, fmt) for fmt in others}
+        return payload
+
+    def to_record(self) -> dict:
+        """Forma serializable (JSON) para el almacén persistente."""
+        return {
+            "expr": srepr(self.expr),
+            "var": self.var.name,
+            "res": srepr(self.res),
+            "check": _srepr(self.check),
+            "ok": self.ok,
+            "verified_by": self.verified_by,
+            "tier": self.tier,
+            "timings": self.timings,
+            "bounds": [srepr(b) for b in self.bounds] if self.bounds else None,
+            "primitive": _srepr(self.primitive),
+            "payload": self._payloads.get(self.var.name) or self.for_var(self.var),
+            "plotted": self.plots is not None,
+            "derivation": self._derivations.get(self.var.name),
+            "formats": dict(self._formats),  # "var|formato" -> integrando/resultado
+        }
+
+    @classmethod
+    def from_record(cls, record: dict) -> "Solution":
+        # 'expr' se reconstruye sin evaluar para conservar la forma que escribió el usuario
+        with evaluate(False):
+            expr = sympify(record["expr"])
+        bounds = tuple(sympify(b) for b in record["bounds"]) if record.get("bounds") else None
+        sol = cls(expr, Symbol(record["var"]), sympify(record["res"]),
+                  _sympify(record["check"]), record["ok"], record["verified_by"],
+                  record["tier"], record["timings"],
+                  record["payload"].get("plots") if record.get("plotted", True) else None,
+                  bounds, _sympify(record.get("primitive")))
+        sol._payloads[record["var"]] = record["payload"]
+        if record.get("derivation") is not None:
+            sol._derivations[record["var"]] = record["derivation"]
+        for key, rendered in (record.get("formats") or {}).items():
+            sol._formats[key if "|" in key else f"{record['var']}|{key}"] = rendered
+        return sol
+
+
+def _srepr(expr) -> Optional[str]:
+    return None if expr is None else srepr(expr)
+
+
+def _sympify(text: Optional[str]):
+    return None if text is None else sympify(text)
+
+
+_VERDICTS = {True: r"\text{✓ correcto}", False: r"\text{✗ revisar}", None: r"\text{? sin verificar}"}
+_METHODS = {
+    "numeric": r"\ \text{(verificación numérica)}",
+    "symbolic": r"\ \text{(verificación simbólica)}",
+    "quadrature": r"\ \text{(cuadratura numérica)}",
+    "none": "",
+}
+
+
+def render_problem(expr, var, bounds: Optional[tuple] = None) -> str:
+    if bounds is not None:
+        lo, hi = bounds
+        return rf"\int_{{{latex(lo)}}}^{{{latex(hi)}}} {latex(expr)}\,d{latex(var)}"
+    return rf"\int {latex(expr)}\,d{latex(var)}"
+
+
+def _antiderivative_steps(var_tex: str, problem_tex: str, res_tex: str) -> List[str]:
+    return [
+        rf"Identificamos variable: ${var_tex}$",
+        rf"Planteamos: ${problem_tex}$",
+        rf"Obtenemos: ${res_tex} + C$",
     ]
 
+
+def render_antiderivative(expr, var, res, tier: str) -> dict:
+    """Parte del payload que ya se conoce con la primitiva, antes de verificar."""
+    res_tex = latex(res)
+    steps = _antiderivative_steps(latex(var), render_problem(expr, var), res_tex)
+    return {"steps_latex": steps, "result_latex": rf"{res_tex} + C", "tier": tier}
+
+
+def _render(sol: Solution) -> dict:
+    if sol.bounds is not None:
+        return _render_definite(sol)
+    expr, var, res, check = sol.expr, sol.var, sol.res, sol.check
+    # cada expresión se pasa por latex() una sola vez
+    var_tex, res_tex, problem_tex = latex(var), latex(res), render_problem(expr, var)
+
     checks = [
-        rf"\frac{{d}}{{d{latex(var)}}}\left({latex(res)}\right) = {latex(check)} \ "
-        + (r"\text{✓ correcto}" if ok else r"\text{✗ revisar}")
+        rf"\frac{{d}}{{d{var_tex}}}\left({res_tex}\right) = {latex(check)} \ "
+        + _VERDICTS[sol.ok] + _METHODS[sol.verified_by]
     ]
 
     return {
-        "problem_latex": rf"\int {latex(expr)}\,d{latex(var)}",
+        "problem_latex": problem_tex,
+        "steps_latex": _antiderivative_steps(var_tex, problem_tex, res_tex),
+        "result_latex": rf"{res_tex} + C",
+        "checks": checks,
+        "plots": sol.plots or [],
+        "tier": sol.tier,
+    }
+
+
+_PRINTERS = {
+    "text": sstr,
+    "mathml": lambda expr: mathml(expr, printer="presentation"),
+    "srepr": srepr,
+}
+
+
+def _render_format(sol: Solution, fmt: str) -> dict:
+    """Formatos de "formats" (el resultado de una indefinida va sin la constante C)."""
+    printer = _PRINTERS[fmt]
+    rendered = {"integrand": printer(sol.expr), "variable": sol.var.name, "result": printer(sol.res)}
+    if sol.bounds is not None:
+        rendered["bounds"] = [printer(b) for b in sol.bounds]
+    return rendered
+
+
+def _render_definite(sol: Solution) -> dict:
+    expr, var, res, numeric = sol.expr, sol.var, sol.res, sol.check
+    lo, hi = sol.bounds
+    integral = render_problem(expr, var, sol.bounds)
+    var_tex, res_tex = latex(var), latex(res)
+    steps = [
+        rf"Identificamos variable: ${var_tex}$",
+        rf"Planteamos: ${integral}$",
+    ]
+    if sol.primitive is not None:
+        steps.append(rf"Primitiva: $F({var_tex}) = {latex(sol.primitive)}$")
+    if sol.tier == "quadrature":
+        steps.append(r"Sin valor exacto a tiempo: cuadratura numérica del integrando")
+    elif diverges(res):
+        steps.append(r"Algún tramo del intervalo da un valor infinito: la integral diverge")
+    else:
+        steps.append(rf"Evaluamos: $F({latex(hi)}) - F({latex(lo)}) = {res_tex}$")
+
+    result = res_tex
+    numeric_tex = latex(numeric) if numeric is not None else None
+    if diverges(res):
+        result = r"\text{diverge}" + (rf" \ ({res_tex})" if res in (oo, -oo) else "")
+    elif numeric is not None and sol.tier != "quadrature" and not res.is_Rational:
+        result += rf" \approx {numeric_tex}"
+
+    checks = []
+    if numeric is not None:
+        checks.append(rf"{integral} \approx {numeric_tex} \ " + _VERDICTS[sol.ok] + _METHODS[sol.verified_by])
+
+    return {
+        "problem_latex": integral,
         "steps_latex": steps,
-        "result_latex": rf"{latex(res)} + C",
+        "result_latex": result,
         "checks": checks,
-        "plots": []
+        "plots": sol.plots or [],
+        "tier": sol.tier,
     }
+
+
+def make_plots(expr, var, primitive, bounds: Optional[tuple] = None) -> List[dict]:
+    """Datos para graficar f y F (NumPy; ver plots.py); en las definidas, con el intervalo."""
+    plots = plot_data(expr, primitive if primitive is not None else Integral(expr, var), var)
+    if plots and bounds is not None:
+        lo, hi = bounds
+        if lo.is_number and hi.is_number and lo.is_finite and hi.is_finite:
+            plots[0]["interval"] = [float(lo), float(hi)]
+    return plots
+
+
+def compute_definite(expr, var, bounds: tuple, precision: int = DEFAULT_PRECISION, plots: bool = True,
+                     budgets: Optional[Dict[str, float]] = None) -> Solution:
+    """Integral definida: primitiva en los límites si aparece a tiempo; si no, cuadratura."""
+    lo, hi = bounds
+    t0 = perf_counter()
+    d = definite_integral(expr, var, lo, hi, precision, budgets)
+    t1 = perf_counter()
+    data = make_plots(expr, var, d.primitive, bounds) if plots else None
+    t2 = perf_counter()
+
+    value = d.value if d.value is not None else Integral(expr, (var, lo, hi))
+    solution = Solution(expr, var, value, d.numeric, d.ok, d.method, d.tier, d.timings, data,
+                        bounds, d.primitive)
+    solution.phases = {"integrate": (t1 - t0) * 1000}
+    if plots:
+        solution.phases["plot"] = (t2 - t1) * 1000
+    return solution
+
+
+def compute_solution(expr, var, verify_mode: str = "auto", bounds: Optional[tuple] = None,
+                     precision: int = DEFAULT_PRECISION, budgets: Optional[Dict[str, float]] = None,
+                     plots: bool = True) -> Solution:
+    """
+    Integra (por tiers, de lo barato a lo caro) y verifica por derivación.
+    `budgets` reemplaza los presupuestos por tier (ej: los del carril pesado).
+    Sin `plots`, los gráficos quedan para cuando alguien los pida (ver Solution.set_plots).
+    """
+    if bounds is not None:
+        return compute_definite(expr, var, bounds, precision, plots, budgets)
+    return verify_stage(expr, var, *integrate_stage(expr, var, budgets), verify_mode, plots)
+
+
+def integrate_stage(expr, var, budgets: Optional[Dict[str, float]] = None):
+    """Primera etapa de compute_solution: (primitiva, tier, ms por tier, ms totales)."""
+    t0 = perf_counter()
+    res, tier, timings = integrate_tiered(expr, var, budgets)
+    return res, tier, timings, (perf_counter() - t0) * 1000
+
+
+def verify_stage(expr, var, res, tier: str, timings: Dict[str, float], integrate_ms: float = 0.0,
+                 verify_mode: str = "auto", plots: bool = True) -> Solution:
+    """Segunda etapa: verificación por derivación y gráficos, con la primitiva ya calculada."""
+    t1 = perf_counter()
+    # verificación por derivación (numérica y, si no alcanza, simbólica; ver verify.py)
+    check = diff(res, var)
+    t2 = perf_counter()
+    ok, method = verify(check, expr, var, verify_mode)
+    t3 = perf_counter()
+
+    data = make_plots(expr, var, res) if plots else None
+    t4 = perf_counter()
+
+    solution = Solution(expr, var, res, check, ok, method, tier, timings, data)
+    solution.phases = {"integrate": integrate_ms, "diff": (t2 - t1) * 1000, "verify": (t3 - t2) * 1000}
+    if plots:
+        solution.phases["plot"] = (t4 - t3) * 1000
+    return solution
+
+
+# Caché LRU de soluciones, indexada por la forma canónica de la expresión
+RESULT_CACHE = LRUCache(maxsize=int(os.getenv("CALC2_CACHE_SIZE", "1024")))
+
+# Almacén persistente opcional (compartido entre workers y reinicios)
+_STORE_PATH = os.getenv("CALC2_STORE_PATH", "")
+SOLUTION_STORE: Optional[SolutionStore] = SolutionStore(_STORE_PATH) if _STORE_PATH else None
+
+
+def cached_solution(key: str) -> Optional[Solution]:
+    """Busca primero en memoria y después en el almacén persistente (si existe)."""
+    solution = RESULT_CACHE.get(key)
+    if solution is None and SOLUTION_STORE is not None:
+        record = SOLUTION_STORE.get(key)
+        if record is not None:
+            solution = Solution.from_record(record)
+            RESULT_CACHE.put(key, solution)
+    return solution
+
+
+def remember_solution(key: str, solution: Solution) -> None:
+    RESULT_CACHE.put(key, solution)
+    if SOLUTION_STORE is not None:
+        SOLUTION_STORE.put(key, solution.to_record())
+
+
+class Problem(NamedTuple):
+    """Entrada del usuario ya parseada, con su forma canónica (ver cache.canonical_key)."""
+    expr: object
+    var: Symbol
+    key: str
+    cexpr: object
+    cvar: Symbol
+    verify: str = "auto"
+    bounds: Optional[tuple] = None  # (a, b) en integrales definidas
+    precision: int = DEFAULT_PRECISION
+
+
+def prepare_problem(user_text: str, verify_mode: str = "auto",
+                    precision: int = DEFAULT_PRECISION) -> Problem:
+    if _split_multiple(user_text) is not None:
+        raise ParseError("Integral múltiple: usá /solve o /solve/stream (no se resuelve en lote)")
+    try:
+        text, bound_texts = _split_bounds(user_text)
+        expr, var = _parse_input(text)
+        bounds = tuple(_parse_bound(t, offset, var) for t, offset in bound_texts) if bound_texts else None
+    except ParseError:
+        raise
+    except Exception as e:
+        raise ParseError(str(e)) from e
+    return make_problem(expr, var, bounds, verify_mode, precision)
+
+
+def make_problem(expr, var: Symbol, bounds: Optional[tuple] = None, verify_mode: str = "auto",
+                 precision: int = DEFAULT_PRECISION) -> Problem:
+    """Problem de una expresión ya construida (ej: un nivel de una integral múltiple)."""
+    key, cexpr, cvar = canonical_key(expr, var, bounds)
+    if bounds is not None:
+        key = f"{key}|bounds={srepr(bounds[0])},{srepr(bounds[1])}|dps={precision}"
+    elif verify_mode != "auto":
+        # un modo de verificación explícito produce otra respuesta: otra entrada de caché
+        key = f"{key}|verify={verify_mode}"
+    return Problem(expr, var, key, cexpr, cvar, verify_mode, bounds, precision)
+
+
+class MultipleProblem(NamedTuple):
+    """Integral iterada ya parseada (ver multiple.py)."""
+    expr: object
+    levels: Tuple[Tuple[Symbol, Optional[tuple]], ...]  # (variable, límites), de adentro hacia afuera
+    key: str
+    verify: str = "auto"
+    precision: int = DEFAULT_PRECISION
+
+
+def _split_multiple(user_text: str):
+    """(∫ con sus límites, match de los diferenciales, posición del cuerpo) o None."""
+    pos, signs = 0, []
+    while True:
+        m = _SIGN_RE.match(user_text, pos)
+        if m is None:
+            break
+        signs.append(((m.group("lo"), m.start("lo")), (m.group("hi"), m.start("hi"))) if m.group("lo") else None)
+        pos = m.end()
+    m = _DIFFERENTIALS_RE.match(user_text, pos)
+    return None if m is None else (signs, m)
+
+
+def parse_multiple(user_text: str, verify_mode: str = "auto",
+                   precision: int = DEFAULT_PRECISION) -> Optional[MultipleProblem]:
+    """
+    'x*y dx dy', '∫∫ x*y dx dy' o '∫_0^1 ∫_0^y x*y dx dy' (el ∫ de más adentro va con el
+    primer diferencial). None si hay un solo diferencial (ver prepare_problem).
+    """
+    split = _split_multiple(user_text)
+    if split is None:
+        return None
+    signs, m = split
+    variables = [Symbol(name) for name in re.findall(r"d([a-zA-Z])", m.group("ds"))]
+    if len(set(variables)) < len(variables):
+        raise ParseError("Cada variable de integración puede aparecer una sola vez", m.start("ds"))
+    if len(signs) == len(variables):
+        bound_texts = signs[::-1]
+    elif len(signs) <= 1 and not any(signs):
+        bound_texts = [None] * len(variables)
+    else:
+        raise ParseError(f"Hay {len(signs)} ∫ y {len(variables)} diferenciales: va un ∫ por variable "
+                         "(o uno solo, sin límites)", 0)
+    try:
+        try:
+            expr = parse_expression(m.group("expr"), variables[0], SAFE_FUNCS, m.start("expr"))
+        except Unsupported:
+            local = {**{v.name: v for v in variables}, **SAFE_FUNCS}
+            expr = parse_expr(m.group("expr"), local_dict=local, transformations=TRANSFORMS, evaluate=False)
+        levels = []
+        for i, (var, texts) in enumerate(zip(variables, bound_texts)):
+            bounds = tuple(_parse_bound(t, offset, var) for t, offset in texts) if texts else None
+            inner = set(variables[:i]) & set().union(*(b.free_symbols for b in bounds or ()))
+            if inner:
+                names = ", ".join(sorted(v.name for v in inner))
+                raise ParseError(f"Los límites de {var.name} no pueden depender de {names} (se integra antes)",
+                                 texts[0][1])
+            levels.append((var, bounds))
+    except ParseError:
+        raise
+    except Exception as e:
+        raise ParseError(str(e)) from e
+    key = "|".join([f"iterated={srepr(expr)}"]
+                   + [f"{v.name}:{'' if b is None else f'{srepr(b[0])},{srepr(b[1])}'}" for v, b in levels]
+                   + [f"verify={verify_mode}", f"dps={precision}"])
+    return MultipleProblem(expr, tuple(levels), key, verify_mode, precision)
+
+
+def solve_integral(user_text: str, verify_mode: str = "auto", precision: int = DEFAULT_PRECISION):
+    """
+    Resuelve una integral desde un texto de usuario.
+    Acepta formatos como: '∫ x^2 dx', 'x^2 dx', '(2x+1)*exp(x) dx' y, definidas,
+    '∫_0^1 exp(-x^2) dx' o '∫_{-1}^{pi/2} ... dx' (`precision`: dígitos de la cuadratura),
+    e iteradas: 'x*y dx dy', '∫_0^1 ∫_0^y x*y dx dy' (ver multiple.py).
+    Entradas equivalentes comparten la misma entrada de RESULT_CACHE.
+    """
+    multiple = parse_multiple(user_text, verify_mode, precision)
+    if multiple is not None:
+        from .multiple import solve_multiple  # multiple.py importa este módulo
+
+        return solve_multiple(multiple, solve_part).payload()
+    problem = prepare_problem(user_text, verify_mode, precision)
+    return solve_problem(problem).for_var(problem.var)
+
+
+def solve_problem(problem: Problem, plots: bool = True) -> Solution:
+    """Caché o cálculo (en este proceso) de un problema ya parseado."""
+    solution = cached_solution(problem.key)
+    if solution is None:
+        solution = compute_solution(problem.cexpr, problem.cvar, problem.verify, problem.bounds,
+                                    problem.precision, plots=plots)
+        remember_solution(problem.key, solution)
+    elif plots and solution.plots is None:
+        solution.set_plots(make_plots(*solution.plot_args()))
+        remember_solution(problem.key, solution)
+    return solution
+
+
+def solve_part(problem: Problem) -> Solution:
+    """solve_problem para las partes de una integral iterada (no se grafican)."""
+    return solve_problem(problem, plots=False)
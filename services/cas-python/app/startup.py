@@ -0,0 +1,117 @@
+"""
+Arranque en frío (Render duerme las instancias gratis y las despierta con el primer pedido).
+
+- /health es liveness: responde apenas el proceso escucha. /ready es readiness: da 200
+  recién cuando terminó el calentamiento (antes, 503 con la etapa en curso).
+- El calentamiento corre en segundo plano, con el puerto ya abierto: levanta los pools
+  (cada worker resuelve WARMUP_INPUTS en su initializer) y después el proceso web resuelve
+  las mismas integrales, así SymPy ya cargó sus módulos perezosos y llenó sus cachés
+  (parser, integrate, diff, latex) cuando llega el primer pedido real.
+- Cada fase se mide: import, un pool por carril, warmup (ver Startup.stats, /ready y /stats).
+- Si un pool no arranca, la instancia no puede calcular: /ready sigue en 503 (etapa
+  "failed" con el error). Un warmup fallido, en cambio, solo hace más lento el primer pedido.
+"""
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Dict, Optional
+
+from . import STARTED_AT
+
+WARMUP = os.getenv("CALC2_WARMUP", "1") != "0"
+
+# Una integral por camino del solver: polinomio, tabla, partes, la cadena completa de
+# integrate (con el ciclo de partes), arctan y una definida
+WARMUP_INPUTS = (
+    "3x^2 + 2x dx",
+    "sin(x)*cos(x) dx",
+    "x*exp(2x) dx",
+    "exp(x)*cos(x) dx",
+    "1/(x^2+1) dx",
+    "∫_0^1 x^2 dx",
+)
+
+LOG = logging.getLogger("calc2.startup")
+
+
+def warm_worker() -> None:
+    """Initializer de los workers del pool: recorre WARMUP_INPUTS dentro del worker."""
+    from .solver import compute_solution, prepare_problem
+
+    for text in WARMUP_INPUTS if WARMUP else WARMUP_INPUTS[:1]:
+        problem = prepare_problem(text)
+        compute_solution(problem.cexpr, problem.cvar, problem.verify, problem.bounds, problem.precision)
+
+
+class Startup:
+    def __init__(self, started_at: float = STARTED_AT):
+        self.started_at = started_at
+        self.phases: Dict[str, float] = {}  # ms por fase
+        self.stage = "import"
+        self.error: Optional[str] = None
+        self._ready = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    @contextmanager
+    def phase(self, name: str):
+        self.stage = name
+        t0 = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = (perf_counter() - t0) * 1000
+
+    def imported(self) -> None:
+        self.phases["import"] = (perf_counter() - self.started_at) * 1000
+        self.stage = "starting"
+
+    def restart(self) -> None:
+        """Nuevo ciclo de arranque en el mismo proceso (lifespan otra vez, ej: en los tests)."""
+        self._ready.clear()
+        self.phases = {k: v for k, v in self.phases.items() if k == "import"}
+        self.stage, self.error = "starting", None
+
+    def mark_ready(self) -> None:
+        self.phases["total"] = (perf_counter() - self.started_at) * 1000
+        self.stage = "ready"
+        self._ready.set()
+        LOG.info("listo en %.0f ms (%s)", self.phases["total"],
+                 ", ".join(f"{k}={v:.0f}" for k, v in self.phases.items() if k != "total"))
+
+    def stats(self) -> dict:
+        body = {
+            "ready": self.ready,
+            "stage": self.stage,
+            "phases_ms": {k: round(v, 1) for k, v in self.phases.items()},
+        }
+        if self.error is not None:
+            body["error"] = self.error
+        return body
+
+
+def warm_up(startup: Startup, pools: Dict[str, object], solve: Callable[[str], dict]) -> None:
+    """Levanta los pools y resuelve WARMUP_INPUTS; marca listo si los pools arrancaron."""
+    try:
+        for name, pool in pools.items():
+            with startup.phase(name):
+                pool.start()
+    except Exception as e:
+        startup.stage, startup.error = "failed", str(e) or type(e).__name__
+        LOG.error("no arrancó el pool: %s", startup.error)
+        return
+    try:
+        if WARMUP:
+            with startup.phase("warmup"):
+                for text in WARMUP_INPUTS:
+                    solve(text)
+    except Exception as e:  # sin calentar igual se puede atender, solo más lento
+        startup.error = str(e) or type(e).__name__
+    startup.mark_ready()
+
+
+STARTUP = Startup()
@@ -0,0 +1,208 @@
+"""
+Desarrollo paso a paso a partir del árbol de reglas de manualintegrate (sustitución,
+partes, fracciones simples, sustitución trigonométrica, ...).
+
+- rule_tree(): integral_steps de SymPy con una caché de subárboles indexada por la forma
+  canónica del sub-integrando. La función que SymPy usa en su recursión se reemplaza una
+  sola vez, al importar, por una que consulta la caché solo en el hilo que está dentro de
+  rule_tree (los demás hilos, ej: el tier manual en modo inline, siguen sin caché). Así
+  cada subproblema (ej: ∫x^2 e^x dx dentro de ∫x^3 e^x dx por partes) se calcula una sola
+  vez y queda listo para pedidos futuros.
+- render_rule(): el árbol como líneas de texto con LaTeX entre $...$ (formato de
+  steps_latex). Se calcula solo si el cliente pide "steps": true.
+"""
+import os
+import threading
+from dataclasses import fields, replace
+from typing import Dict, List, Optional
+
+import sympy.integrals.manualintegrate as mi
+from sympy import Add, Basic, Dummy, Symbol, apart, latex, srepr, sympify
+from sympy.integrals.manualintegrate import (
+    AddRule, AlternativeRule, AtomicRule, CompleteSquareRule, ConstantRule, ConstantTimesRule,
+    CyclicPartsRule, DontKnowRule, PartsRule, PiecewiseRule, RewriteRule, Rule, TrigSubstitutionRule, URule,
+)
+
+from .cache import CANONICAL_VAR, LRUCache
+from .strategies import TierTimeout, time_budget
+
+STEPS_BUDGET = float(os.getenv("CALC2_STEPS_BUDGET", "5"))
+MAX_STEPS = 40  # más líneas que esto no ayudan a nadie: se corta con "..."
+
+_RULES = LRUCache(maxsize=int(os.getenv("CALC2_STEPS_CACHE_SIZE", "2048")))
+_integral_steps = mi.integral_steps
+_MEMO = threading.local()  # .active: el hilo actual está dentro de rule_tree
+
+
+class NoSteps(Exception):
+    """manualintegrate no tiene un desarrollo completo para esta integral."""
+
+
+def _rename(node, sub: Dict[Basic, Basic]):
+    if isinstance(node, Rule):
+        return replace(node, **{f.name: _rename(getattr(node, f.name), sub) for f in fields(node)})
+    if isinstance(node, (list, tuple)):
+        return type(node)(_rename(item, sub) for item in node)
+    if isinstance(node, Basic):
+        return node.xreplace(sub)
+    return node
+
+
+def _complete(node) -> bool:
+    if isinstance(node, DontKnowRule):
+        return False
+    if isinstance(node, Rule):
+        return all(_complete(getattr(node, f.name)) for f in fields(node))
+    if isinstance(node, (list, tuple)):
+        return all(_complete(item) for item in node)
+    return True
+
+
+def _has(node, kind) -> bool:
+    if isinstance(node, kind):
+        return True
+    if isinstance(node, Rule):
+        return any(_has(getattr(node, f.name), kind) for f in fields(node))
+    if isinstance(node, (list, tuple)):
+        return any(_has(item, kind) for item in node)
+    return False
+
+
+def _key(integrand, symbol) -> Optional[str]:
+    if symbol != CANONICAL_VAR and CANONICAL_VAR in integrand.free_symbols:
+        return None
+    return srepr(integrand.xreplace({symbol: CANONICAL_VAR}))
+
+
+def _cached_integral_steps(integrand, symbol, **options):
+    key = _key(integrand, symbol)
+    rule = _RULES.get(key) if key is not None else None
+    if rule is not None:
+        return rule if symbol == CANONICAL_VAR else _rename(rule, {CANONICAL_VAR: symbol})
+    rule = _integral_steps(integrand, symbol, **options)
+    # un DontKnowRule puede venir del corte de ciclos de SymPy (depende del contexto): no se guarda
+    if key is not None and _complete(rule):
+        _RULES.put(key, rule if symbol == CANONICAL_VAR else _rename(rule, {symbol: CANONICAL_VAR}))
+    return rule
+
+
+def _recursive_integral_steps(integrand, symbol, **options):
+    if getattr(_MEMO, "active", False):
+        return _cached_integral_steps(integrand, symbol, **options)
+    return _integral_steps(integrand, symbol, **options)
+
+
+mi.integral_steps = _recursive_integral_steps
+
+
+def rule_tree(expr, var) -> Rule:
+    """Árbol de reglas de ∫ expr d(var); lanza NoSteps si queda algún tramo sin resolver."""
+    _MEMO.active = True
+    try:
+        with time_budget(STEPS_BUDGET):
+            rule = _cached_integral_steps(expr, var)
+    except TierTimeout:
+        raise NoSteps("el desarrollo paso a paso tardó demasiado") from None
+    finally:
+        _MEMO.active = False
+    if not _complete(rule):
+        raise NoSteps("sin desarrollo paso a paso")
+    return rule
+
+
+class _Renderer:
+    def __init__(self, sub: Dict[Basic, Basic], names: List[str]):
+        self.sub = sub
+        self.names = names  # para las variables auxiliares de SymPy (todas se llaman _u)
+        self.lines: List[str] = []
+
+    def tex(self, expr) -> str:
+        return latex(sympify(expr).xreplace(self.sub))
+
+    def name(self, dummy) -> None:
+        if isinstance(dummy, Dummy) and dummy not in self.sub:
+            k = sum(isinstance(old, Dummy) for old in self.sub)
+            self.sub[dummy] = Symbol(self.names[k] if k < len(self.names) else f"{self.names[0]}_{k}")
+
+    def integral(self, rule) -> str:
+        body = self.tex(rule.integrand)
+        if isinstance(sympify(rule.integrand), Add):
+            body = rf"\left({body}\right)"
+        return rf"\int {body}\,d{self.tex(rule.variable)}"
+
+    def differential(self, coeff, var) -> str:
+        return ("" if coeff == 1 else rf"{self.tex(coeff)}\,") + f"d{self.tex(var)}"
+
+    def add(self, text: str) -> None:
+        self.lines.append(text)
+
+    def immediate(self, rule, name: str) -> None:
+        self.add(rf"{name}: ${self.integral(rule)} = {self.tex(rule.eval())}$")
+
+    def walk(self, rule) -> None:
+        if isinstance(rule, AlternativeRule):
+            self.walk(rule.alternatives[0])
+        elif isinstance(rule, ConstantRule):
+            self.immediate(rule, "Integral de una constante")
+        elif isinstance(rule, ConstantTimesRule):
+            c = {1: "", -1: "-"}.get(rule.constant, self.tex(rule.constant))
+            self.add(rf"Sacamos la constante: ${self.integral(rule)} = {c}"
+                     rf"\int {self.tex(rule.other)}\,d{self.tex(rule.variable)}$")
+            self.walk(rule.substep)
+        elif isinstance(rule, AddRule):
+            parts = " + ".join(self.integral(step) for step in rule.substeps)
+            self.add(rf"Separamos la suma: ${self.integral(rule)} = {parts}$")
+            for step in rule.substeps:
+                self.walk(step)
+        elif isinstance(rule, URule):
+            u, x = rule.u_var, rule.variable
+            self.name(u)
+            self.add(rf"Sustitución: ${self.tex(u)} = {self.tex(rule.u_func)}$, "
+                     rf"$d{self.tex(u)} = {self.differential(rule.u_func.diff(x), x)}$")
+            self.walk(rule.substep)
+            self.add(rf"Volvemos a ${self.tex(x)}$: ${self.tex(rule.eval())}$")
+        elif isinstance(rule, PartsRule):
+            x = rule.variable
+            v = rule.v_step.eval()
+            self.add(rf"Por partes: $u = {self.tex(rule.u)}$, $dv = {self.tex(rule.dv)}\,d{self.tex(x)}$"
+                     rf" $\Rightarrow$ $du = {self.differential(rule.u.diff(x), x)}$, $v = {self.tex(v)}$")
+            self.walk(rule.v_step)
+            self.add(rf"$\int u\,dv = u\,v - \int v\,du$: ${self.integral(rule)} = {self.tex(rule.u * v)}"
+                     rf" - \int {self.tex(rule.second_step.integrand)}\,d{self.tex(x)}$")
+            self.walk(rule.second_step)
+        elif isinstance(rule, CyclicPartsRule):
+            self.add(rf"Por partes {len(rule.parts_rules)} veces reaparece ${self.integral(rule)}$"
+                     rf" (con coeficiente ${self.tex(rule.coefficient)}$): despejamos")
+            self.add(rf"${self.integral(rule)} = {self.tex(rule.eval())}$")
+        elif isinstance(rule, CompleteSquareRule):
+            self.add(rf"Completamos el cuadrado: ${self.tex(rule.integrand)} = {self.tex(rule.rewritten)}$")
+            self.walk(rule.substep)
+        elif isinstance(rule, RewriteRule):
+            x = rule.variable
+            if rule.integrand.is_rational_function(x) and rule.rewritten == apart(rule.integrand, x):
+                self.add(rf"Fracciones simples: ${self.tex(rule.integrand)} = {self.tex(rule.rewritten)}$")
+            else:
+                self.add(rf"Reescribimos: ${self.tex(rule.integrand)} = {self.tex(rule.rewritten)}$")
+            self.walk(rule.substep)
+        elif isinstance(rule, TrigSubstitutionRule):
+            self.add(rf"Sustitución trigonométrica: ${self.tex(rule.variable)} = {self.tex(rule.func)}$")
+            self.add(rf"Queda ${self.integral(rule.substep)}$")
+            self.walk(rule.substep)
+            self.add(rf"Deshacemos la sustitución: ${self.integral(rule)} = {self.tex(rule.eval())}$")
+        elif isinstance(rule, PiecewiseRule):
+            self.add(rf"Por casos: ${self.integral(rule)} = {self.tex(rule.eval())}$")
+        elif isinstance(rule, AtomicRule):
+            self.immediate(rule, "Integral inmediata")
+        else:
+            self.add(rf"${self.integral(rule)} = {self.tex(rule.eval())}$")
+
+
+def render_rule(rule: Rule, var: Optional[Symbol] = None) -> List[str]:
+    """Líneas del desarrollo; `var` renombra la variable del árbol (la canónica) a la del usuario."""
+    sub = {rule.variable: var} if var is not None and var != rule.variable else {}
+    # con partes en el árbol, "u" ya es la de u·dv: las sustituciones usan otras letras
+    names = ["w", "z", "s"] if _has(rule, PartsRule) else ["u", "w", "z"]
+    renderer = _Renderer(sub, names)
+    renderer.walk(rule)
+    lines = renderer.lines
+    return lines if len(lines) <= MAX_STEPS else lines[:MAX_STEPS - 1] + [r"$\ldots$"]
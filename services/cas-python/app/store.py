@@ -0,0 +1,161 @@
+"""
+Almacén persistente de soluciones (SQLite en modo WAL).
+
+- Sobrevive a reinicios del proceso y se comparte entre workers de uvicorn: WAL permite
+  muchos lectores concurrentes mientras un proceso escribe. Sobrevive a un redeploy solo
+  si el archivo está en un disco persistente; en /tmp (como en render.yaml, plan free sin
+  discos) es una caché caliente por instancia que se vuelve a llenar con el pre-calentado.
+- Cada fila guarda el payload completo de /solve más la forma simbólica (srepr),
+  indexada por la clave canónica de la expresión (ver cache.canonical_key).
+- Las filas llevan la versión del esquema + versión de SymPy: al actualizar SymPy,
+  las entradas viejas dejan de leerse. No se borran al arrancar (en un deploy gradual
+  conviven workers de las dos versiones sobre el mismo archivo): la limpieza es aparte,
+
+    python -m app.store purge <archivo> [--keep VERSION ...]
+"""
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import sympy
+
+STORE_FORMAT = 4
+SCHEMA_VERSION = f"{STORE_FORMAT}:sympy-{sympy.__version__}"
+
+# Corpus de integrales típicas de Cálculo II (para pre-calentar)
+CORPUS_PATH = Path(__file__).parent / "data" / "corpus.json"
+
+
+def _digest(key: str) -> str:
+    # las claves canónicas (srepr) pueden ser largas: indexamos por su hash
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class SolutionStore:
+    """Clave/valor sobre SQLite. Una conexión por hilo (sqlite3 no las comparte)."""
+
+    def __init__(self, path, version: str = SCHEMA_VERSION):
+        self.path = str(path)
+        self.version = version
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS solutions ("
+            " version TEXT NOT NULL, key TEXT NOT NULL, record TEXT NOT NULL,"
+            " created REAL NOT NULL, PRIMARY KEY (version, key))"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: autocommit, cada escritura es una transacción corta
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT record FROM solutions WHERE version = ? AND key = ?",
+            (self.version, _digest(key)),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, record: dict) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO solutions (version, key, record, created) VALUES (?, ?, ?, ?)",
+            (self.version, _digest(key), json.dumps(record, ensure_ascii=False), time.time()),
+        )
+        self.writes += 1
+
+    def get_meta(self, name: str) -> Optional[str]:
+        row = self._conn().execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value: str) -> None:
+        self._conn().execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    def purge(self, keep: Iterable[str] = ()) -> int:
+        """Borra las entradas de otras versiones (salvo `keep`); devuelve cuántas borró."""
+        versions = [self.version, *keep]
+        marks = ",".join("?" * len(versions))
+        cur = self._conn().execute(f"DELETE FROM solutions WHERE version NOT IN ({marks})", versions)
+        return cur.rowcount
+
+    def __len__(self) -> int:
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM solutions WHERE version = ?", (self.version,)
+        ).fetchone()
+        return row[0]
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "path": self.path,
+            "version": self.version,
+            "size": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+        }
+
+
+def load_corpus(path: Path = CORPUS_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def prewarm(store: SolutionStore, solve: Callable[[str], dict], corpus: Optional[dict] = None) -> int:
+    """
+    Resuelve todas las integrales del corpus para que queden en el almacén.
+    Se marca en 'meta' por versión, así que con varios workers (o reinicios) solo
+    se hace una vez por versión de corpus/SymPy. Devuelve cuántas se resolvieron.
+    """
+    corpus = corpus or load_corpus()
+    marker = f"prewarm:{store.version}"
+    if store.get_meta(marker) == str(corpus["version"]):
+        return 0
+
+    solved = 0
+    for items in corpus["groups"].values():
+        for text in items:
+            try:
+                solve(text)
+                solved += 1
+            except Exception:
+                # una entrada rota del corpus no debe frenar el resto
+                continue
+    store.set_meta(marker, str(corpus["version"]))
+    return solved
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.store", description="Mantenimiento del almacén.")
+    parser.add_argument("command", choices=("purge",))
+    parser.add_argument("path", help="archivo SQLite (CALC2_STORE_PATH)")
+    parser.add_argument("--keep", action="append", default=[],
+                        help="otra versión a conservar (ej. la del deploy anterior, si sigue activo)")
+    args = parser.parse_args(argv)
+
+    removed = SolutionStore(args.path).purge(args.keep)
+    print(f"{removed} entradas de otras versiones borradas (queda {SCHEMA_VERSION})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Integración por niveles (tiers): primero estrategias baratas, después las caras.
+
+1. polynomial — polinomios (Poly.integrate) y funciones racionales (ratint).
+2. table      — tabla de formas estándar k·f(a·x+b), término a término.
+3. manual     — manualintegrate (reglas "de lápiz y papel": sustitución, partes, ...).
+4. integrate  — sympy.integrate completo (Risch, heurísticas, Meijer-G).
+
+Cada tier tiene su propio presupuesto de tiempo (CALC2_TIER_BUDGETS, en segundos; 0 = sin
+tope propio). Si un tier no aplica, falla o se queda sin tiempo, se pasa al siguiente;
+si el último (integrate) se queda sin tiempo, SolveTimeout (el 504 de /solve).
+Los presupuestos usan SIGALRM, así que solo se aplican en el hilo principal de un proceso
+(los workers del pool); en modo "inline" los tiers corren sin tope propio.
+"""
+import os
+import signal
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Dict, Optional, Tuple
+
+from sympy import (
+    Add, Integral, Poly, Wild, asin, atan, cos, cosh, exp, integrate, log, sin, sinh, sqrt, tan,
+)
+from sympy.integrals.manualintegrate import manualintegrate
+from sympy.integrals.rationaltools import ratint
+
+from .executor import SolveTimeout
+
+TIERS = ("polynomial", "table", "manual", "integrate")
+
+_DEFAULT_BUDGETS = "polynomial=1,table=1,manual=5,integrate=0"
+
+
+def parse_budgets(spec: str) -> Dict[str, float]:
+    budgets = {}
+    for item in spec.split(","):
+        name, _, seconds = item.partition("=")
+        if name.strip():
+            budgets[name.strip()] = float(seconds or 0)
+    return budgets
+
+
+TIER_BUDGETS = parse_budgets(os.getenv("CALC2_TIER_BUDGETS", _DEFAULT_BUDGETS))
+
+
+class TierTimeout(BaseException):
+    # BaseException: que ningún `except Exception` interno de SymPy se lo trague
+    """Se agotó el presupuesto de tiempo de un tier."""
+
+
+@contextmanager
+def time_budget(seconds: float):
+    """Corta el bloque con TierTimeout a los `seconds` (solo en el hilo principal)."""
+    usable = (
+        seconds > 0
+        and hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+    )
+    if not usable:
+        yield
+        return
+
+    def _alarm(signum, frame):
+        raise TierTimeout()
+
+    previous = signal.signal(signal.SIGALRM, _alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _polynomial(expr, var):
+    if expr.is_polynomial(var):
+        return Poly(expr, var).integrate().as_expr()
+    if expr.is_rational_function(var):
+        return ratint(expr, var)
+    return None
+
+
+def _table_rules(var):
+    k, a, b, n = (Wild(name, exclude=[var]) for name in "kabn")
+    u = a * var + b
+    rules = [
+        (k * u**n, None),  # potencia: la plantilla depende de si n = -1 (ver _table_term)
+        (k * exp(u), k * exp(u) / a),
+        (k * sin(u), -k * cos(u) / a),
+        (k * cos(u), k * sin(u) / a),
+        (k * tan(u), -k * log(cos(u)) / a),
+        (k * sinh(u), k * cosh(u) / a),
+        (k * cosh(u), k * sinh(u) / a),
+        (k / (var**2 + 1), k * atan(var)),
+        (k / sqrt(1 - var**2), k * asin(var)),
+    ]
+    return k, a, n, u, rules
+
+
+def _table_term(term, var):
+    if not term.has(var):
+        return term * var
+    k, a, n, u, rules = _table_rules(var)
+    for pattern, template in rules:
+        m = term.match(pattern)
+        if not m or m.get(a, 1) == 0:
+            continue
+        if template is None:
+            template = k * log(u) / a if m[n] == -1 else k * u**(n + 1) / (a * (n + 1))
+        return template.xreplace(m)
+    return None
+
+
+def _table(expr, var):
+    # linealidad: si todos los términos están en la tabla, sumamos sus primitivas
+    parts = []
+    for term in Add.make_args(expr):
+        res = _table_term(term, var)
+        if res is None:
+            return None
+        parts.append(res)
+    return Add(*parts)
+
+
+def _manual(expr, var):
+    res = manualintegrate(expr, var)
+    return None if res.has(Integral) else res
+
+
+_STRATEGIES: Dict[str, Callable] = {
+    "polynomial": _polynomial,
+    "table": _table,
+    "manual": _manual,
+}
+
+
+def integrate_tiered(expr, var, budgets: Optional[Dict[str, float]] = None,
+                     total: float = 0) -> Tuple[object, str, Dict[str, float]]:
+    """
+    Devuelve (primitiva, tier que la produjo, ms gastados en cada tier probado).
+    `total` (segundos, 0 = sin tope) acota el tiempo de todos los tiers juntos.
+    """
+    budgets = TIER_BUDGETS if budgets is None else budgets
+    timings: Dict[str, float] = {}
+    deadline = perf_counter() + total if total > 0 else None
+
+    def budget(name: str) -> float:
+        own = budgets.get(name, 0)
+        if deadline is None:
+            return own
+        left = max(deadline - perf_counter(), 0.001)
+        return min(own, left) if own > 0 else left
+
+    # los tiers rápidos hacen pattern matching: necesitan el árbol evaluado
+    work = expr.doit()
+
+    for name in TIERS[:-1]:
+        t0 = perf_counter()
+        try:
+            with time_budget(budget(name)):
+                res = _STRATEGIES[name](work, var)
+        except TierTimeout:
+            res = None
+        except Exception:
+            # el tier no aplica (PolynomialError, NotImplementedError, ...): seguimos
+            res = None
+        timings[name] = (perf_counter() - t0) * 1000
+        if res is not None:
+            return res, name, timings
+
+    t0 = perf_counter()
+    try:
+        with time_budget(budget("integrate")):
+            res = integrate(expr, var)
+    except TierTimeout:
+        raise SolveTimeout("integrate() superó su presupuesto de tiempo.") from None
+    finally:
+        timings["integrate"] = (perf_counter() - t0) * 1000
+    return res, "integrate", timings
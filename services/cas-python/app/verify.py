@@ -0,0 +1,84 @@
+"""
+Verificación de la primitiva: ¿d/dx(resultado) == integrando?
+
+- "numeric": evalúa derivada e integrando en varios puntos al azar (vectorizado con NumPy)
+  y compara con tolerancia. Los puntos se toman en el semiplano superior complejo para
+  esquivar los cortes de rama de log/sqrt/asin sobre el eje real.
+- "symbolic": simplify(derivada - integrando) == 0, con tope de tiempo.
+- "auto" (por defecto): numérica; si no es concluyente o da distinto, simbólica (una
+  cancelación apenas por encima de la tolerancia no alcanza para marcar "✗ revisar").
+
+El resultado es True (coincide), False (no coincide) o None (no se pudo concluir).
+"""
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+from sympy import lambdify, simplify
+
+from .strategies import TierTimeout, time_budget
+
+VERIFY_MODES = ("auto", "numeric", "symbolic")
+
+SAMPLE_POINTS = 8
+MIN_FINITE_POINTS = 5
+TOLERANCE = 1e-8
+SYMBOLIC_BUDGET = float(os.getenv("CALC2_VERIFY_SYMBOLIC_BUDGET", "5"))
+
+# Semilla fija: la misma integral se verifica siempre con los mismos puntos
+_SEED = 20240917
+
+
+def numeric_check(check, expr, var) -> Optional[bool]:
+    """Compara `check` y `expr` en puntos al azar; None si no es concluyente."""
+    params = sorted(expr.free_symbols | check.free_symbols, key=lambda s: s.name)
+    if var not in params:
+        params.append(var)
+    try:
+        f = lambdify(params, check - expr, modules="numpy")
+        g = lambdify(params, expr, modules="numpy")
+    except Exception:
+        return None
+
+    rng = np.random.default_rng(_SEED)
+    args = []
+    for p in params:
+        if p == var:
+            args.append(rng.uniform(-2, 2, SAMPLE_POINTS) + 1j * rng.uniform(0.1, 1, SAMPLE_POINTS))
+        else:
+            # parámetros simbólicos (ej: 'a' en a*x): valores reales positivos
+            args.append(rng.uniform(0.5, 2, SAMPLE_POINTS) + 0j)
+
+    try:
+        with np.errstate(all="ignore"):
+            diff_vals = np.broadcast_to(np.asarray(f(*args), dtype=complex), (SAMPLE_POINTS,))
+            scale = np.broadcast_to(np.abs(np.asarray(g(*args), dtype=complex)), (SAMPLE_POINTS,))
+    except Exception:
+        return None
+
+    finite = np.isfinite(diff_vals) & np.isfinite(scale)
+    if finite.sum() < MIN_FINITE_POINTS:
+        return None
+    return bool(np.all(np.abs(diff_vals[finite]) <= TOLERANCE * (1 + scale[finite])))
+
+
+def symbolic_check(check, expr, budget: float = SYMBOLIC_BUDGET) -> Optional[bool]:
+    """simplify(check - expr) == 0 con tope de tiempo; None si se agotó."""
+    try:
+        with time_budget(budget):
+            return bool(simplify(check - expr) == 0)
+    except TierTimeout:
+        return None
+
+
+def verify(check, expr, var, mode: str = "auto") -> Tuple[Optional[bool], str]:
+    """Devuelve (ok, método usado): método es "numeric", "symbolic" o "none"."""
+    numeric = None
+    if mode in ("auto", "numeric"):
+        numeric = numeric_check(check, expr, var)
+        if numeric is True or mode == "numeric":
+            return numeric, "numeric" if numeric is not None else "none"
+    ok = symbolic_check(check, expr)
+    if ok is None and numeric is False:
+        return False, "numeric"  # simplify no concluyó: queda lo que dio la numérica
+    return ok, "symbolic" if ok is not None else "none"
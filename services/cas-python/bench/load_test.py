@@ -0,0 +1,381 @@
+"""
+Prueba de carga local: levanta `uvicorn app.main:app` con la configuración elegida y le
+manda una mezcla ponderada de integrales del corpus a tasa fija (lazo abierto).
+
+Lazo abierto: los pedidos salen según un proceso de Poisson a `--rate` por segundo, sin
+esperar a que terminen los anteriores (como usuarios reales), y la latencia se mide desde
+el momento programado. Así una cola que crece se ve en los percentiles en lugar de frenar
+al generador.
+
+Por cada tasa reporta: throughput, p50/p95/p99, tasas de error, timeout y rechazo
+(503/429), y por proceso (uvicorn y workers del pool) CPU usada y RSS máximo.
+
+Uso (desde services/cas-python):
+    python bench/load_test.py --workers 1 --rate 2 --rate 5 --duration 30 --out bench/load-1w.json
+    python bench/load_test.py --workers 2 --env CALC2_POOL_SIZE=1 --rate 5 --compare bench/load-1w.json
+    python bench/load_test.py --mix by_parts=3 --mix substitution=1 --env CALC2_CACHE_SIZE=0
+
+Con la misma --seed, dos corridas mandan exactamente la misma secuencia de pedidos.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Asegurar que Python encuentre el paquete 'bench' (y 'app', en la misma carpeta)
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from bench.run_bench import CORPUS_PATH, _percentile, load_corpus
+
+LOAD_FORMAT = 1
+SAMPLE_INTERVAL = 0.5  # segundos entre muestras de CPU/RSS
+_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_MB = (os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096) / (1024 * 1024)
+
+
+def parse_weights(specs: Sequence[str]) -> Dict[str, float]:
+    """["by_parts=3", "substitution"] -> {"by_parts": 3.0, "substitution": 1.0}"""
+    weights = {}
+    for spec in specs:
+        name, _, weight = spec.partition("=")
+        weights[name.strip()] = float(weight) if weight else 1.0
+    return weights
+
+
+def build_mix(corpus: dict, weights: Optional[Dict[str, float]] = None) -> List[Tuple[str, float]]:
+    """(entrada, peso) por integral: el peso de cada grupo se reparte entre sus integrales."""
+    mix = []
+    for group, texts in corpus["groups"].items():
+        weight = 1.0 if not weights else weights.get(group, 0.0)
+        if weight > 0 and texts:
+            mix.extend((text, weight / len(texts)) for text in texts)
+    if not mix:
+        raise ValueError("la mezcla quedó vacía (¿grupos mal escritos en --mix?)")
+    return mix
+
+
+def schedule(mix: List[Tuple[str, float]], rate: float, duration: float, seed: int) -> List[Tuple[float, str]]:
+    """Llegadas de Poisson: (segundos desde el inicio, entrada), reproducibles con `seed`."""
+    rng = random.Random(f"{seed}:{rate}")
+    texts, weights = zip(*mix)
+    arrivals, t = [], rng.expovariate(rate)
+    while t < duration:
+        arrivals.append((t, rng.choices(texts, weights)[0]))
+        t += rng.expovariate(rate)
+    return arrivals
+
+
+def summarize(samples: List[dict], duration: float) -> dict:
+    """Resumen de una tasa: throughput, percentiles (solo respuestas 200) y tasas por resultado."""
+    n = len(samples)
+    outcomes: Dict[str, int] = {}
+    for s in samples:
+        outcomes[s["outcome"]] = outcomes.get(s["outcome"], 0) + 1
+    latencies = [s["ms"] for s in samples if s["outcome"] == "ok"]
+    summary = {
+        "sent": n,
+        "throughput_rps": round(outcomes.get("ok", 0) / duration, 3) if duration else 0.0,
+        "outcomes": outcomes,
+        **{f"{k}_rate": round(outcomes.get(k, 0) / n, 4) if n else 0.0 for k in ("error", "timeout", "shed")},
+    }
+    if latencies:
+        summary["latency_ms"] = {
+            "p50": round(_percentile(latencies, 50), 1),
+            "p95": round(_percentile(latencies, 95), 1),
+            "p99": round(_percentile(latencies, 99), 1),
+            "max": round(max(latencies), 1),
+        }
+    return summary
+
+
+def _outcome(status: int) -> str:
+    if status == 200:
+        return "ok"
+    if status in (503, 429):
+        return "shed"
+    if status == 504:
+        return "timeout"  # el servidor cortó el cálculo (CALC2_SOLVE_TIMEOUT)
+    return "error"
+
+
+# ---------- procesos: CPU y RSS desde /proc (solo Linux) ----------
+
+def _children(pid: int) -> List[int]:
+    kids = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                kids.extend(int(k) for k in f.read().split())
+    except OSError:
+        pass
+    return kids
+
+
+def _tree(pid: int) -> List[Tuple[int, int]]:
+    """(pid, profundidad) del proceso y todos sus descendientes."""
+    found, pending = [], [(pid, 0)]
+    while pending:
+        current, depth = pending.pop()
+        found.append((current, depth))
+        pending.extend((child, depth + 1) for child in _children(current))
+    return found
+
+
+def _proc_sample(pid: int) -> Optional[Tuple[float, float]]:
+    """(segundos de CPU, RSS en MB) de un proceso; None si ya no existe."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+        with open(f"/proc/{pid}/statm") as f:
+            rss_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    fields = stat[stat.rindex(")") + 2:].split()  # lo que sigue a "(comm)"
+    cpu_s = (int(fields[11]) + int(fields[12])) / _TICKS  # utime + stime
+    return cpu_s, rss_pages * _PAGE_MB
+
+
+class ProcessSampler:
+    """
+    Muestrea periódicamente CPU y RSS de un proceso y todos sus descendientes. El rol
+    sale de la profundidad en el árbol: con un worker, uvicorn corre la app en el proceso
+    raíz; con varios, la raíz solo supervisa y la app corre un nivel más abajo.
+    """
+
+    def __init__(self, root_pid: int, workers: int = 1):
+        self.root_pid = root_pid
+        self.roles = ("uvicorn", "pool") if workers <= 1 else ("supervisor", "uvicorn", "pool")
+        self.first: Dict[int, float] = {}
+        self.last: Dict[int, Tuple[int, float]] = {}
+        self.rss_max: Dict[int, float] = {}
+
+    def sample(self) -> None:
+        for pid, depth in _tree(self.root_pid):
+            info = _proc_sample(pid)
+            if info is None:
+                continue
+            cpu_s, rss = info
+            self.first.setdefault(pid, cpu_s)
+            self.last[pid] = (depth, cpu_s)
+            self.rss_max[pid] = max(self.rss_max.get(pid, 0.0), rss)
+
+    def report(self, elapsed: float) -> List[dict]:
+        rows = []
+        for pid, (depth, cpu_s) in sorted(self.last.items(), key=lambda item: (item[1][0], item[0])):
+            used = cpu_s - self.first[pid]
+            rows.append({
+                "pid": pid,
+                "role": self.roles[min(depth, len(self.roles) - 1)],
+                "cpu_s": round(used, 2),
+                "cpu_pct": round(100 * used / elapsed, 1) if elapsed else 0.0,
+                "rss_max_mb": round(self.rss_max[pid], 1),
+            })
+        return rows
+
+
+# ---------- servidor ----------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, env: Dict[str, str], port: int, ready_timeout: float = 120) -> subprocess.Popen:
+    import httpx
+
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=PROJECT_ROOT, env={**os.environ, **env})
+    deadline = time.monotonic() + ready_timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn terminó al arrancar (código {proc.returncode})")
+        try:
+            # con varios workers, cada /ready lo atiende uno cualquiera: se piden varios seguidos
+            if all(httpx.get(f"http://127.0.0.1:{port}/ready", timeout=2).status_code == 200
+                   for _ in range(2 * workers)):
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    stop_server(proc)
+    raise RuntimeError("el servidor no quedó listo (/ready) a tiempo")
+
+
+def stop_server(proc: subprocess.Popen) -> None:
+    if proc.poll() is None:
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+# ---------- carga ----------
+
+async def _fire(client, base_url: str, at: float, started: float, text: str, timeout: float, samples: List[dict]):
+    await asyncio.sleep(max(0.0, started + at - time.perf_counter()))
+    try:
+        r = await client.post(f"{base_url}/solve", json={"type": "integral", "input": text}, timeout=timeout)
+        outcome = _outcome(r.status_code)
+        status = r.status_code
+    except Exception as e:  # httpx.TimeoutException y errores de conexión
+        outcome = "timeout" if "Timeout" in type(e).__name__ else "error"
+        status = None
+    # desde el instante programado: la espera en cola del lado del cliente también cuenta
+    samples.append({"input": text, "status": status, "outcome": outcome,
+                    "ms": (time.perf_counter() - started - at) * 1000})
+
+
+async def run_rate(base_url: str, arrivals: List[Tuple[float, str]], timeout: float,
+                   sampler: Optional[ProcessSampler] = None) -> Tuple[List[dict], float]:
+    import httpx
+
+    samples: List[dict] = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+    async with httpx.AsyncClient(limits=limits) as client:
+        started = time.perf_counter()
+        tasks = [asyncio.ensure_future(_fire(client, base_url, at, started, text, timeout, samples))
+                 for at, text in arrivals]
+        pending = set(tasks)
+        while pending:
+            _, pending = await asyncio.wait(pending, timeout=SAMPLE_INTERVAL)
+            if sampler is not None:
+                sampler.sample()
+        elapsed = time.perf_counter() - started
+    return samples, elapsed
+
+
+def load_test(workers: int, rates: Sequence[float], duration: float, mix: List[Tuple[str, float]],
+              env: Dict[str, str], seed: int = 0, timeout: float = 30.0, progress=None) -> dict:
+    port = _free_port()
+    env = {"CALC2_STORE_PATH": "", **env}  # un almacén persistente mezclaría corridas
+    proc = start_server(workers, env, port)
+    results = []
+    try:
+        for rate in rates:
+            arrivals = schedule(mix, rate, duration, seed)
+            sampler = ProcessSampler(proc.pid, workers)
+            sampler.sample()
+            samples, elapsed = asyncio.run(run_rate(f"http://127.0.0.1:{port}", arrivals, timeout, sampler))
+            entry = {"rate": rate, **summarize(samples, elapsed), "elapsed_s": round(elapsed, 2),
+                     "processes": sampler.report(elapsed)}
+            results.append(entry)
+            if progress:
+                progress(entry)
+    finally:
+        stop_server(proc)
+
+    import sympy
+
+    return {
+        "format": LOAD_FORMAT,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "workers": workers,
+            "env": env,
+            "exec_mode": env.get("CALC2_EXEC_MODE", os.getenv("CALC2_EXEC_MODE", "pool")),
+            "duration_s": duration,
+            "seed": seed,
+            "timeout_s": timeout,
+            "mix_size": len(mix),
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "sympy": sympy.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "rates": results,
+    }
+
+
+def compare_runs(current: dict, baseline: dict) -> List[dict]:
+    """Diferencias por tasa (las que están en las dos corridas): throughput, p95, p99 y errores."""
+    base_by_rate = {entry["rate"]: entry for entry in baseline["rates"]}
+    rows = []
+    for entry in current["rates"]:
+        base = base_by_rate.get(entry["rate"])
+        if base is None:
+            continue
+        row = {"rate": entry["rate"]}
+        for key in ("throughput_rps", "error_rate", "timeout_rate", "shed_rate"):
+            row[key] = (base.get(key), entry.get(key))
+        for q in ("p95", "p99"):
+            row[q] = (base.get("latency_ms", {}).get(q), entry.get("latency_ms", {}).get(q))
+        rows.append(row)
+    return rows
+
+
+def _print_report(results: dict, comparison: Optional[List[dict]]) -> None:
+    config = results["config"]
+    print(f"\nworkers={config['workers']} · modo={config['exec_mode']} · {config['duration_s']} s por tasa"
+          f" · seed={config['seed']} · env={config['env']}")
+    print(f"{'tasa':>6}{'env.':>6}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'error':>8}{'timeout':>9}{'shed':>7}")
+    for e in results["rates"]:
+        lat = e.get("latency_ms", {})
+        print(f"{e['rate']:>6g}{e['sent']:>6}{e['throughput_rps']:>8.2f}{lat.get('p50', '-'):>9}"
+              f"{lat.get('p95', '-'):>9}{lat.get('p99', '-'):>9}{e['error_rate']:>8.1%}"
+              f"{e['timeout_rate']:>9.1%}{e['shed_rate']:>7.1%}")
+        for p in e["processes"]:
+            print(f"{'':>8}{p['role']:<16} pid {p['pid']:<8} CPU {p['cpu_s']:>7.2f} s ({p['cpu_pct']:>5.1f}%)"
+                  f"  RSS máx {p['rss_max_mb']:>7.1f} MB")
+    if comparison:
+        print("\ncomparación (baseline -> actual):")
+        for row in comparison:
+            cells = "  ".join(f"{k} {a} -> {b}" for k, (a, b) in row.items() if k != "rate")
+            print(f"  tasa {row['rate']:g}: {cells}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga local de POST /solve (lazo abierto).")
+    parser.add_argument("--workers", type=int, default=1, help="workers de uvicorn")
+    parser.add_argument("--mode", choices=("pool", "inline"), help="CALC2_EXEC_MODE")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE para el servidor (se puede repetir)")
+    parser.add_argument("--rate", type=float, action="append", help="pedidos por segundo (se puede repetir)")
+    parser.add_argument("--duration", type=float, default=20.0, help="segundos de carga por tasa")
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--mix", action="append", default=[], help="grupo=peso (por defecto todos los grupos iguales)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="timeout del cliente por pedido (s)")
+    parser.add_argument("--out", help="guardar los resultados (JSON) en este archivo")
+    parser.add_argument("--compare", help="resultados de otra corrida (JSON) para comparar")
+    args = parser.parse_args(argv)
+
+    env = dict(item.split("=", 1) for item in args.env)
+    if args.mode:
+        env["CALC2_EXEC_MODE"] = args.mode
+    mix = build_mix(load_corpus(args.corpus), parse_weights(args.mix))
+
+    def progress(entry):
+        print(f"tasa {entry['rate']:g}/s: {entry['sent']} pedidos, {entry['throughput_rps']:.2f} ok/s", flush=True)
+
+    results = load_test(args.workers, args.rate or [2.0], args.duration, mix, env, args.seed, args.timeout, progress)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+    comparison = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            comparison = compare_runs(results, json.load(f))
+    _print_report(results, comparison)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
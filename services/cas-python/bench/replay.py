@@ -0,0 +1,136 @@
+"""
+Reproduce un registro de /solve (CALC2_CAPTURE_PATH, ver app/capture.py).
+
+    python bench/replay.py warm capture.log                 # precalentar el almacén persistente
+    python bench/replay.py warm capture.log --url https://...   # o un servidor en marcha
+    python bench/replay.py corpus capture.log --out bench/corpus-real.json --top 300
+    python bench/replay.py compare capture.log --out build-b.json --baseline build-a.json
+
+- warm: resuelve cada entrada distinta (las más frecuentes primero) con solve_integral.
+  En el mismo proceso solo sirve con CALC2_STORE_PATH (el almacén lo comparten los
+  workers y sobrevive a reinicios); con --url se manda POST /solve a ese servidor.
+- corpus: arma un corpus con el formato de bench/corpus.json a partir de lo que
+  realmente se pidió: una entrada por forma canónica (la escritura más frecuente),
+  agrupadas por el tier que las resolvió. Sirve para run_bench.py --corpus.
+- compare: corre run_bench sobre ese corpus (en este build) y, con --baseline, compara
+  contra los resultados guardados de otro build.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Asegurar que Python encuentre los paquetes 'app' y 'bench'
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.capture import read_capture
+
+
+def distinct_inputs(entries: List[dict], only_ok: bool = True) -> List[Tuple[Tuple[str, str, int], int]]:
+    """((entrada, verify, precision), veces) de cada pedido distinto, de más a menos frecuente."""
+    counts = Counter(
+        (e["input"], e.get("verify", "auto"), e.get("precision", 15))
+        for e in entries
+        if "input" in e and (not only_ok or e.get("status") == 200)
+    )
+    return counts.most_common()
+
+
+def warm(entries: List[dict], url: Optional[str] = None, top: Optional[int] = None, progress=None) -> Dict[str, int]:
+    inputs = distinct_inputs(entries)[:top]
+    done = {"ok": 0, "error": 0}
+    if url:
+        import httpx
+
+        client = httpx.Client(base_url=url, timeout=120)
+    else:
+        from app.solver import solve_integral
+    for (text, verify, precision), _ in inputs:
+        try:
+            if url:
+                client.post("/solve", json={"type": "integral", "input": text, "verify": verify,
+                                            "precision": precision}).raise_for_status()
+            else:
+                solve_integral(text, verify, precision)
+            done["ok"] += 1
+        except Exception:
+            done["error"] += 1
+        if progress:
+            progress(text)
+    return done
+
+
+def build_corpus(entries: List[dict], top: Optional[int] = None, version: Optional[int] = None) -> dict:
+    """Corpus (formato de bench/corpus.json) con una entrada por forma canónica."""
+    from app.solver import parse_multiple, prepare_problem
+
+    tier_of = {e["input"]: e["tier"] for e in entries if e.get("status") == 200 and e.get("tier")}
+    by_key: Dict[str, Counter] = {}
+    tiers: Dict[str, Counter] = {}
+    for (text, _, _), count in distinct_inputs(entries):
+        try:
+            key = (parse_multiple(text) or prepare_problem(text)).key
+        except Exception:
+            continue
+        by_key.setdefault(key, Counter())[text] += count
+        tiers.setdefault(key, Counter())[tier_of.get(text, "unknown")] += count
+
+    ranked = sorted(by_key.items(), key=lambda item: -sum(item[1].values()))[:top]
+    groups: Dict[str, List[str]] = {}
+    for key, spellings in ranked:
+        groups.setdefault(tiers[key].most_common(1)[0][0], []).append(spellings.most_common(1)[0][0])
+    return {"version": version if version is not None else int(time.time()),
+            "description": "Corpus armado desde un registro de /solve (bench/replay.py).", "groups": groups}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reproducir un registro de /solve.")
+    parser.add_argument("mode", choices=("warm", "corpus", "compare"))
+    parser.add_argument("log", help="archivo de CALC2_CAPTURE_PATH (incluye sus rotaciones .1, .2, ...)")
+    parser.add_argument("--top", type=int, help="solo las N entradas más frecuentes")
+    parser.add_argument("--url", help="warm: servidor al que mandar los pedidos")
+    parser.add_argument("--out", help="corpus/compare: archivo de salida (JSON)")
+    parser.add_argument("--baseline", help="compare: resultados de otro build")
+    parser.add_argument("--e2e", action="store_true", help="compare: medir también POST /solve vía ASGI")
+    args = parser.parse_args(argv)
+
+    entries = read_capture(args.log)
+    if args.mode == "warm":
+        if not args.url and not os.getenv("CALC2_STORE_PATH"):
+            print("aviso: sin --url ni CALC2_STORE_PATH lo calentado se pierde al terminar", file=sys.stderr)
+        print(warm(entries, args.url, args.top))
+        return 0
+
+    corpus = build_corpus(entries, args.top)
+    if args.mode == "corpus":
+        text = json.dumps(corpus, ensure_ascii=False, indent=2) + "\n"
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                f.write(text)
+        else:
+            sys.stdout.write(text)
+        return 0
+
+    from bench.run_bench import _print_report, compare_results, run
+
+    results = run(corpus, e2e=args.e2e)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+    comparison = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            comparison = compare_results(results, json.load(f))
+    _print_report(results, comparison)
+    return 1 if comparison and comparison["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
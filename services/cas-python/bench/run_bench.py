@@ -0,0 +1,297 @@
+"""
+Benchmark reproducible sobre un corpus versionado de integrales de Cálculo II (bench/corpus.json).
+
+Por cada integral mide:
+- las fases del cálculo dentro del proceso (parse, integrate, diff, verify, plot, latex),
+  sin cachés: se vacía la caché de SymPy antes de cada repetición;
+- la latencia de punta a punta de POST /solve a través de la app ASGI (sin red), en frío
+  (caché de resultados vacía) y en caliente (la misma entrada otra vez).
+
+Uso (desde services/cas-python):
+    python bench/run_bench.py --out bench/results.json
+    python bench/run_bench.py --group by_parts --repeat 3 --no-e2e
+    python bench/run_bench.py --out bench/results.json --compare bench/baseline.json
+
+Con --compare el proceso termina con código 1 si hay regresiones: una integral (o la
+mediana de un grupo) que tarda más de --threshold veces lo del baseline y al menos
+--min-delta ms más, o una integral que deja de resolverse/verificarse.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Dict, List, Optional
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'bench')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+RESULTS_FORMAT = 1
+CORPUS_PATH = os.path.join(CURRENT_DIR, "corpus.json")
+
+# Métricas comparadas contra el baseline (por integral y por mediana de grupo)
+COMPARED_METRICS = ("solve_ms", "e2e_cold_ms")
+
+
+def load_corpus(path: str = CORPUS_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Percentil por rango más cercano (q en 0..100)."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(_percentile(values, 50), 3),
+        "p95": round(_percentile(values, 95), 3),
+        "total": round(sum(values), 3),
+    }
+
+
+def bench_phases(text: str, repeat: int) -> dict:
+    """Fases del cálculo en este proceso, sin cachés (mediana de `repeat` corridas)."""
+    from sympy.core.cache import clear_cache
+
+    from app.solver import compute_solution, prepare_problem
+
+    runs: List[Dict[str, float]] = []
+    solution = None
+    for _ in range(repeat):
+        clear_cache()
+        t0 = perf_counter()
+        problem = prepare_problem(text)
+        t1 = perf_counter()
+        solution = compute_solution(problem.cexpr, problem.cvar, problem.verify)
+        t2 = perf_counter()
+        solution.for_var(problem.var)
+        t3 = perf_counter()
+        runs.append({"parse": (t1 - t0) * 1000, **solution.phases, "latex": (t3 - t2) * 1000})
+
+    phases = {name: round(statistics.median(r[name] for r in runs), 3) for name in runs[0]}
+    return {
+        "tier": solution.tier,
+        "ok": solution.ok,
+        "verified_by": solution.verified_by,
+        "phases": phases,
+        "solve_ms": round(sum(phases.values()), 3),
+    }
+
+
+def bench_e2e(client, text: str, repeat: int) -> dict:
+    """Latencia de POST /solve vía ASGI: en frío (caché vacía) y en caliente."""
+    from sympy.core.cache import clear_cache
+
+    from app.solver import RESULT_CACHE
+
+    cold, warm, status = [], [], None
+    for _ in range(repeat):
+        RESULT_CACHE.clear()
+        clear_cache()  # en modo "pool" la caché de SymPy de los workers sigue caliente
+        for bucket in (cold, warm):
+            t0 = perf_counter()
+            r = client.post("/solve", json={"type": "integral", "input": text})
+            bucket.append((perf_counter() - t0) * 1000)
+            status = r.status_code
+    return {
+        "status": status,
+        "e2e_cold_ms": round(statistics.median(cold), 3),
+        "e2e_warm_ms": round(statistics.median(warm), 3),
+    }
+
+
+def run(corpus: dict, groups: Optional[List[str]] = None, repeat: int = 1, e2e: bool = True,
+        progress=None) -> dict:
+    import numpy
+    import sympy
+
+    client = None
+    if e2e:
+        # un almacén persistente haría que las corridas en frío no lo sean
+        os.environ.pop("CALC2_STORE_PATH", None)
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        client = TestClient(app)
+        client.__enter__()  # corre el lifespan (arranca el pool si CALC2_EXEC_MODE=pool)
+
+    items = []
+    try:
+        for group, texts in corpus["groups"].items():
+            if groups and group not in groups:
+                continue
+            for text in texts:
+                item = {"group": group, "input": text}
+                try:
+                    item.update(bench_phases(text, repeat))
+                except Exception as e:
+                    item["error"] = f"{type(e).__name__}: {e}"
+                if client is not None:
+                    item.update(bench_e2e(client, text, repeat))
+                items.append(item)
+                if progress:
+                    progress(item)
+    finally:
+        if client is not None:
+            client.__exit__(None, None, None)
+
+    by_group: Dict[str, dict] = {}
+    for group in dict.fromkeys(item["group"] for item in items):
+        members = [item for item in items if item["group"] == group]
+        entry = {"count": len(members)}
+        for metric in COMPARED_METRICS + ("e2e_warm_ms",):
+            values = [item[metric] for item in members if metric in item]
+            if values:
+                entry[metric] = _summary(values)
+        by_group[group] = entry
+
+    return {
+        "format": RESULTS_FORMAT,
+        "corpus_version": corpus["version"],
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "sympy": sympy.__version__,
+            "numpy": numpy.__version__,
+            "platform": platform.platform(),
+            "exec_mode": os.getenv("CALC2_EXEC_MODE", "pool") if e2e else None,
+        },
+        "repeat": repeat,
+        "items": items,
+        "groups": by_group,
+    }
+
+
+def _is_slower(current: float, base: float, threshold: float, min_delta_ms: float) -> bool:
+    return current > base * threshold and current - base >= min_delta_ms
+
+
+def compare_results(current: dict, baseline: dict, threshold: float = 1.25,
+                    min_delta_ms: float = 5.0) -> dict:
+    """
+    Compara dos resultados de run(). Devuelve {"regressions", "changes", "warnings"}:
+    - regressions: más lento que el baseline (por integral o mediana de grupo) o una
+      integral que antes salía bien y ahora falla / no verifica;
+    - changes: cambios informativos (otro tier, integrales nuevas o que ya no están).
+    """
+    regressions, changes, warnings = [], [], []
+    if current.get("corpus_version") != baseline.get("corpus_version"):
+        warnings.append(
+            f"corpus distinto (baseline v{baseline.get('corpus_version')}, "
+            f"actual v{current.get('corpus_version')}): solo se comparan las entradas comunes"
+        )
+    for field in ("sympy", "python", "exec_mode"):
+        before, after = baseline["environment"].get(field), current["environment"].get(field)
+        if before != after:
+            warnings.append(f"{field}: {before} -> {after}")
+
+    base_items = {(i["group"], i["input"]): i for i in baseline["items"]}
+    seen = set()
+    for item in current["items"]:
+        key = (item["group"], item["input"])
+        base = base_items.get(key)
+        if base is None:
+            changes.append({"input": item["input"], "group": item["group"], "kind": "new"})
+            continue
+        seen.add(key)
+        if base.get("ok") is True and (item.get("ok") is not True or "error" in item):
+            regressions.append({"input": item["input"], "group": item["group"], "kind": "correctness",
+                                "baseline": base.get("ok"), "current": item.get("error", item.get("ok"))})
+        for metric in COMPARED_METRICS:
+            if metric in item and metric in base and _is_slower(item[metric], base[metric], threshold, min_delta_ms):
+                regressions.append({"input": item["input"], "group": item["group"], "kind": metric,
+                                    "baseline": base[metric], "current": item[metric]})
+        if base.get("tier") and item.get("tier") and base["tier"] != item["tier"]:
+            changes.append({"input": item["input"], "group": item["group"], "kind": "tier",
+                            "baseline": base["tier"], "current": item["tier"]})
+    for key in base_items.keys() - seen:
+        if not current["items"] or key[0] in current["groups"]:
+            changes.append({"input": key[1], "group": key[0], "kind": "removed"})
+
+    for group, entry in current["groups"].items():
+        base = baseline["groups"].get(group)
+        if base is None:
+            continue
+        for metric in COMPARED_METRICS:
+            if metric in entry and metric in base:
+                before, after = base[metric]["p50"], entry[metric]["p50"]
+                if _is_slower(after, before, threshold, min_delta_ms):
+                    regressions.append({"group": group, "kind": f"{metric}.p50",
+                                        "baseline": before, "current": after})
+
+    return {"regressions": regressions, "changes": changes, "warnings": warnings}
+
+
+def _print_report(results: dict, comparison: Optional[dict]) -> None:
+    print(f"\ncorpus v{results['corpus_version']} · {len(results['items'])} integrales · "
+          f"repeat={results['repeat']}")
+    print(f"{'grupo':<20}{'n':>5}{'solve p50':>12}{'solve p95':>12}{'e2e p50':>12}{'e2e p95':>12}")
+    for group, entry in results["groups"].items():
+        solve, e2e = entry.get("solve_ms", {}), entry.get("e2e_cold_ms", {})
+        print(f"{group:<20}{entry['count']:>5}{solve.get('p50', '-'):>12}{solve.get('p95', '-'):>12}"
+              f"{e2e.get('p50', '-'):>12}{e2e.get('p95', '-'):>12}")
+
+    failures = [i for i in results["items"] if "error" in i or i.get("ok") is not True]
+    for item in failures:
+        print(f"  ! {item['group']}: {item['input']} -> {item.get('error', item.get('ok'))}")
+
+    if comparison is None:
+        return
+    for text in comparison["warnings"]:
+        print(f"aviso: {text}")
+    for change in comparison["changes"]:
+        detail = f" ({change['baseline']} -> {change['current']})" if "current" in change else ""
+        print(f"  ~ {change['kind']}: {change['group']}: {change['input']}{detail}")
+    for reg in comparison["regressions"]:
+        where = f"{reg['group']}: {reg['input']}" if "input" in reg else f"{reg['group']} (mediana)"
+        print(f"  REGRESIÓN {reg['kind']}: {where}: {reg['baseline']} -> {reg['current']}")
+    print(f"{len(comparison['regressions'])} regresiones")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del solver sobre el corpus de Cálculo II.")
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--group", action="append", help="solo estos grupos (se puede repetir)")
+    parser.add_argument("--repeat", type=int, default=1, help="corridas por integral (se toma la mediana)")
+    parser.add_argument("--no-e2e", action="store_true", help="no medir POST /solve vía ASGI")
+    parser.add_argument("--out", help="guardar los resultados (JSON) en este archivo")
+    parser.add_argument("--compare", help="resultados de referencia (JSON) contra los que comparar")
+    parser.add_argument("--threshold", type=float, default=1.25, help="factor de tiempo que cuenta como regresión")
+    parser.add_argument("--min-delta", type=float, default=5.0, help="diferencia mínima (ms) para marcar regresión")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    def progress(item):
+        if not args.quiet:
+            print(f"{item['group']:<20}{item.get('solve_ms', '-'):>10}  {item['input']}", flush=True)
+
+    started = time.time()
+    results = run(load_corpus(args.corpus), args.group, max(1, args.repeat), not args.no_e2e, progress)
+    results["wall_s"] = round(time.time() - started, 1)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+    comparison = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            comparison = compare_results(results, json.load(f), args.threshold, args.min_delta)
+    _print_report(results, comparison)
+    return 1 if comparison and comparison["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import asyncio
+import json
+import os
+import sys
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import engine, main
+from app.admission import AdmissionController, Overloaded, RateLimiter, parse_rate
+from app.main import app
+
+client = TestClient(app)
+
+def test_bounded_queue_deadline_and_handoff():
+    async def scenario():
+        gate = AdmissionController(limit=1, queue_size=1, queue_timeout=0.2)
+        await gate.acquire()
+        waiter = asyncio.ensure_future(gate.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as full:
+            await gate.acquire()
+        assert full.value.status == 503 and full.value.reason == "queue_full"
+
+        gate.release()  # el lugar pasa directo al que esperaba
+        await waiter
+        with pytest.raises(Overloaded) as late:
+            await gate.acquire()  # espera más que queue_timeout
+        assert late.value.reason == "deadline" and late.value.retry_after >= 1
+        gate.release()
+        return gate.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["active"] == 0 and stats["admitted"] == 2
+    assert stats["shed_queue_full"] == 1 and stats["shed_deadline"] == 1
+
+def test_overload_is_refused_fast_but_cache_hits_pass(monkeypatch):
+    assert client.post("/solve", json={"type": "integral", "input": "x^2 dx"}).status_code == 200
+
+    full = AdmissionController(limit=1, queue_size=0)
+    full._active = 1  # todos los lugares ocupados
+    monkeypatch.setattr(engine, "ADMISSION", full)
+    r = client.post("/solve", json={"type": "integral", "input": "7*x^11 + 5*x^3 dx"})
+    assert r.status_code == 503 and int(r.headers["retry-after"]) >= 1 and "error" in r.json()
+    assert client.post("/solve", json={"type": "integral", "input": "x^2 dx"}).status_code == 200
+    assert 'calc2_shed_requests_total{reason="queue_full"}' in client.get("/metrics").text
+
+def test_per_client_token_bucket(monkeypatch):
+    assert parse_rate("") is None and parse_rate("2/10") == (2.0, 10.0)
+    monkeypatch.setattr(main, "RATE_LIMITER", RateLimiter(rate=0.01, burst=2))
+    body = {"type": "integral", "input": "x^2 dx"}
+    # lo de la izquierda lo inventa el cliente: cuenta el salto que agregó el proxy
+    alice = [{"X-Forwarded-For": f"10.0.0.{n}, 172.16.0.1"} for n in range(3)]
+
+    assert [client.post("/solve", json=body, headers=alice[n]).status_code for n in range(2)] == [200, 200]
+    r = client.post("/solve", json=body, headers=alice[2])
+    assert r.status_code == 429 and int(r.headers["retry-after"]) >= 1
+    assert client.post("/solve", json=body, headers={"X-Forwarded-For": "10.0.0.2"}).status_code == 200
+
+def test_batch_and_jobs_are_admitted_too(monkeypatch):
+    full = AdmissionController(limit=1, queue_size=0)
+    full._active = 1
+    monkeypatch.setattr(engine, "ADMISSION", full)
+    r = client.post("/solve/batch", json={"items": [{"type": "integral", "input": "3*x^13 + x^5 dx"}]})
+    assert json.loads(r.text)["status"] == 503
+
+    job = client.post("/jobs", json={"type": "integral", "input": "4*x^17 + x^3 dx"}).json()
+    job = client.get(job["poll"], params={"wait": 10}).json()
+    assert job["status"] == "failed" and job["http_status"] == 503
+    assert full.stats()["shed_queue_full"] == 2
@@ -0,0 +1,41 @@
+import os
+import sys
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from fastapi.testclient import TestClient
+
+from app.assets import negotiate
+from app.main import STATIC, app
+
+client = TestClient(app)
+
+def test_page_is_precompressed_and_revalidated():
+    r = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip" and r.headers["cache-control"] == "no-cache"
+    assert "Xdx - integrales" in r.text
+    again = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": r.headers["etag"]})
+    assert again.status_code == 304 and again.content == b""
+
+    plain = client.get("/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers and plain.headers["etag"] != r.headers["etag"]
+
+def test_fingerprinted_assets_are_immutable():
+    url = f"/static/{STATIC.urls['logo_xdx.png']}"
+    assert url in client.get("/").text
+    r = client.get(url)
+    assert r.status_code == 200 and "immutable" in r.headers["cache-control"]
+    assert client.get("/static/logo_xdx.png").headers["cache-control"] == "no-cache"
+    assert client.get("/static/nada.png").status_code == 404
+
+def test_solve_json_is_compressed_when_accepted():
+    assert negotiate("br;q=0, gzip;q=0.5", ("gzip",)) == "gzip" and negotiate("gzip;q=0", ("gzip",)) == "identity"
+    body = {"type": "integral", "input": "x*cos(x) dx"}
+    packed = client.post("/solve", json=body, headers={"Accept-Encoding": "gzip"})
+    plain = client.post("/solve", json=body, headers={"Accept-Encoding": "identity"})
+    assert packed.headers["content-encoding"] == "gzip" and "content-encoding" not in plain.headers
+    assert packed.json() == plain.json()
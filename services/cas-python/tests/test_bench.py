@@ -0,0 +1,47 @@
+import os
+import sys
+
+# Asegurar que Python encuentre los paquetes 'app' y 'bench' (carpetas hermanas de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from bench.load_test import build_mix, parse_weights, schedule, summarize
+from bench.run_bench import compare_results, load_corpus, run
+
+def test_bench_corpus_is_versioned_and_grouped():
+    corpus = load_corpus()
+    assert isinstance(corpus["version"], int)
+    assert {"substitution", "by_parts", "partial_fractions", "trig_powers", "non_elementary"} <= set(corpus["groups"])
+    assert sum(map(len, corpus["groups"].values())) >= 200
+
+def test_bench_run_and_compare_flags_regressions():
+    corpus = {"version": 1, "groups": {"basic": ["x^2 dx", "cos(x) dx"]}}
+    baseline = run(corpus, e2e=False)
+    assert [item["ok"] for item in baseline["items"]] == [True, True]
+    assert set(baseline["items"][0]["phases"]) == {"parse", "integrate", "diff", "verify", "plot", "latex"}
+
+    assert compare_results(baseline, baseline)["regressions"] == []
+
+    slower = run(corpus, e2e=False)
+    slower["items"][1]["solve_ms"] = baseline["items"][1]["solve_ms"] * 3 + 100
+    slower["items"][0]["ok"] = False
+    kinds = {(r.get("input"), r["kind"]) for r in compare_results(slower, baseline)["regressions"]}
+    assert kinds == {("cos(x) dx", "solve_ms"), ("x^2 dx", "correctness")}
+
+def test_load_schedule_is_reproducible_and_weighted():
+    corpus = {"version": 1, "groups": {"a": ["x dx", "x^2 dx"], "b": ["sin(x) dx"], "c": ["cos(x) dx"]}}
+    mix = build_mix(corpus, parse_weights(["a=3", "b"]))
+    assert {text for text, _ in mix} == {"x dx", "x^2 dx", "sin(x) dx"}
+
+    arrivals = schedule(mix, rate=50, duration=20, seed=7)
+    assert arrivals == schedule(mix, rate=50, duration=20, seed=7)
+    assert 800 < len(arrivals) < 1200 and all(0 <= t < 20 for t, _ in arrivals)
+    share = sum(text != "sin(x) dx" for _, text in arrivals) / len(arrivals)
+    assert 0.7 < share < 0.8  # el grupo "a" pesa 3 de 4
+
+    samples = [{"outcome": "ok", "ms": float(ms)} for ms in range(1, 101)] + [{"outcome": "timeout", "ms": 0.0}]
+    summary = summarize(samples, duration=10)
+    assert summary["throughput_rps"] == 10 and summary["timeout_rate"] == round(1 / 101, 4)
+    assert summary["latency_ms"]["p50"] == 50 and summary["latency_ms"]["p99"] == 100
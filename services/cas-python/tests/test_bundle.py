@@ -0,0 +1,40 @@
+import os
+import sys
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from fastapi.testclient import TestClient
+
+from app.bundle import answer_key, build_bundle, page_examples
+from app import main
+from app.main import app
+
+client = TestClient(app)
+
+def test_answer_key_only_merges_spellings_the_server_reads_alike():
+    assert answer_key("  ∫ x^2   dx ") == answer_key("x^2dx") == answer_key("x^2") == "x^2 dx"
+    assert answer_key("∫_0^1 exp(-x^2) dx") == "∫_0^1 exp(-x^2) dx"
+    assert answer_key("t^2 dt") != answer_key("x^2 dx") and answer_key("2 x dx") != answer_key("2x dx")
+
+def test_bundle_matches_solve():
+    bundle = build_bundle(["∫ x*exp(2*x) dx", "x*exp(2*x)  dx", "∫_0^1 x^2 dx", "x^^ dx"], version=3)
+    assert bundle["format"] == 1 and bundle["version"] == 3
+    assert list(bundle["entries"]) == ["x*exp(2*x) dx", "∫_0^1 x^2 dx"]  # la rota queda para el servidor
+
+    served = client.post("/solve", json={"type": "integral", "input": "x*exp(2*x) dx", "steps": True}).json()
+    hit = bundle["entries"]["x*exp(2*x) dx"]
+    assert {k: v for k, v in hit.items() if k != "plots"} == {k: v for k, v in served.items() if k != "plots"}
+    assert 0 < hit["plots"][0]["n"] <= served["plots"][0]["n"]
+
+    assert "x*exp(2*x) dx" in page_examples()
+
+def test_page_asks_for_the_fingerprinted_bundle_only_if_built():
+    page = client.get("/").text
+    if "answers.json" in main.STATIC.urls:
+        assert f'ANSWERS_URL = "/static/{main.STATIC.urls["answers.json"]}"' in page
+    else:
+        assert "ANSWERS_URL = null" in page
@@ -0,0 +1,54 @@
+import asyncio
+import os
+import sys
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.cache import LRUCache, canonical_key
+from app.singleflight import SingleFlight
+from app.solver import _parse_input, solve_integral
+
+def _key(text):
+    return canonical_key(*_parse_input(text))[0]
+
+def test_equivalent_inputs_share_key():
+    keys = {_key(t) for t in ["x^2 dx", "x**2 dx", "∫ x^2 dx", "t^2 dt", "  x ^ 2   dx"]}
+    assert len(keys) == 1
+
+def test_parameter_named_x_is_not_renamed():
+    assert _key("x*t dt") != _key("x*t dx")
+
+def test_lru_counts_hits_misses_and_evictions():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # desaloja "b" (el menos usado)
+    assert cache.get("b") is None
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 1, "misses": 1, "evictions": 1}
+
+def test_cached_result_uses_callers_variable():
+    solve_integral("x^3 dx")
+    body = solve_integral("u^3 du")
+    assert body["result_latex"] == r"\frac{u^{4}}{4} + C"
+    assert body["problem_latex"] == r"\int u^{3}\,du"
+
+def test_singleflight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "resultado"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", compute) for _ in range(20)))
+
+    assert asyncio.run(main()) == ["resultado"] * 20
+    assert len(calls) == 1
+    assert flight.stats() == {"inflight": 0, "computed": 1, "coalesced": 19}
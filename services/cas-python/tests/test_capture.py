@@ -0,0 +1,59 @@
+import os
+import sys
+
+# Asegurar que Python encuentre los paquetes 'app' y 'bench' (carpetas hermanas de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.capture import CaptureLog, read_capture
+from app.main import app
+from bench.replay import build_corpus
+
+client = TestClient(app)
+
+def test_solve_is_captured_and_replayed_into_a_corpus(tmp_path, monkeypatch):
+    log = CaptureLog(str(tmp_path / "capture.log"))
+    monkeypatch.setattr(main, "CAPTURE", log)
+    for text in ("x^2   dx", "x^2 dx", "t^2 dt", "sin(x) dx", "x^^ dx"):
+        client.post("/solve", json={"type": "integral", "input": text})
+    log.close()
+
+    entries = read_capture(log.path)
+    assert [e["status"] for e in entries] == [200, 200, 200, 200, 400]
+    assert entries[0]["input"] == "x^2 dx" and entries[0]["outcome"] == "ok" and entries[0]["tier"]
+    assert entries[-1]["outcome"] != "ok" and "ms" in entries[-1]
+
+    corpus = build_corpus(entries, version=7)
+    texts = [text for group in corpus["groups"].values() for text in group]
+    assert corpus["version"] == 7 and texts == ["x^2 dx", "sin(x) dx"]  # t^2 dt es la misma integral
+
+def test_stream_and_jobs_are_captured(tmp_path, monkeypatch):
+    log = CaptureLog(str(tmp_path / "capture.log"))
+    monkeypatch.setattr(main, "CAPTURE", log)
+    client.post("/solve/stream", json={"type": "integral", "input": "x*cos(x)  dx"})
+    client.post("/solve/stream", json={"type": "integral", "input": "x^^ dx"})
+    client.post("/jobs", json={"type": "integral", "input": "cos(x) dx"})
+    log.close()
+
+    entries = read_capture(log.path)
+    assert [(e["input"], e["status"], e["outcome"]) for e in entries] == [
+        ("x*cos(x) dx", 200, "ok"), ("x^^ dx", 400, "parse_error"), ("cos(x) dx", 202, "job"),
+    ]
+    assert entries[0]["tier"] and entries[0]["ms"] > 0
+
+def test_capture_rotates_by_size(tmp_path):
+    log = CaptureLog(str(tmp_path / "capture.log"), max_bytes=200, backups=2)
+    for i in range(30):
+        log.record({"input": f"x^{i} dx", "status": 200})
+        if i % 5 == 4:
+            log.close()  # fuerza una escritura por tanda
+    log.close()
+    assert log.rotations >= 2 and not os.path.exists(log.path + ".3")
+    entries = read_capture(log.path)
+    assert entries[-1]["input"] == "x^29 dx" and len(entries) < 30
+    assert [e["input"] for e in entries] == sorted((e["input"] for e in entries), key=lambda t: int(t[2:-3]))
@@ -0,0 +1,47 @@
+import logging
+import os
+import sys
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app import cost, engine
+from app.solver import prepare_problem
+
+def _features(text):
+    p = prepare_problem(text)
+    return cost.features(p.cexpr, p.cvar, p.bounds)
+
+def test_features_and_routing():
+    f = _features("sin(x)^5*cos(x)*exp(x) dx")
+    assert f["trig"] == 2 and f["exp"] == 1 and f["families"] == 2 and f["function_power"] == 5
+    assert _features("(x^3+1)/(x^2-4) dx")["rational_den"] == 2
+    assert _features("sqrt(1-x^2) dx")["radical"] == 1 and _features("∫_0^1 x dx")["definite"] == 1
+
+    assert engine.route(prepare_problem("x^2 dx")).lane == "fast"
+    assert engine.route(prepare_problem("sin(x)^5*cos(x) dx")).lane == "fast"
+    assert engine.route(prepare_problem("∫_0^pi sin(x)^4*cos(x)^2 dx")).lane == "fast"
+    assert engine.route(prepare_problem("x^2*atan(x)*log(x) dx")).lane == "heavy"
+
+def test_calibration_recovers_the_model_from_the_log():
+    true = {"bias": 1.0, "ops": 2.0, "trig": 0.5, "exp": 0.3}
+    texts = ["x dx", "x^2+x dx", "sin(x) dx", "x*sin(x)^2 dx", "sin(x)*cos(x)+x^3 dx",
+             "(x+1)^3*sin(x) dx", "exp(x) dx", "x*exp(2*x) dx", "exp(x)*sin(x) dx", "x^5 + 3*x dx"]
+    rows = [(text, _features(text)) for text in texts]
+    lines = ['INFO:calc2.cost:{"lane": "fast", "actual_ms": %r, "features": %s}'
+             % (cost.predict_ms(f, true), str(f).replace("'", '"')) for _, f in rows]
+    fitted = cost.fit_weights(cost.read_log(lines))
+    for _, f in rows:
+        assert abs(cost.predict_ms(f, fitted) / cost.predict_ms(f, true) - 1) < 0.1
+
+def test_each_computation_logs_predicted_vs_actual(monkeypatch, caplog):
+    monkeypatch.setattr(engine, "EXEC_MODE", "inline")
+    problem = prepare_problem("x^4*cos(x) + 3 dx")
+    with caplog.at_level(logging.INFO, logger="calc2.cost"):
+        engine._compute_blocking(problem)
+    record = cost.read_log([caplog.records[-1].getMessage()])[0]
+    assert record["lane"] == "fast" and record["actual_ms"] > 0 and record["tier"]
+    assert record["features"]["trig"] == 1
@@ -0,0 +1,56 @@
+import os
+import sys
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import pytest
+from fastapi.testclient import TestClient
+from sympy import Rational, Symbol, oo, sqrt, sin
+
+from app import definite
+from app.main import app
+from app.solver import ParseError, prepare_problem, solve_integral
+
+client = TestClient(app)
+x = Symbol("x")
+
+def test_bounds_are_parsed_and_keyed():
+    p = prepare_problem("∫_{0}^{pi/2} sin(x) dx")
+    assert p.bounds is not None and p.bounds[0] == 0
+    assert prepare_problem("∫_0^1 x dx").key != prepare_problem("∫_0^2 x dx").key != prepare_problem("x dx").key
+    assert prepare_problem("∫_0^oo exp(-x) dx").bounds[1] == oo
+
+    with pytest.raises(ParseError) as e:
+        prepare_problem("∫_0^{x} x dx")
+    assert e.value.position == 5
+
+def test_bound_that_mentions_x_keeps_the_variable():
+    # renombrar t -> x mezclaría la variable de integración con el límite
+    p = prepare_problem("∫_0^x t dt")
+    assert p.cvar == Symbol("t") and p.key != prepare_problem("∫_0^y t dt").key
+    r = client.post("/solve", json={"type": "integral", "input": "∫_0^x t dt"})
+    assert r.json()["result_latex"] == r"\frac{x^{2}}{2}"
+
+def test_exact_value_checked_by_quadrature():
+    d = definite.definite_integral(x ** 2, x, 0, 1)
+    assert d.value == Rational(1, 3) and d.tier == "polynomial" and d.ok is True
+
+    data = solve_integral("∫_0^1 exp(-x^2) dx")
+    assert r"\operatorname{erf}" in data["result_latex"] and "0.746824132812" in data["result_latex"]
+
+def test_divergent_integrals_are_reported():
+    assert definite.definite_integral(1 / x ** 2, x, -1, 1).value == oo
+    assert solve_integral("∫_-1^1 1/x dx")["result_latex"].startswith(r"\text{diverge}")
+
+def test_numeric_fallback_after_symbolic_budget(monkeypatch):
+    monkeypatch.setattr(definite, "SYMBOLIC_BUDGET", 0.05)
+    d = definite.definite_integral(sqrt(sin(x)), x, 0, 1, precision=25)
+    assert d.tier == "quadrature" and d.ok is True
+    assert str(d.value).startswith("0.64297763465831521725919")
+
+    r = client.post("/solve", json={"type": "integral", "input": "∫_0^1 x^2 dx", "precision": 1})
+    assert r.status_code == 422
@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app import executor
+from app.executor import Deadline, ProcessPool, SolveTimeout, WorkerError
+from app.solver import _parse_input
+from app.strategies import integrate_tiered
+
+def _square(n):
+    return n * n
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return "done"
+
+def _boom():
+    raise ValueError("mal input")
+
+@pytest.fixture
+def pool():
+    p = ProcessPool(size=1, timeout=5)
+    yield p
+    p.shutdown()
+
+def test_pool_returns_results(pool):
+    assert pool.run_sync(_square, 7) == 49
+
+def test_pool_reraises_worker_errors(pool):
+    with pytest.raises(WorkerError, match="mal input"):
+        pool.run_sync(_boom)
+
+def _integrate_without_budget(text):
+    return integrate_tiered(*_parse_input(text), {"integrate": 0.05})
+
+def test_tier_budget_timeout_is_a_solve_timeout(pool):
+    # no es un error de sintaxis (400): llega como el mismo timeout del pool (504)
+    with pytest.raises(SolveTimeout, match="presupuesto"):
+        pool.run_sync(_integrate_without_budget, "exp(x)*sin(x)^3/(1+x^2)^(1/3) dx")
+    assert pool.stats()["replaced"] == 0
+
+def test_runaway_worker_is_killed_and_replaced(pool):
+    with pytest.raises(SolveTimeout):
+        pool.run_sync(_sleep, 30, timeout=0.3)
+    assert pool.stats()["replaced"] == 1
+    # el reemplazo atiende pedidos normalmente
+    assert pool.run_sync(_square, 3) == 9
+
+def test_deadline_can_be_extended_while_running(pool):
+    deadline = Deadline(0.3)
+    threading.Timer(0.1, deadline.extend, (5,)).start()  # ej: /solve pasado a job
+    assert pool.run_sync(_sleep, 0.6, timeout=deadline) == "done"
+    with pytest.raises(SolveTimeout, match="0.3 s"):
+        pool.run_sync(_sleep, 0.6, timeout=Deadline(0.3))
+    shared = Deadline(0.5)  # dos etapas del mismo pedido: un solo tope entre ambas
+    assert pool.run_sync(_sleep, 0.3, timeout=shared) == "done"
+    with pytest.raises(SolveTimeout):
+        pool.run_sync(_sleep, 0.3, timeout=shared)
+
+def _slow_start():
+    time.sleep(1)
+
+def test_timed_out_request_does_not_wait_for_the_replacement():
+    pool = ProcessPool(size=1, timeout=5, initializer=_slow_start)
+    try:
+        pool.start()
+        t0 = time.monotonic()
+        with pytest.raises(SolveTimeout):
+            pool.run_sync(_sleep, 30, timeout=0.3)
+        assert time.monotonic() - t0 < 0.9  # el reemplazo se calienta en segundo plano
+        assert pool.run_sync(_square, 5) == 25
+    finally:
+        pool.shutdown()
+
+def test_replacement_that_fails_to_start_is_retried(pool, monkeypatch):
+    pool.start()
+    wait_ready = executor._Worker.wait_ready
+    broken = threading.Event()
+    broken.set()
+
+    def flaky(worker):
+        if broken.is_set():
+            raise OSError("no arrancó")
+        wait_ready(worker)
+
+    monkeypatch.setattr(executor, "RESPAWN_DELAY", 0.1)
+    monkeypatch.setattr(executor._Worker, "wait_ready", flaky)
+    with pytest.raises(SolveTimeout):
+        pool.run_sync(_sleep, 30, timeout=0.3)
+    # sin workers: el pedido espera un worker libre con su tope, no para siempre
+    with pytest.raises(SolveTimeout, match="libre"):
+        pool.run_sync(_square, 2, timeout=0.3)
+    broken.clear()
+    assert pool.run_sync(_square, 6) == 36
+
+def _pid():
+    return os.getpid()
+
+def test_workers_are_recycled_between_requests():
+    pool = ProcessPool(size=1, timeout=5, max_tasks=2)
+    try:
+        first = [pool.run_sync(_pid) for _ in range(2)]
+        assert first[0] == first[1] and pool.stats()["recycled"] == 1
+        # el reemplazo entra al pool recién cuando está listo: el pedido lo espera
+        assert pool.run_sync(_pid) != first[0]
+
+        pool.recycle_mb = 1  # cualquier proceso pasa 1 MB: el watchdog lo marca
+        assert pool.check_memory()
+        pool.recycle_mb = 0
+        assert pool.run_sync(_square, 4) == 16 and pool.stats()["recycled"] == 2
+    finally:
+        pool.shutdown()
@@ -1,4 +1,5 @@
 from fastapi.testclient import TestClient
+import json
 import os
 import sys
 
@@ -46,3 +47,85 @@ def test_empty_input_returns_422():
     payload = {"type": "integral", "input": ""}
     r = client.post("/solve", json=payload)
     assert r.status_code == 422
+
+def test_batch_dedupes_and_streams_ndjson():
+    items = [
+        {"type": "integral", "input": "x^2 dx"},
+        {"type": "integral", "input": "t**2 dt"},
+        {"type": "integral", "input": "x^^2 dx"},
+        {"type": "derivative", "input": "x"},
+        {"type": "integral", "input": "sin(x) dx"},
+    ]
+    r = client.post("/solve/batch", json={"items": items})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(l) for l in r.text.splitlines()]
+    by_index = {l["index"]: l for l in lines}
+    assert sorted(by_index) == [0, 1, 2, 3, 4]
+    assert by_index[1]["result_latex"] == r"\frac{t^{3}}{3} + C"
+    assert by_index[2]["status"] == 400 and "error" in by_index[2]
+    assert by_index[3]["status"] == 422
+
+def test_batch_computes_each_canonical_form_once(monkeypatch):
+    from app import batch, engine
+
+    monkeypatch.setattr(batch, "BATCH_RECENT", 2)  # los repetidos del final ya salieron del lote
+    computed = []
+    compute = engine._compute_blocking
+    monkeypatch.setattr(engine, "_compute_blocking", lambda problem, *a: computed.append(problem.key) or compute(problem, *a))
+    spellings = ["x^3*exp(7x) dx", "t**3*exp(7*t) dt", "∫ u^3*exp(7u) du"]
+    others = [f"x^{n}*sin(9x) dx" for n in range(2, 8)]
+    items = [{"type": "integral", "input": text} for text in spellings + others + spellings]
+    lines = [json.loads(l) for l in client.post("/solve/batch", json={"items": items}).text.splitlines()]
+    assert sorted(l["index"] for l in lines) == list(range(len(items)))
+    assert all(l["status"] == 200 for l in lines)
+    assert len(computed) == len(set(computed)) == 1 + len(others)
+
+def test_solve_reports_server_timing_and_metrics():
+    r = client.post("/solve", json={"type": "integral", "input": "x*sin(x) dx"})
+    assert r.status_code == 200
+    assert "parse;dur=" in r.headers["server-timing"]
+    assert "total;dur=" in r.headers["server-timing"]
+
+    client.post("/solve", json={"type": "integral", "input": "x^^2 dx"})
+    m = client.get("/metrics")
+    assert m.status_code == 200
+    assert 'calc2_phase_duration_milliseconds_bucket{phase="parse",le="+Inf"}' in m.text
+    assert 'calc2_solve_outcomes_total{outcome="parse_error"}' in m.text
+
+def test_requested_formats_are_rendered_once_and_typed(monkeypatch):
+    from app import solver
+    from app.schemas import SolveResponse
+
+    body = {"type": "integral", "input": "t*cos(t) dt", "formats": ["text", "srepr", "mathml"]}
+    data = client.post("/solve", json=body).json()
+    SolveResponse.model_validate(data)
+    assert "result_latex" not in data and data["tier"]
+    assert data["formats"]["text"] == {"integrand": "t*cos(t)", "variable": "t", "result": "t*sin(t) + cos(t)"}
+    assert data["formats"]["srepr"]["variable"] == "t" and "<mi>t</mi>" in data["formats"]["mathml"]["result"]
+
+    calls = []
+    monkeypatch.setitem(solver._PRINTERS, "text", lambda e: calls.append(e) or str(e))
+    again = client.post("/solve", json={**body, "formats": ["latex", "text"]}).json()
+    assert again["formats"]["text"] == data["formats"]["text"] and calls == []  # memorizado con la solución
+    assert again["result_latex"] and SolveResponse.model_validate(again).checks
+
+    r = client.post("/solve/batch", json={"items": [{**body, "formats": ["text"]}, {"type": "integral", "input": "x*cos(x) dx"}]})
+    lines = {l["index"]: l for l in map(json.loads, r.text.splitlines())}
+    assert lines[0]["formats"]["text"]["result"] == "t*sin(t) + cos(t)" and "formats" not in lines[1]
+    assert client.post("/solve", json={**body, "formats": ["png"]}).status_code == 422
+
+def test_new_formats_are_written_to_the_store(monkeypatch, tmp_path):
+    from app import engine, solver
+    from app.cache import canonical_key
+    from app.store import SolutionStore
+
+    store = SolutionStore(tmp_path / "s.sqlite3")
+    monkeypatch.setattr(solver, "SOLUTION_STORE", store)
+    monkeypatch.setattr(engine, "SOLUTION_STORE", store)
+    body = {"type": "integral", "input": "w*sin(3*w) dw"}
+    client.post("/solve", json=body)  # primero sin formatos extra: el registro ya existe
+    client.post("/solve", json={**body, "formats": ["latex", "text"]})
+    key, _, _ = canonical_key(*solver._parse_input(body["input"]))
+    assert store.get(key)["formats"]["w|text"]["variable"] == "w"
+    assert solver.Solution.from_record(store.get(key)).rendered(solver.Symbol("w"), ["text"])
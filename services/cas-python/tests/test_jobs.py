@@ -0,0 +1,72 @@
+import os
+import sys
+import threading
+import time
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.jobs import JobQueue, QueueFull
+from app.main import app
+from app.solver import prepare_problem
+
+client = TestClient(app)
+
+def test_job_roundtrip_matches_solve():
+    r = client.post("/jobs", json={"type": "integral", "input": "x*sin(x) dx"})
+    assert r.status_code == 202 and r.headers["location"] == f"/jobs/{r.json()['id']}"
+
+    job = client.get(r.json()["poll"], params={"wait": 20}).json()
+    assert job["status"] == "done"
+    assert job["result"] == client.post("/solve", json={"type": "integral", "input": "x*sin(x) dx"}).json()
+
+    events = client.get(f"/jobs/{job['id']}/events").text
+    assert events.startswith("event: done\ndata: ")
+
+    assert client.get("/jobs/nope").status_code == 404
+    bad = client.post("/jobs", json={"type": "integral", "input": "∫ (x+1 dx"})
+    assert bad.status_code == 400 and bad.json()["position"] == 6
+
+def test_job_honors_solve_options_and_iterated_integrals():
+    for body in ({"type": "integral", "input": "x*cos(x) dx", "steps": True, "formats": ["latex", "text"], "plots": False},
+                 {"type": "integral", "input": "x*y dx dy", "formats": ["text"]}):
+        r = client.post("/jobs", json=body)
+        assert r.status_code == 202
+        job = client.get(r.json()["poll"], params={"wait": 20}).json()
+        assert job["status"] == "done"
+        assert job["result"] == client.post("/solve", json=body).json()
+
+def test_full_queue_rejects_and_finished_jobs_expire(monkeypatch):
+    release = threading.Event()
+    jobs = JobQueue(run=lambda problem: (release.wait(5), (200, {"ok": True}))[1], concurrency=1, maxsize=1, ttl=0)
+    monkeypatch.setattr(main, "JOBS", jobs)
+    problem = prepare_problem("x dx")
+
+    first = jobs.submit(problem, "x dx")
+    while first.status == "queued":
+        time.sleep(0.01)  # el único hilo lo toma y se queda esperando
+    jobs.submit(problem, "x dx")
+    with pytest.raises(QueueFull):
+        jobs.submit(problem, "x dx")
+    r = client.post("/jobs", json={"type": "integral", "input": "x dx"})
+    assert r.status_code == 503 and r.headers["retry-after"]
+
+    release.set()
+    first.done.result(5)
+    assert first.body == {"ok": True} and jobs.get(first.id) is None  # ttl=0: ya expiró
+    assert jobs.stats()["rejected"] == 2
+
+def test_slow_solve_is_handed_off_to_a_job(monkeypatch):
+    monkeypatch.setattr(main, "SOLVE_HANDOFF_MS", 1)
+    with TestClient(app) as c:  # el loop debe seguir vivo después de responder el 202
+        r = c.post("/solve", json={"type": "integral", "input": "x^3*exp(5*x)*cos(x) dx"})
+        assert r.status_code == 202 and r.json()["status"] == "running"
+        job = c.get(r.headers["location"], params={"wait": 20}).json()
+    assert job["status"] == "done" and "result_latex" in job["result"]
@@ -0,0 +1,82 @@
+import os
+import sys
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import pytest
+from fastapi.testclient import TestClient
+from sympy import Symbol, sympify
+
+from app import engine, solver
+from app.admission import AdmissionController
+from app.main import app
+from app.multiple import ITERATED
+from app.parser import ParseError
+
+client = TestClient(app)
+x, y = Symbol("x"), Symbol("y")
+
+def test_parse_pairs_each_sign_with_its_differential():
+    assert solver.parse_multiple("x^2 dx") is None
+    assert solver.parse_multiple("∫∫ x*y dx dy").levels == ((x, None), (y, None))
+    assert solver.parse_multiple("∫_0^1 ∫_0^y x*y dx dy").levels == ((x, (0, y)), (y, (0, 1)))
+    for bad in ("∫_0^1 x*y dx dy", "∫_0^x ∫_0^1 x*y dx dy", "x dx dx"):
+        with pytest.raises(ParseError):
+            solver.parse_multiple(bad)
+    with pytest.raises(ParseError):
+        solver.prepare_problem("x*y dx dy")  # antes se leía como ∫ x·y·d·x dy
+
+def test_levels_reuse_memoized_inner_integrals(monkeypatch):
+    solver.RESULT_CACHE.clear()
+    ITERATED.clear()
+    calls = []
+    compute = solver.compute_solution
+    monkeypatch.setattr(solver, "compute_solution", lambda expr, var, *a, **kw: calls.append(expr) or compute(expr, var, *a, **kw))
+
+    d = solver.solve_integral("x^7*y^7*z^7 dx dy dz")
+    assert d["result_latex"] == r"\frac{x^{8} y^{8} z^{8}}{512} + C" and d["tier"] == "iterated"
+    assert calls == [x**7]  # ∫ y^7 dy y ∫ z^7 dz son la misma ∫ x^7 dx
+    solver.solve_integral("a*x^7 + t^7 dt dx")
+    assert len(calls) == 2  # solo falta ∫ 1 dt (por a·x^7): el resto ya estaba
+
+def test_solve_and_stream_iterated_definite():
+    body = {"type": "integral", "input": "∫_0^1 ∫_0^y x*y dx dy", "formats": ["latex", "text"]}
+    data = client.post("/solve", json=body).json()
+    assert data["result_latex"] == r"\frac{1}{8}" and data["formats"]["text"]["variable"] == "x,y"
+    assert len(data["checks"]) == 2 and data["plots"] == []
+
+    r = client.post("/solve/stream", json={"type": "integral", "input": "x*y dx dy"})
+    events = [line[7:] for line in r.text.splitlines() if line.startswith("event: ")]
+    assert events == ["problem", "antiderivative", "steps", "verification", "done"]
+    assert client.post("/solve", json={"type": "integral", "input": "∫_0^1 x*y dx dy"}).status_code == 400
+
+def test_inner_bound_that_mentions_x():
+    # ∫_0^x y dy no puede guardarse como ∫_0^x x dx: la parte conserva su variable
+    data = client.post("/solve", json={"type": "integral", "input": "∫_0^1 ∫_0^x x*y dy dx"}).json()
+    assert data["result_latex"] == r"\frac{1}{8}"
+    data = client.post("/solve", json={"type": "integral", "input": "∫_0^2 ∫_0^x y^2 dy dx"}).json()
+    assert data["result_latex"] == r"\frac{4}{3}"
+
+def test_divergent_parts_fall_back_to_the_whole_level():
+    # 1/y y e^{-y}/y divergen en 0; (1 - e^{-y})/y no: ∞ - ∞ no es la respuesta
+    body = {"type": "integral", "input": "∫_0^1 ∫_0^1 exp(-x*y) dx dy", "formats": ["latex", "text"]}
+    data = client.post("/solve", json=body).json()
+    assert abs(float(sympify(data["formats"]["text"]["result"])) - 0.79660) < 1e-4
+    assert "revisar" not in "".join(data["checks"])
+
+    data = client.post("/solve", json={"type": "integral", "input": "∫∫_0^1 1/x + log(y) dx dy"}).json()
+    assert data["result_latex"] == r"\text{diverge}" and r"\infty" not in "".join(data["steps_latex"])
+
+def test_iterated_sum_takes_one_admission_slot(monkeypatch):
+    monkeypatch.setattr(engine, "ADMISSION", AdmissionController(limit=1, queue_size=0))
+    text = " + ".join(f"sin({k}*x)" for k in range(1, 31)) + " dx dy"
+    r = client.post("/solve", json={"type": "integral", "input": text})
+    assert r.status_code == 200 and r.json()["tier"] == "iterated"
+
+def test_checks_show_the_evaluated_integrand():
+    data = client.post("/solve", json={"type": "integral", "input": "1/(x+1) + x*y dx dy"}).json()
+    assert r"x y + \frac{1}{x + 1}" in data["checks"][0]
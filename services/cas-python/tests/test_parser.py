@@ -0,0 +1,61 @@
+import json
+import os
+import sys
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import pytest
+from fastapi.testclient import TestClient
+from sympy import Symbol
+from sympy.parsing.sympy_parser import parse_expr
+
+from app.main import app
+from app.parser import ParseError, Unsupported, parse_expression
+from app.solver import SAFE_FUNCS, TRANSFORMS, _DX_RE, _parse_input
+
+client = TestClient(app)
+
+EDGE_CASES = [
+    "x(x+1) dx", "(x+1)2 dx", "2 3 dx", "1/2x dx", "-2x dx", "-(x+1) dx", "x - y*z dx",
+    "a - (b+c) dx", "x/y/z dx", "(x*y)*z dx", "2^3^2 dx", "-x^2 dx", "x^-2 dx", "2*-x dx",
+    "x/-y dx", ".5 dx", "2.5x dx", "log(x, 2) dx", "x sin(x) cos(x) dx", "pi x dx", "E dE",
+]
+
+def _corpus_inputs():
+    texts = list(EDGE_CASES)
+    for path in ("app/data/corpus.json", "bench/corpus.json"):
+        with open(os.path.join(PROJECT_ROOT, path), encoding="utf-8") as f:
+            for items in json.load(f)["groups"].values():
+                texts.extend(items)
+    return texts
+
+def test_fast_parser_matches_parse_expr():
+    # mismo árbol que parse_expr(evaluate=False): las claves canónicas no cambian
+    for text in _corpus_inputs():
+        m = _DX_RE.match(text)
+        var = Symbol(m.group("var"))
+        fast = parse_expression(m.group("expr"), var, SAFE_FUNCS)
+        slow = parse_expr(m.group("expr"), local_dict={var.name: var, **SAFE_FUNCS},
+                          transformations=TRANSFORMS, evaluate=False)
+        assert fast == slow and fast.args == slow.args, text
+
+def test_unrecognized_input_falls_back_to_parse_expr():
+    for text in ("sin x", "2e", "xy", "alpha*x"):
+        with pytest.raises(Unsupported):
+            parse_expression(text, Symbol("x"), SAFE_FUNCS)
+    assert str(_parse_input("sin x dx")[0]) == "sin(x)"
+
+def test_syntax_errors_report_position():
+    with pytest.raises(ParseError) as e:
+        _parse_input("∫ (x+1 dx")
+    assert e.value.position == 6  # justo después de "1"
+
+    r = client.post("/solve", json={"type": "integral", "input": "x^2 + * 3 dx"})
+    assert r.status_code == 400
+    body = r.json()
+    assert body["position"] == 6
+    assert "columna 7" in body["detail"]
@@ -0,0 +1,53 @@
+import base64
+import os
+import sys
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import numpy as np
+from fastapi.testclient import TestClient
+from sympy import Symbol, cos, log, sin, sqrt, tan
+
+from app.main import app
+from app.plots import compiled, plot_data
+from app.solver import solve_integral
+
+x = Symbol("x")
+client = TestClient(app)
+
+def _decode(b64):
+    return np.frombuffer(base64.b64decode(b64), dtype="<f4")
+
+def test_plot_payload_is_compact_float32():
+    [p] = plot_data(cos(x), sin(x), x, points=100)
+    xs, f, F = _decode(p["x"]), _decode(p["f"]), _decode(p["F"])
+    assert p["encoding"] == "float32-base64" and p["n"] == len(xs) == len(f) == len(F) == 100
+    assert np.all(np.diff(xs) > 0)
+    assert np.allclose(f, np.cos(xs), atol=1e-5) and np.allclose(F, np.sin(xs), atol=1e-5)
+
+def test_poles_are_cut_and_domain_shrinks():
+    [p] = plot_data(tan(x) ** 2, tan(x) - x, x)
+    assert any(abs(b - np.pi / 2) < 0.05 for b in p["breaks"])
+    assert np.isnan(_decode(p["f"])).any()
+
+    [p] = plot_data(sqrt(1 - x ** 2), x, x)
+    assert -1.01 < p["x_range"][0] and p["x_range"][1] < 1.01
+
+def test_plots_skip_parameters_and_reuse_compiled_functions():
+    a = Symbol("a")
+    assert plot_data(a * x, a * x ** 2 / 2, x) == []
+    assert compiled(log(x), x) is compiled(log(x), x)
+    assert solve_integral("x*exp(x) dx")["plots"][0]["kind"] == "integrand_antiderivative"
+
+def test_plots_are_skippable_and_added_on_demand():
+    body = {"type": "integral", "input": "x^2*sinh(3x) dx"}
+    r = client.post("/solve", json={**body, "plots": False})
+    assert r.json()["plots"] == [] and "plot;dur=" not in r.headers["server-timing"]
+    # la misma solución (ya en caché) recibe los gráficos cuando alguien los pide
+    r = client.post("/solve", json=body)
+    assert r.json()["plots"][0]["kind"] == "integrand_antiderivative" and "plot;dur=" in r.headers["server-timing"]
+    assert client.post("/solve", json={**body, "plots": False}).json()["plots"] == []
@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.startup import WARMUP_INPUTS, Startup, warm_up
+
+def test_ready_only_after_warmup():
+    with TestClient(app) as c:
+        assert c.get("/health").json() == {"ok": True}
+        deadline = time.monotonic() + 60
+        while c.get("/ready").status_code == 503 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        body = c.get("/ready").json()
+    assert body["ready"] and body["stage"] == "ready"
+    assert {"import", "pool", "warmup", "total"} <= set(body["phases_ms"])
+
+def test_failed_pool_is_not_ready_but_failed_warmup_is():
+    class BrokenPool:
+        def start(self):
+            raise OSError("sin procesos")
+
+    startup, solved = Startup(), []
+    warm_up(startup, {"pool": BrokenPool()}, solved.append)
+    assert not startup.ready and solved == []
+    assert startup.stats()["stage"] == "failed" and startup.error == "sin procesos"
+
+    def broken_solve(text):
+        solved.append(text)
+        raise ValueError("warmup roto")
+
+    startup.restart()
+    warm_up(startup, {}, broken_solve)
+    assert startup.ready and startup.error == "warmup roto" and solved == list(WARMUP_INPUTS[:1])
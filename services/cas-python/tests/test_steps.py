@@ -0,0 +1,54 @@
+import os
+import sys
+import threading
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from fastapi.testclient import TestClient
+from sympy import exp, symbols
+from sympy.integrals.manualintegrate import manualintegrate
+
+from app import steps
+from app.main import app
+from app.steps import render_rule, rule_tree
+
+client = TestClient(app)
+
+def test_by_parts_derivation_reuses_cached_subtrees():
+    x, t = symbols("x t")
+    lines = render_rule(rule_tree(x**3 * exp(x), x), t)
+    assert lines[0].startswith(r"Por partes: $u = t^{3}$")
+    assert any(r"\int 3 t^{2} e^{t}\,dt" in line for line in lines)
+
+    hits = steps._RULES.stats()["hits"]
+    rule_tree(x**2 * exp(x), x)  # ya se desarrolló dentro de la anterior
+    assert steps._RULES.stats()["hits"] > hits
+
+def test_other_threads_do_not_see_the_steps_cache():
+    # el tier manual (modo inline) corre manualintegrate en otros hilos: sin la caché de pasos
+    x = symbols("x")
+    before = steps._RULES.stats()
+    steps._MEMO.active = True  # como si este hilo estuviera dentro de rule_tree
+    try:
+        worker = threading.Thread(target=manualintegrate, args=(x**5 * exp(x), x))
+        worker.start()
+        worker.join()
+    finally:
+        steps._MEMO.active = False
+    assert steps._RULES.stats() == before
+
+def test_solve_returns_derivation_only_when_asked():
+    body = {"type": "integral", "input": "sin(t)*cos(t)^2 dt"}
+    plain = client.post("/solve", json=body).json()
+    full = client.post("/solve", json={**body, "steps": True}).json()
+
+    assert not any("Sustitución" in s for s in plain["steps_latex"])
+    assert full["steps_latex"][:2] == plain["steps_latex"][:2]
+    assert full["steps_latex"][-1] == plain["steps_latex"][-1]  # "Obtenemos ..."
+    assert r"Sustitución: $u = \cos{\left(t \right)}$" in full["steps_latex"][2]
+    assert full["result_latex"] == plain["result_latex"]
+    assert client.post("/solve", json={**body, "steps": True}).json() == full
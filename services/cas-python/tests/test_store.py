@@ -0,0 +1,48 @@
+import os
+import sys
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.cache import canonical_key
+from app.solver import Solution, _parse_input, compute_solution
+from app.store import SolutionStore, prewarm
+
+def _solve_record(text):
+    key, cexpr, cvar = canonical_key(*_parse_input(text))
+    return key, compute_solution(cexpr, cvar).to_record()
+
+def test_record_roundtrip_keeps_payload_and_symbols(tmp_path):
+    store = SolutionStore(tmp_path / "s.sqlite3")
+    key, record = _solve_record("x*exp(x) dx")
+    store.put(key, record)
+
+    # otro "worker" abre el mismo archivo
+    other = SolutionStore(tmp_path / "s.sqlite3")
+    sol = Solution.from_record(other.get(key))
+    assert sol.ok is True
+    assert sol.for_var(sol.var) == record["payload"]
+    assert "e^{t}" in sol.for_var(_parse_input("t dt")[1])["result_latex"]
+
+def test_new_version_invalidates_old_entries(tmp_path):
+    path = tmp_path / "s.sqlite3"
+    key, record = _solve_record("x^2 dx")
+    SolutionStore(path, version="old").put(key, record)
+
+    store = SolutionStore(path, version="new")
+    assert store.get(key) is None and len(store) == 0
+
+    # un worker nuevo no borra lo del deploy anterior: eso lo hace purge()
+    assert SolutionStore(path, version="old").get(key) is not None
+    assert store.purge() == 1 and SolutionStore(path, version="old").get(key) is None
+
+def test_prewarm_runs_once_per_version(tmp_path):
+    store = SolutionStore(tmp_path / "s.sqlite3")
+    seen = []
+    corpus = {"version": 1, "groups": {"basic": ["x dx", "x^2 dx"]}}
+    assert prewarm(store, seen.append, corpus) == 2
+    assert prewarm(store, seen.append, corpus) == 0
+    assert seen == ["x dx", "x^2 dx"]
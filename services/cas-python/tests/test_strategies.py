@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+from sympy import diff, simplify
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.solver import _parse_input
+from app.strategies import integrate_tiered
+
+@pytest.mark.parametrize("text, tier", [
+    ("3x^2 + 2x + 1 dx", "polynomial"),
+    ("(x+1)/(x^2+3x+2) dx", "polynomial"),
+    ("exp(3*x) dx", "table"),
+    ("sqrt(x) + cos(2x) dx", "table"),
+    ("x*exp(2*x) dx", "manual"),
+])
+def test_cheap_tiers_answer_first(text, tier):
+    expr, var = _parse_input(text)
+    res, used, timings = integrate_tiered(expr, var)
+    assert used == tier
+    assert "integrate" not in timings
+    assert simplify(diff(res, var) - expr.doit()) == 0
+
+def test_falls_back_to_full_integrate():
+    expr, var = _parse_input("1/cos(x)^2 dx")
+    res, used, timings = integrate_tiered(expr, var)
+    assert used == "integrate"
+    assert set(timings) == {"polynomial", "table", "manual", "integrate"}
@@ -0,0 +1,58 @@
+import json
+import os
+import sys
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.main import app
+
+client = TestClient(app)
+
+def _events(text):
+    r = client.post("/solve/stream", json={"type": "integral", "input": text})
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for chunk in r.text.strip().split("\n\n"):
+        name, data = chunk.split("\n")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+def test_stages_arrive_in_order_and_match_solve():
+    stages = ["problem", "antiderivative", "steps", "verification", "done"]
+    for attempt in range(2):  # la segunda vez sale de la caché: mismas etapas
+        events = _events("t^2*exp(3*t) dt")
+        assert [name for name, _ in events] == stages
+    data = dict(events)
+    solved = client.post("/solve", json={"type": "integral", "input": "t^2*exp(3*t) dt"}).json()
+    assert data["done"] == solved
+    assert data["problem"]["problem_latex"] == solved["problem_latex"]
+    assert data["antiderivative"]["result_latex"] == solved["result_latex"]
+    assert data["steps"]["steps_latex"] == solved["steps_latex"]
+    assert data["verification"]["checks"] == solved["checks"]
+
+def test_stream_errors_and_definite_integrals():
+    [(name, data)] = _events("∫ (x+1 dx")
+    assert name == "error" and data["status"] == 400 and data["position"] == 6
+
+    events = dict(_events("∫_0^1 x^3 dx"))
+    assert events["antiderivative"]["result_latex"] == r"\frac{1}{4}" and "done" in events
+
+def test_long_streams_ping_and_hand_off_to_a_job(monkeypatch):
+    monkeypatch.setattr(main, "SSE_PING_S", 0.01)
+    r = client.post("/solve/stream", json={"type": "integral", "input": "x^3*exp(4*x)*sin(x) dx"})
+    assert ": ping" in r.text and r.text.rstrip().endswith("}")  # los pings no cortan el stream
+
+    monkeypatch.setattr(main, "SOLVE_HANDOFF_MS", 1)
+    with TestClient(app) as c:  # el loop debe seguir vivo después de cerrar el stream
+        r = c.post("/solve/stream", json={"type": "integral", "input": "x^3*exp(6*x)*cos(x) dx"})
+        name, data = r.text.strip().split("\n\n")[-1].split("\n")
+        assert name == "event: job"
+        job = c.get(json.loads(data[len("data: "):])["poll"], params={"wait": 20}).json()
+    assert job["status"] == "done" and "result_latex" in job["result"]
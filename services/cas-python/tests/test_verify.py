@@ -0,0 +1,45 @@
+import os
+import sys
+
+from sympy import Symbol, asin, cos, diff, exp
+
+# Asegurar que Python encuentre el paquete 'app' (carpeta hermana de 'tests')
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.solver import _parse_input, solve_integral
+from app.verify import numeric_check, verify
+
+def test_numeric_check_accepts_correct_and_rejects_wrong():
+    expr, x = _parse_input("x*exp(x) dx")
+    good = diff(x * exp(x) - exp(x), x)
+    bad = diff(x * exp(x), x)
+    assert numeric_check(good, expr, x) is True
+    assert numeric_check(bad, expr, x) is False
+
+def test_numeric_check_handles_parameters_and_branch_cuts():
+    expr, x = _parse_input("a/sqrt(1-x^2) dx")
+    assert numeric_check(diff(Symbol("a") * asin(x), x), expr, x) is True
+
+def test_auto_falls_back_to_symbolic_when_inconclusive(monkeypatch):
+    import app.verify as verify_module
+    monkeypatch.setattr(verify_module, "numeric_check", lambda *args: None)
+    expr, x = _parse_input("sin(x) dx")
+    assert verify(diff(-cos(x), x), expr, x) == (True, "symbolic")
+    assert verify(diff(-cos(x), x), expr, x, "numeric") == (None, "none")
+
+def test_auto_confirms_a_numeric_mismatch_symbolically(monkeypatch):
+    import app.verify as verify_module
+    monkeypatch.setattr(verify_module, "numeric_check", lambda *args: False)
+    expr, x = _parse_input("sin(x) dx")
+    assert verify(diff(-cos(x), x), expr, x) == (True, "symbolic")
+    assert verify(diff(cos(x), x), expr, x) == (False, "symbolic")
+    assert verify(diff(-cos(x), x), expr, x, "numeric") == (False, "numeric")
+
+def test_requested_mode_is_reported_in_checks():
+    body = solve_integral("x*cos(x) dx", "symbolic")
+    assert "simbólica" in body["checks"][0]
+    body = solve_integral("x*cos(x) dx")
+    assert "numérica" in body["checks"][0]